@@ -0,0 +1,140 @@
+"""Benchmark message reads through the HTTP API: orjson fast path vs pydantic
+
+Serves GET /api/v1/messages/public?limit=100 in-process (httpx over ASGI,
+no network) against a scratch database, once through the real endpoint
+(rows encoded straight to bytes) and once through an equivalent route that
+builds pydantic Message models and lets FastAPI validate the response, as
+the endpoint did before the fast path.
+
+Run: python benchmarks/bench_api.py [--requests N] [--concurrency C]
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import List
+
+# Scratch database, set before the server reads its settings
+os.environ.setdefault("HIVE_SQLITE_DB_PATH", os.path.join(tempfile.mkdtemp(prefix="hive-bench-"), "hive.db"))
+os.environ.setdefault("HIVE_LOG_LEVEL", "WARNING")
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import logging  # noqa: E402
+
+import httpx  # noqa: E402
+
+from server.api.messages import next_cursor  # noqa: E402
+from server.main import app  # noqa: E402
+from server.models.message import generate_message_id  # noqa: E402
+from server.storage.sqlite_manager import get_sqlite_manager  # noqa: E402
+from shared.models import Message, PollMessagesResponse  # noqa: E402
+
+LIMIT = 100
+FAST_PATH = f"/api/v1/messages/public?limit={LIMIT}"
+VALIDATED_PATH = f"/bench/validated/public?limit={LIMIT}"
+
+
+@app.get("/bench/validated/public", response_model=PollMessagesResponse)
+async def validated_public_messages(limit: int = LIMIT):
+    """The public read as it was before the fast path"""
+    db = await get_sqlite_manager()
+    head_seq = await db.get_latest_seq()
+    messages_data = await db.get_public_messages(limit=limit)
+    messages = [
+        Message(
+            message_id=msg_data["message_id"],
+            from_agent=msg_data["from_agent"],
+            to_agent=msg_data.get("to_agent"),
+            channel=msg_data["channel"],
+            content=msg_data["content"],
+            timestamp=datetime.fromisoformat(msg_data["timestamp"]),
+            thread_id=msg_data.get("thread_id")
+        )
+        for msg_data in messages_data
+    ]
+    return PollMessagesResponse(
+        messages=messages,
+        has_more=len(messages_data) >= limit,
+        next_cursor=next_cursor(messages_data, limit, head_seq, None)
+    )
+
+
+async def seed(messages: int):
+    """Register a sender and fill the public channel"""
+    db = await get_sqlite_manager()
+    await db.register_agent("bench-sender", "benchmark traffic")
+    for i in range(messages):
+        await db.send_message(
+            generate_message_id(),
+            "bench-sender",
+            f"Benchmark message {i}: status update with a realistic amount of text in it"
+        )
+
+
+async def run(client: httpx.AsyncClient, path: str, requests: int, concurrency: int) -> dict:
+    """Issue requests from concurrent workers, returning throughput and latency"""
+    latencies: List[float] = []
+    remaining = iter(range(requests))
+
+    async def worker():
+        for _ in remaining:
+            start = time.perf_counter()
+            response = await client.get(path)
+            latencies.append(time.perf_counter() - start)
+            response.raise_for_status()
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "rps": requests / elapsed,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p99_ms": latencies[min(int(len(latencies) * 0.99), len(latencies) - 1)] * 1000,
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=2000, help="Requests per variant")
+    parser.add_argument("--concurrency", type=int, default=16, help="Concurrent clients")
+    parser.add_argument("--messages", type=int, default=500, help="Messages seeded into the channel")
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    await seed(args.messages)
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        fast = await client.get(FAST_PATH)
+        validated = await client.get(VALIDATED_PATH)
+        if fast.json() != validated.json():
+            raise SystemExit("Fast path and validated responses differ")
+
+        # Warm both paths before measuring
+        for path in (FAST_PATH, VALIDATED_PATH):
+            await run(client, path, min(args.requests, 200), args.concurrency)
+
+        results = {
+            "pydantic (before)": await run(client, VALIDATED_PATH, args.requests, args.concurrency),
+            "orjson (after)": await run(client, FAST_PATH, args.requests, args.concurrency),
+        }
+
+    await (await get_sqlite_manager()).close()
+
+    print(f"GET /api/v1/messages/public limit={LIMIT}, {args.requests} requests, concurrency {args.concurrency}")
+    print(f"{'variant':<20} {'req/s':>10} {'p50 ms':>10} {'p99 ms':>10}")
+    for name, result in results.items():
+        print(f"{name:<20} {result['rps']:>10.0f} {result['p50_ms']:>10.2f} {result['p99_ms']:>10.2f}")
+    before, after = results["pydantic (before)"], results["orjson (after)"]
+    print(f"speedup: {after['rps'] / before['rps']:.2f}x req/s, p99 {before['p99_ms'] / after['p99_ms']:.2f}x lower")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,500 @@
+"""End-to-end load generator: simulated agents over the hive tool, MCP stdio and HTTP
+
+Runs N agents per transport for a fixed duration. Each agent loops on
+Poisson arrivals at its configured rates, picking one of:
+
+- poll: read what is new (the hive tool without a message; over HTTP, the
+  public channel and the agent's DMs after its cursors)
+- broadcast: send a public message
+- dm: send a message to one other agent
+- heartbeat: mark the agent as alive
+
+Transports:
+
+- tool: mcp_server.hive called in-process, one MCP session per agent
+- mcp: one `python -m server.mcp_server` subprocess per agent, spoken to
+  over newline-delimited JSON-RPC on stdin/stdout, as an MCP client does
+- http: the /api/v1 routes of server.main, in-process over ASGI, or a
+  running server with --url
+
+The hive tool has no direct messages, so on tool and mcp a "dm" is a
+message to the shared group channel `load`, which only the load agents
+read. A heartbeat through the hive tool is a call without a message.
+
+Reports, per transport: messages sent per second, messages received,
+p50/p95/p99 latency of each operation, writer lock waits and busy errors
+(SQLite, in-process transports only: the mcp agents write from their own
+processes) and database growth. --json or --output write the report as
+JSON with the commit it ran on, for comparing runs across commits.
+
+Uses a scratch database unless HIVE_SQLITE_DB_PATH is set;
+HIVE_STORAGE_BACKEND selects the backend as for the server.
+
+Run: python benchmarks/hive_load.py [--transport tool,mcp,http] [--agents N] [--duration S]
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import re
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+# Scratch database, set before the server reads its settings
+os.environ.setdefault("HIVE_SQLITE_DB_PATH", os.path.join(tempfile.mkdtemp(prefix="hive-load-"), "hive.db"))
+os.environ.setdefault("HIVE_LOG_LEVEL", "WARNING")
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT))
+
+import logging  # noqa: E402
+
+import httpx  # noqa: E402
+
+from server import mcp_server  # noqa: E402
+from server.config import settings  # noqa: E402
+from server.main import app  # noqa: E402
+from server.storage.backend import BACKEND_MEMORY, BACKEND_SQLITE, get_storage_manager  # noqa: E402
+
+TRANSPORTS = ("tool", "mcp", "http")
+OPERATIONS = ("poll", "broadcast", "dm", "heartbeat")
+# Group channel standing in for DMs where the hive tool is the client
+DM_CHANNEL = "load"
+# Protocol version sent in the MCP initialize request
+MCP_PROTOCOL_VERSION = "2024-11-05"
+# Matches the hive tool's "Received N message(s)" line
+RECEIVED_PATTERN = re.compile(r"Received (\d+) message")
+HTTP_PAGE = 100
+
+
+class ToolAgent:
+    """An agent calling the hive tool in-process under its own MCP session"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.session_id = f"{name}-session"
+
+    async def start(self):
+        mcp_server.set_session_id(self.session_id)
+        await self.call()
+
+    async def call(self, message: str = "", channel: str = "") -> int:
+        """One hive call; returns how many messages it received"""
+        # Sessions live in a contextvar, bound per agent task
+        mcp_server.set_session_id(self.session_id)
+        text = await mcp_server.hive(self.name, "load testing", message=message, channel=channel)
+        return parse_tool_result(text)
+
+    async def poll(self) -> int:
+        return await self.call()
+
+    async def broadcast(self, content: str) -> int:
+        return await self.call(message=content)
+
+    async def dm(self, peer: "ToolAgent", content: str) -> int:
+        return await self.call(message=content, channel=DM_CHANNEL)
+
+    async def heartbeat(self) -> int:
+        return await self.call()
+
+    async def close(self):
+        mcp_server.end_session(self.session_id)
+
+
+class MCPAgent(ToolAgent):
+    """An agent speaking MCP over stdio to its own server process"""
+
+    def __init__(self, name: str):
+        super().__init__(name)
+        self.process: Optional[asyncio.subprocess.Process] = None
+        self.next_id = 0
+
+    async def start(self):
+        env = dict(os.environ, MCP_SESSION_ID=self.session_id, HIVE_MCP_RELAY="0")
+        self.process = await asyncio.create_subprocess_exec(
+            sys.executable, "-m", "server.mcp_server",
+            cwd=str(REPO_ROOT),
+            env=env,
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.DEVNULL,
+            limit=2 ** 24
+        )
+        await self.request("initialize", {
+            "protocolVersion": MCP_PROTOCOL_VERSION,
+            "capabilities": {},
+            "clientInfo": {"name": "hive-load", "version": "1.0"}
+        })
+        await self.send({"jsonrpc": "2.0", "method": "notifications/initialized"})
+        await self.call()
+
+    async def send(self, message: Dict[str, Any]):
+        self.process.stdin.write(json.dumps(message).encode() + b"\n")
+        await self.process.stdin.drain()
+
+    async def request(self, method: str, params: Dict[str, Any]) -> Dict[str, Any]:
+        """Send a request and wait for its response (one request in flight per agent)"""
+        self.next_id += 1
+        await self.send({"jsonrpc": "2.0", "id": self.next_id, "method": method, "params": params})
+        while True:
+            line = await self.process.stdout.readline()
+            if not line:
+                raise RuntimeError(f"MCP server of {self.name} exited")
+            response = json.loads(line)
+            if isinstance(response, dict) and response.get("id") == self.next_id:
+                break
+        if "error" in response:
+            raise RuntimeError(response["error"].get("message", "MCP error"))
+        return response["result"]
+
+    async def call(self, message: str = "", channel: str = "") -> int:
+        arguments = {"agent_name": self.name, "description": "load testing"}
+        if message:
+            arguments["message"] = message
+        if channel:
+            arguments["channel"] = channel
+        result = await self.request("tools/call", {"name": "hive", "arguments": arguments})
+        if result.get("isError"):
+            raise RuntimeError(result["content"][0]["text"])
+        return parse_tool_result(result["content"][0]["text"])
+
+    async def close(self):
+        if self.process is None or self.process.returncode is not None:
+            return
+        self.process.stdin.close()
+        try:
+            await asyncio.wait_for(self.process.wait(), timeout=5)
+        except asyncio.TimeoutError:
+            self.process.kill()
+            await self.process.wait()
+
+
+class HTTPAgent:
+    """An agent using the /api/v1 routes"""
+
+    def __init__(self, name: str, client: httpx.AsyncClient):
+        self.name = name
+        self.client = client
+        self.agent_id: Optional[str] = None
+        self.public_cursor: Optional[str] = None
+        self.dm_cursor: Optional[str] = None
+
+    async def start(self):
+        response = await self.client.post("/api/v1/agents/register", json={"context_summary": self.name})
+        response.raise_for_status()
+        self.agent_id = response.json()["agent_id"]
+        # Start reading from the current end, as a new hive session does
+        await self.poll()
+
+    async def read(self, path: str, cursor: Optional[str]) -> tuple:
+        params = {"limit": HTTP_PAGE}
+        if cursor:
+            params["cursor"] = cursor
+        response = await self.client.get(path, params=params)
+        response.raise_for_status()
+        body = response.json()
+        return len(body["messages"]), body.get("next_cursor") or cursor
+
+    async def poll(self) -> int:
+        public, self.public_cursor = await self.read("/api/v1/messages/public", self.public_cursor)
+        dms, self.dm_cursor = await self.read(f"/api/v1/messages/dm/{self.agent_id}", self.dm_cursor)
+        return public + dms
+
+    async def broadcast(self, content: str) -> int:
+        response = await self.client.post(
+            "/api/v1/messages/public", params={"from_agent": self.agent_id}, json={"content": content}
+        )
+        response.raise_for_status()
+        return 0
+
+    async def dm(self, peer: "HTTPAgent", content: str) -> int:
+        response = await self.client.post(
+            "/api/v1/messages/dm",
+            params={"from_agent": self.agent_id, "to_agent": peer.agent_id},
+            json={"content": content}
+        )
+        response.raise_for_status()
+        return 0
+
+    async def heartbeat(self) -> int:
+        response = await self.client.post(f"/api/v1/agents/{self.agent_id}/heartbeat")
+        response.raise_for_status()
+        return 0
+
+    async def close(self):
+        pass
+
+
+def parse_tool_result(text: str) -> int:
+    """Number of messages a hive tool response carries; raises on an ERROR response"""
+    if text.startswith("ERROR"):
+        raise RuntimeError(text)
+    match = RECEIVED_PATTERN.search(text)
+    return int(match.group(1)) if match else 0
+
+
+def percentile(sorted_values: List[float], fraction: float) -> Optional[float]:
+    """Nearest-rank percentile of already sorted values"""
+    if not sorted_values:
+        return None
+    return sorted_values[min(int(len(sorted_values) * fraction), len(sorted_values) - 1)]
+
+
+class Recorder:
+    """Latencies, errors and message counts of one transport's run"""
+
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = {op: [] for op in OPERATIONS}
+        self.errors: Dict[str, int] = {op: 0 for op in OPERATIONS}
+        self.first_errors: List[str] = []
+        self.received = 0
+
+    def record(self, op: str, seconds: float, received: int):
+        self.latencies[op].append(seconds)
+        self.received += received
+
+    def fail(self, op: str, error: BaseException):
+        self.errors[op] += 1
+        if len(self.first_errors) < 5:
+            self.first_errors.append(f"{op}: {str(error)[:200]}")
+
+    def operations(self) -> Dict[str, Dict[str, Any]]:
+        results = {}
+        for op in OPERATIONS:
+            values = sorted(self.latencies[op])
+            results[op] = {
+                "count": len(values),
+                "errors": self.errors[op],
+                **{
+                    f"p{int(q * 100)}_ms": None if percentile(values, q) is None else round(percentile(values, q) * 1000, 3)
+                    for q in (0.50, 0.95, 0.99)
+                },
+            }
+        return results
+
+
+async def run_agent(agent, peers: list, rates: Dict[str, float], until: float, rng: random.Random, recorder: Recorder):
+    """Drive one agent until the deadline, waiting exponentially between operations"""
+    total_rate = sum(rates.values())
+    ops = [op for op in OPERATIONS if rates[op] > 0]
+    weights = [rates[op] for op in ops]
+    sent = 0
+    while True:
+        delay = rng.expovariate(total_rate)
+        remaining = until - time.perf_counter()
+        if delay >= remaining:
+            await asyncio.sleep(max(remaining, 0))
+            return
+        await asyncio.sleep(delay)
+        op = rng.choices(ops, weights)[0]
+        sent += 1
+        content = f"{agent.name} message {sent}"
+        started = time.perf_counter()
+        try:
+            if op == "poll":
+                received = await agent.poll()
+            elif op == "broadcast":
+                received = await agent.broadcast(content)
+            elif op == "dm":
+                received = await agent.dm(rng.choice(peers), content)
+            else:
+                received = await agent.heartbeat()
+        except Exception as e:
+            recorder.fail(op, e)
+            continue
+        recorder.record(op, time.perf_counter() - started, received)
+
+
+def storage_size() -> Optional[int]:
+    """Bytes of the SQLite database and its WAL, or None for other backends"""
+    if settings.storage_backend.lower() != BACKEND_SQLITE:
+        return None
+    return sum(
+        os.path.getsize(path)
+        for path in (settings.sqlite_db_path, settings.sqlite_db_path + "-wal")
+        if os.path.exists(path)
+    )
+
+
+async def writer_stats() -> Optional[Dict[str, Any]]:
+    """The in-process SQLite writer's counters, or None for other backends"""
+    stats = await (await get_storage_manager()).get_stats()
+    return stats.get("write_batcher")
+
+
+async def run_transport(transport: str, args: argparse.Namespace, rates: Dict[str, float]) -> Dict[str, Any]:
+    """Start the agents of one transport, drive them for the duration and report"""
+    rng = random.Random(f"{args.seed}-{transport}")
+    client = None
+    if transport == "http":
+        if args.url:
+            client = httpx.AsyncClient(base_url=args.url, timeout=30)
+        else:
+            client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://load", timeout=30)
+
+    names = [f"load-{transport}-{args.seed}-{i}" for i in range(args.agents)]
+    if transport == "tool":
+        agents = [ToolAgent(name) for name in names]
+    elif transport == "mcp":
+        agents = [MCPAgent(name) for name in names]
+    else:
+        agents = [HTTPAgent(name, client) for name in names]
+
+    # In-process counters only see in-process writes
+    in_process = transport == "tool" or (transport == "http" and not args.url)
+    try:
+        # Connect everyone before the clock starts (mcp spawns a process per agent)
+        await asyncio.gather(*(agent.start() for agent in agents))
+
+        size_before = storage_size() if not args.url else None
+        writer_before = await writer_stats() if in_process else None
+
+        recorder = Recorder()
+        started = time.perf_counter()
+        until = started + args.duration
+        await asyncio.gather(*(
+            asyncio.create_task(run_agent(
+                agent, [peer for peer in agents if peer is not agent] or agents, rates, until,
+                random.Random(rng.random()), recorder
+            ))
+            for agent in agents
+        ))
+        elapsed = time.perf_counter() - started
+
+        writer_after = await writer_stats() if in_process else None
+        size_after = storage_size() if not args.url else None
+    finally:
+        await asyncio.gather(*(agent.close() for agent in agents), return_exceptions=True)
+        if client is not None:
+            await client.aclose()
+
+    operations = recorder.operations()
+    sent = operations["broadcast"]["count"] + operations["dm"]["count"]
+    writer = None
+    if writer_before is not None and writer_after is not None:
+        writer = {
+            key: round(writer_after[key] - writer_before[key], 3)
+            for key in ("lock_waits", "lock_wait_ms", "commit_ms", "busy_errors", "batches_committed", "units_committed")
+        }
+    return {
+        "elapsed_seconds": round(elapsed, 3),
+        "messages_sent": sent,
+        "msgs_per_sec": round(sent / elapsed, 2),
+        "messages_received": recorder.received,
+        "received_per_sec": round(recorder.received / elapsed, 2),
+        "operations": operations,
+        "writer": writer,
+        "db_growth_bytes": None if size_before is None or size_after is None else size_after - size_before,
+        "sample_errors": recorder.first_errors,
+    }
+
+
+def git_revision() -> Dict[str, Any]:
+    """Commit the tree is at and whether it has local changes, if it is a git checkout"""
+    def git(*argv: str) -> Optional[str]:
+        try:
+            return subprocess.run(
+                ["git", *argv], cwd=REPO_ROOT, capture_output=True, text=True, check=True, timeout=10
+            ).stdout.strip()
+        except (OSError, subprocess.SubprocessError):
+            return None
+
+    status = git("status", "--porcelain", "--untracked-files=no")
+    return {"commit": git("rev-parse", "HEAD"), "dirty": None if status is None else bool(status)}
+
+
+def print_report(report: Dict[str, Any]):
+    config = report["config"]
+    print(
+        f"HIVE load: {config['agents']} agents x {config['duration']}s per transport, "
+        f"backend {report['backend']}, commit {(report['commit'] or 'unknown')[:12]}"
+        f"{' (dirty)' if report['dirty'] else ''}"
+    )
+    print("rates per agent (/s): " + ", ".join(f"{op} {config['rates'][op]:g}" for op in OPERATIONS))
+    for transport, result in report["transports"].items():
+        print()
+        print(
+            f"[{transport}] {result['msgs_per_sec']:.1f} msgs/s sent, {result['received_per_sec']:.1f} msgs/s received "
+            f"over {result['elapsed_seconds']:.1f}s"
+        )
+        print(f"  {'operation':<10} {'count':>7} {'errors':>7} {'p50':>10} {'p95':>10} {'p99':>10}")
+        for op, stats in result["operations"].items():
+            cells = [f"{stats[key]:>8.2f}ms" if stats[key] is not None else f"{'-':>10}" for key in ("p50_ms", "p95_ms", "p99_ms")]
+            print(f"  {op:<10} {stats['count']:>7} {stats['errors']:>7} {' '.join(cells)}")
+        writer = result["writer"]
+        if writer is not None:
+            print(
+                f"  writer lock: {writer['lock_waits']:g} waits, {writer['lock_wait_ms']:.1f} ms waiting, "
+                f"{writer['busy_errors']:g} busy errors, {writer['batches_committed']:g} commits "
+                f"({writer['commit_ms']:.1f} ms in transactions)"
+            )
+        else:
+            print("  writer lock: not measured (writes in other processes, or not SQLite)")
+        if result["db_growth_bytes"] is not None:
+            print(f"  database growth: {result['db_growth_bytes'] / 1024:.1f} KiB (db + wal)")
+        for error in result["sample_errors"]:
+            print(f"  error: {error}")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--transport", default=",".join(TRANSPORTS), help="Comma-separated transports to run, in order")
+    parser.add_argument("--agents", type=int, default=8, help="Agents per transport")
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds of load per transport")
+    parser.add_argument("--poll-rate", type=float, default=2.0, help="Polls per agent per second")
+    parser.add_argument("--broadcast-rate", type=float, default=0.5, help="Public messages per agent per second")
+    parser.add_argument("--dm-rate", type=float, default=0.5, help="Direct messages per agent per second")
+    parser.add_argument("--heartbeat-rate", type=float, default=0.2, help="Heartbeats per agent per second")
+    parser.add_argument("--seed", type=int, default=1, help="Random seed (also part of the agent names)")
+    parser.add_argument("--url", help="Base URL of a running HIVE HTTP server for the http transport")
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON instead of a table")
+    parser.add_argument("--output", help="Also write the JSON report to this file")
+    args = parser.parse_args()
+
+    transports = [name.strip() for name in args.transport.split(",") if name.strip()]
+    unknown = [name for name in transports if name not in TRANSPORTS]
+    if unknown:
+        parser.error(f"unknown transport(s): {', '.join(unknown)} (expected {', '.join(TRANSPORTS)})")
+    rates = {
+        "poll": args.poll_rate,
+        "broadcast": args.broadcast_rate,
+        "dm": args.dm_rate,
+        "heartbeat": args.heartbeat_rate,
+    }
+    if args.agents < 1 or args.duration <= 0 or any(rate < 0 for rate in rates.values()) or sum(rates.values()) <= 0:
+        parser.error("need at least one agent, a positive duration and non-negative rates with a positive total")
+
+    logging.disable(logging.INFO)
+    backend = settings.storage_backend.lower()
+    if backend == BACKEND_MEMORY and "mcp" in transports:
+        print("warning: with the memory backend every mcp agent has its own private store", file=sys.stderr)
+
+    report = {
+        **git_revision(),
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "backend": backend,
+        "config": {"agents": args.agents, "duration": args.duration, "rates": rates, "seed": args.seed, "url": args.url},
+        "transports": {},
+    }
+    db = await get_storage_manager()
+    try:
+        for transport in transports:
+            report["transports"][transport] = await run_transport(transport, args, rates)
+    finally:
+        await db.close()
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2) + "\n")
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_report(report)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
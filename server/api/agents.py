@@ -13,7 +13,8 @@ from shared.models import (
     ListAgentsResponse,
     WhoisResponse
 )
-from server.storage.sqlite_manager import get_sqlite_manager
+from server.api.encoding import ORJSONBytesResponse, agent_json
+from server.storage.backend import get_storage_manager
 from server.models.agent import generate_agent_name
 
 logger = logging.getLogger(__name__)
@@ -31,7 +32,7 @@ async def register_agent(request: RegisterRequest):
     Returns:
         RegisterResponse: Agent ID and registration status
     """
-    db = await get_sqlite_manager()
+    db = await get_storage_manager()
 
     # Generate unique agent name
     max_attempts = 100
@@ -83,7 +84,7 @@ async def update_heartbeat(agent_id: str):
     Returns:
         dict: Success status
     """
-    db = await get_sqlite_manager()
+    db = await get_storage_manager()
 
     success = await db.update_heartbeat(agent_id)
 
@@ -108,7 +109,7 @@ async def update_context(agent_id: str, request: UpdateContextRequest):
     Returns:
         UpdateContextResponse: Update status and timestamp
     """
-    db = await get_sqlite_manager()
+    db = await get_storage_manager()
 
     # Check if agent exists
     agent_data = await db.get_agent(agent_id)
@@ -119,15 +120,8 @@ async def update_context(agent_id: str, request: UpdateContextRequest):
         )
 
     # Update context in database
-    try:
-        conn = await db.get_connection()
-        await conn.execute(
-            "UPDATE agents SET context_summary = ? WHERE agent_id = ?",
-            (request.context_summary, agent_id)
-        )
-        await conn.commit()
-    except Exception as e:
-        logger.error(f"Failed to update context for {agent_id}: {e}")
+    success = await db.update_agent_context(agent_id, request.context_summary)
+    if not success:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Failed to update context"
@@ -150,7 +144,7 @@ async def list_agents():
     Returns:
         ListAgentsResponse: List of agent IDs and count
     """
-    db = await get_sqlite_manager()
+    db = await get_storage_manager()
 
     agent_ids = await db.list_agents(include_stale=False)
 
@@ -166,28 +160,13 @@ async def whois_all():
     Get details for all active agents.
 
     Returns:
-        WhoisResponse: List of agent details
+        WhoisResponse: List of agent details (encoded without re-validation)
     """
-    db = await get_sqlite_manager()
+    db = await get_storage_manager()
 
     agents_data = await db.get_all_agents_details(include_stale=False)
 
-    agents = []
-    for agent_data in agents_data:
-        try:
-            agent = Agent(
-                agent_id=agent_data["agent_id"],
-                context_summary=agent_data.get("context_summary", ""),
-                registered_at=datetime.fromisoformat(agent_data["registered_at"]),
-                last_seen=datetime.fromisoformat(agent_data["last_heartbeat"]),
-                status=agent_data.get("status", "active")
-            )
-            agents.append(agent)
-        except Exception as e:
-            logger.error(f"Failed to parse agent data: {e}")
-            continue
-
-    return WhoisResponse(agents=agents)
+    return ORJSONBytesResponse({"agents": [agent_json(agent_data) for agent_data in agents_data]})
 
 
 @router.get("/{agent_id}", response_model=Agent)
@@ -201,7 +180,7 @@ async def get_agent(agent_id: str):
     Returns:
         Agent: Agent details
     """
-    db = await get_sqlite_manager()
+    db = await get_storage_manager()
 
     agent_data = await db.get_agent(agent_id)
 
@@ -211,18 +190,4 @@ async def get_agent(agent_id: str):
             detail=f"Agent not found: {agent_id}"
         )
 
-    try:
-        agent = Agent(
-            agent_id=agent_data["agent_id"],
-            context_summary=agent_data.get("context_summary", ""),
-            registered_at=datetime.fromisoformat(agent_data["registered_at"]),
-            last_seen=datetime.fromisoformat(agent_data["last_heartbeat"]),
-            status=agent_data.get("status", "active")
-        )
-        return agent
-    except Exception as e:
-        logger.error(f"Failed to parse agent data for {agent_id}: {e}")
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Failed to parse agent data"
-        )
+    return ORJSONBytesResponse(agent_json(agent_data))
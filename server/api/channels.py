@@ -0,0 +1,292 @@
+"""Group channel API endpoints"""
+import logging
+from datetime import datetime
+from fastapi import APIRouter, HTTPException, Query, status
+from typing import Optional
+
+from shared.models import (
+    Channel,
+    CreateChannelRequest,
+    ListChannelsResponse,
+    ChannelMembersResponse,
+    SendMessageRequest,
+    SendMessageResponse,
+    PollMessagesResponse
+)
+from server.api.messages import long_poll, parse_cursor, poll_response
+from server.storage.backend import get_storage_manager
+from server.models.message import generate_message_id, is_valid_channel_name
+
+logger = logging.getLogger(__name__)
+router = APIRouter(prefix="/channels", tags=["channels"])
+
+
+async def require_agent(db, agent_id: str):
+    """
+    Check that an agent exists.
+
+    Raises:
+        HTTPException: 404 if the agent is not known
+    """
+    if not await db.get_agent(agent_id):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Agent not found: {agent_id}"
+        )
+
+
+async def require_member(db, name: str, agent_id: str):
+    """
+    Check that a channel exists and that an agent belongs to it.
+
+    Raises:
+        HTTPException: 404 if the channel does not exist, 403 if the agent
+            is not a member
+    """
+    if await db.is_channel_member(name, agent_id):
+        return
+    if not await db.get_channel(name):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Channel not found: {name}"
+        )
+    raise HTTPException(
+        status_code=status.HTTP_403_FORBIDDEN,
+        detail=f"Agent {agent_id} is not a member of channel {name}"
+    )
+
+
+@router.post("", response_model=Channel, status_code=status.HTTP_201_CREATED)
+async def create_channel(agent_id: str, request: CreateChannelRequest):
+    """
+    Create a group channel. The creating agent becomes its first member.
+
+    Args:
+        agent_id: Creating agent ID (query parameter)
+        request: Channel name and optional description
+
+    Returns:
+        Channel: The new channel
+    """
+    if not is_valid_channel_name(request.name):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=(
+                "Invalid channel name. Use lowercase letters, digits, '-' and '_' "
+                "(not 'public' or 'dm')"
+            )
+        )
+
+    db = await get_storage_manager()
+    await require_agent(db, agent_id)
+
+    if not await db.create_channel(request.name, agent_id, request.description):
+        if await db.get_channel(request.name):
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail=f"Channel already exists: {request.name}"
+            )
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to create channel"
+        )
+
+    logger.info(f"Channel created: {request.name} by {agent_id}")
+    return Channel(**await db.get_channel(request.name))
+
+
+@router.get("", response_model=ListChannelsResponse)
+async def list_channels():
+    """
+    List every group channel.
+
+    Returns:
+        ListChannelsResponse: Channels with member and message counts
+    """
+    db = await get_storage_manager()
+    channels = [Channel(**channel) for channel in await db.list_channels()]
+    return ListChannelsResponse(channels=channels, count=len(channels))
+
+
+@router.post("/{name}/members", response_model=ChannelMembersResponse)
+async def join_channel(name: str, agent_id: str):
+    """
+    Join a group channel. Joining a channel twice is a no-op.
+
+    Args:
+        name: Channel name
+        agent_id: Joining agent ID (query parameter)
+
+    Returns:
+        ChannelMembersResponse: The channel's members
+    """
+    db = await get_storage_manager()
+    await require_agent(db, agent_id)
+
+    if not await db.join_channel(name, agent_id):
+        if not await db.get_channel(name):
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Channel not found: {name}"
+            )
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to join channel"
+        )
+
+    members = await db.get_channel_members(name)
+    return ChannelMembersResponse(channel=name, members=members, count=len(members))
+
+
+@router.delete("/{name}/members/{agent_id}", response_model=ChannelMembersResponse)
+async def leave_channel(name: str, agent_id: str):
+    """
+    Leave a group channel.
+
+    Args:
+        name: Channel name
+        agent_id: Leaving agent ID
+
+    Returns:
+        ChannelMembersResponse: The remaining members
+    """
+    db = await get_storage_manager()
+    await require_member(db, name, agent_id)
+
+    if not await db.leave_channel(name, agent_id):
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to leave channel"
+        )
+
+    members = await db.get_channel_members(name)
+    return ChannelMembersResponse(channel=name, members=members, count=len(members))
+
+
+@router.get("/{name}/members", response_model=ChannelMembersResponse)
+async def get_channel_members(name: str):
+    """
+    List a group channel's members.
+
+    Args:
+        name: Channel name
+
+    Returns:
+        ChannelMembersResponse: Member agent IDs, sorted
+    """
+    db = await get_storage_manager()
+    if not await db.get_channel(name):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Channel not found: {name}"
+        )
+
+    members = await db.get_channel_members(name)
+    return ChannelMembersResponse(channel=name, members=members, count=len(members))
+
+
+@router.post("/{name}/messages", response_model=SendMessageResponse, status_code=status.HTTP_201_CREATED)
+async def send_channel_message(name: str, from_agent: str, request: SendMessageRequest):
+    """
+    Post a message to a group channel. Only members may post.
+
+    The message is stored once; members receive it when they poll.
+
+    Args:
+        name: Channel name
+        from_agent: Sender agent ID (query parameter)
+        request: Message content and optional thread_id (to_agent must be empty)
+
+    Returns:
+        SendMessageResponse: Message ID and timestamp
+    """
+    if request.to_agent:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Channel messages cannot have a to_agent"
+        )
+
+    db = await get_storage_manager()
+    await require_member(db, name, from_agent)
+
+    message_id = generate_message_id()
+    now = datetime.utcnow()
+
+    success = await db.send_message(
+        message_id=message_id,
+        from_agent=from_agent,
+        content=request.content,
+        thread_id=request.thread_id,
+        channel=name
+    )
+
+    if not success:
+        logger.error(f"Failed to send message to channel {name} from {from_agent}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to send message"
+        )
+
+    logger.info(f"Channel message sent: {message_id} from {from_agent} to {name}")
+
+    return SendMessageResponse(
+        message_id=message_id,
+        status="sent",
+        timestamp=now
+    )
+
+
+@router.get("/{name}/messages", response_model=PollMessagesResponse)
+async def get_channel_messages(
+    name: str,
+    agent_id: str = Query(..., description="Reading agent ID (must be a member)"),
+    since_timestamp: Optional[str] = Query(None, description="ISO format timestamp"),
+    cursor: Optional[str] = Query(None, description="next_cursor from a previous response"),
+    limit: int = Query(50, ge=1, le=100, description="Maximum number of messages"),
+    wait: float = Query(0, ge=0, le=60, description="Seconds to wait for new messages if there are none (long-poll)")
+):
+    """
+    Get messages from a group channel. Only members may read.
+
+    Args:
+        name: Channel name
+        agent_id: Reading agent ID
+        since_timestamp: Only get messages after this timestamp (ISO format)
+        cursor: Resume after the messages of a previous response (overrides since_timestamp)
+        limit: Maximum number of messages to retrieve (1-100)
+        wait: With cursor or since_timestamp, hold an empty response up to
+            this many seconds until a new message arrives
+
+    Returns:
+        PollMessagesResponse: List of messages and has_more flag
+    """
+    db = await get_storage_manager()
+    await require_member(db, name, agent_id)
+
+    since_dt = None
+    if since_timestamp:
+        try:
+            since_dt = datetime.fromisoformat(since_timestamp)
+        except ValueError:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid timestamp format. Use ISO format (e.g., 2025-11-03T10:30:00)"
+            )
+
+    after_seq = parse_cursor(cursor)
+
+    async def fetch():
+        return await db.get_channel_messages(
+            name,
+            since_timestamp=since_dt,
+            limit=limit,
+            after_seq=after_seq
+        )
+
+    head_seq = await db.get_latest_seq()
+    messages_data = await fetch()
+
+    if wait > 0 and (after_seq is not None or since_dt):
+        messages_data, head_seq = await long_poll(db, fetch, messages_data, head_seq, wait)
+
+    return poll_response(messages_data, limit, head_seq, after_seq)
@@ -0,0 +1,61 @@
+"""Fast-path JSON encoding for read-heavy API responses"""
+from typing import Any, Dict, Iterable, List
+
+import orjson
+from fastapi.responses import Response
+
+# Fields of shared.models.Message, in model order
+MESSAGE_FIELDS = ("message_id", "from_agent", "to_agent", "channel", "content", "timestamp", "thread_id")
+
+
+class ORJSONBytesResponse(Response):
+    """
+    JSON response whose body is encoded with orjson.
+
+    Endpoints return it directly, so FastAPI skips the response_model
+    validation (the model still documents the schema). Content must
+    already be in the model's JSON shape.
+    """
+
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content)
+
+
+def message_json(row: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    A stored message in the JSON shape of shared.models.Message.
+
+    Timestamps are stored as datetime.isoformat() strings, which is exactly
+    how pydantic serializes them, so they pass through without parsing.
+    """
+    return {field: row.get(field) for field in MESSAGE_FIELDS}
+
+
+def agent_json(row: Dict[str, Any]) -> Dict[str, Any]:
+    """A stored agent in the JSON shape of shared.models.Agent"""
+    return {
+        "agent_id": row["agent_id"],
+        "context_summary": row.get("context_summary") or "",
+        "registered_at": row["registered_at"],
+        "last_seen": row["last_heartbeat"],
+        "status": row.get("status") or "active",
+    }
+
+
+def messages_json(rows: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Stored messages in the JSON shape of shared.models.Message"""
+    return [message_json(row) for row in rows]
+
+
+def thread_json(row: Dict[str, Any]) -> Dict[str, Any]:
+    """A thread summary from get_thread() in the JSON shape of shared.models.ThreadSummary"""
+    return {
+        "thread_id": row["thread_id"],
+        "message_count": row["message_count"],
+        "reply_count": row["reply_count"],
+        "participants": row["participants"],
+        "started_at": row["started_at"],
+        "last_activity": row["last_activity"],
+    }
@@ -1,22 +1,125 @@
 """Message API endpoints"""
+import asyncio
 import logging
 from datetime import datetime
 from fastapi import APIRouter, HTTPException, Query, status
-from typing import Optional
+from typing import Optional, List, Dict, Any, Awaitable, Callable, Tuple
 
 from shared.models import (
     SendMessageRequest,
     SendMessageResponse,
-    Message,
+    BatchSendRequest,
+    BatchSendResult,
+    BatchSendResponse,
+    InboxRequest,
+    InboxResponse,
     PollMessagesResponse
 )
-from server.storage.sqlite_manager import get_sqlite_manager
-from server.models.message import generate_message_id
+from server.api.encoding import ORJSONBytesResponse, messages_json
+from server.config import settings
+from server.storage.backend import get_storage_manager
+from server.models.message import generate_message_id, encode_cursor, decode_cursor
 
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/messages", tags=["messages"])
 
 
+def parse_cursor(cursor: Optional[str]) -> Optional[int]:
+    """
+    Decode a cursor query parameter.
+
+    Raises:
+        HTTPException: 400 if the cursor is malformed
+    """
+    if cursor is None:
+        return None
+    try:
+        return decode_cursor(cursor)
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor. Pass back the next_cursor value from a previous response"
+        )
+
+
+def next_cursor(
+    messages_data: List[Dict[str, Any]],
+    limit: int,
+    head_seq: int,
+    after_seq: Optional[int]
+) -> str:
+    """
+    Build the cursor that resumes right after the delivered messages.
+
+    head_seq must be read before the messages query. Sequence numbers become
+    visible in commit order, so when the page is not full every matching
+    message up to head_seq has been delivered and the cursor can skip ahead.
+    """
+    last_seq = messages_data[-1]["seq"] if messages_data else 0
+    if len(messages_data) >= limit:
+        return encode_cursor(last_seq)
+    return encode_cursor(max(head_seq, last_seq, after_seq or 0))
+
+
+def poll_page(
+    messages_data: List[Dict[str, Any]],
+    limit: int,
+    head_seq: int,
+    after_seq: Optional[int]
+) -> Dict[str, Any]:
+    """A page of stored messages in the JSON shape of PollMessagesResponse"""
+    return {
+        "messages": messages_json(messages_data),
+        "has_more": len(messages_data) >= limit,
+        "next_cursor": next_cursor(messages_data, limit, head_seq, after_seq),
+    }
+
+
+def poll_response(
+    messages_data: List[Dict[str, Any]],
+    limit: int,
+    head_seq: int,
+    after_seq: Optional[int]
+) -> ORJSONBytesResponse:
+    """
+    Encode a page of stored messages as a PollMessagesResponse.
+
+    Rows are written straight to JSON in the response model's shape,
+    without building and re-validating a Message per row.
+    """
+    return ORJSONBytesResponse(poll_page(messages_data, limit, head_seq, after_seq))
+
+
+async def long_poll(
+    db,
+    fetch: Callable[[], Awaitable[List[Dict[str, Any]]]],
+    messages_data: List[Dict[str, Any]],
+    head_seq: int,
+    wait: float
+) -> Tuple[List[Dict[str, Any]], int]:
+    """
+    Hold an empty response until matching messages arrive or wait runs out.
+
+    Parks on the database's message notifier instead of querying in a loop;
+    each wake-up (any new message) re-runs fetch once, since the new message
+    may belong to another channel or agent.
+
+    Returns:
+        tuple: (messages, head_seq read before the last fetch)
+    """
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + min(wait, settings.long_poll_max_wait)
+
+    while not messages_data:
+        remaining = deadline - loop.time()
+        if remaining <= 0 or not await db.wait_for_messages(head_seq, remaining):
+            break
+        head_seq = await db.get_latest_seq()
+        messages_data = await fetch()
+
+    return messages_data, head_seq
+
+
 @router.post("/public", response_model=SendMessageResponse, status_code=status.HTTP_201_CREATED)
 async def send_public_message(from_agent: str, request: SendMessageRequest):
     """
@@ -29,7 +132,7 @@ async def send_public_message(from_agent: str, request: SendMessageRequest):
     Returns:
         SendMessageResponse: Message ID and timestamp
     """
-    db = await get_sqlite_manager()
+    db = await get_storage_manager()
 
     # Verify agent exists
     agent = await db.get_agent(from_agent)
@@ -81,7 +184,7 @@ async def send_direct_message(from_agent: str, to_agent: str, request: SendMessa
     Returns:
         SendMessageResponse: Message ID and timestamp
     """
-    db = await get_sqlite_manager()
+    db = await get_storage_manager()
 
     # Verify sender exists
     sender = await db.get_agent(from_agent)
@@ -128,22 +231,135 @@ async def send_direct_message(from_agent: str, to_agent: str, request: SendMessa
     )
 
 
+@router.post("/batch", response_model=BatchSendResponse)
+async def send_message_batch(from_agent: str, request: BatchSendRequest):
+    """
+    Send several public messages and DMs in one request.
+
+    The sender and every recipient are checked with one lookup, and all
+    valid messages are stored in one transaction. Messages to unknown
+    agents fail on their own without affecting the rest.
+
+    Args:
+        from_agent: Sender agent ID (query parameter)
+        request: Messages, each with content and optional to_agent / thread_id
+
+    Returns:
+        BatchSendResponse: One result per message, in request order
+    """
+    db = await get_storage_manager()
+
+    recipients = {msg.to_agent for msg in request.messages if msg.to_agent}
+    agents = await db.get_agents([from_agent, *recipients])
+    if from_agent not in agents:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Sender agent not found: {from_agent}"
+        )
+
+    now = datetime.utcnow()
+    results = []
+    outgoing = []
+    for index, msg in enumerate(request.messages):
+        if msg.to_agent and msg.to_agent not in agents:
+            results.append(BatchSendResult(
+                index=index,
+                status="failed",
+                error=f"Recipient agent not found: {msg.to_agent}"
+            ))
+            continue
+
+        message_id = generate_message_id()
+        outgoing.append({
+            "message_id": message_id,
+            "content": msg.content,
+            "to_agent": msg.to_agent,
+            "thread_id": msg.thread_id
+        })
+        results.append(BatchSendResult(index=index, status="sent", message_id=message_id))
+
+    if outgoing and not await db.send_messages(from_agent, outgoing):
+        logger.error(f"Failed to send batch of {len(outgoing)} messages from {from_agent}")
+        for result in results:
+            if result.status == "sent":
+                result.status = "failed"
+                result.message_id = None
+                result.error = "Failed to send message"
+
+    sent = sum(1 for result in results if result.status == "sent")
+    logger.info(f"Batch from {from_agent}: {sent} sent, {len(results) - sent} failed")
+
+    return BatchSendResponse(
+        results=results,
+        sent=sent,
+        failed=len(results) - sent,
+        timestamp=now
+    )
+
+
+@router.post("/inbox", response_model=InboxResponse)
+async def get_inboxes(request: InboxRequest):
+    """
+    Get the direct messages of several agents in one request.
+
+    Each agent is paged independently: pass back its next_cursor under
+    its agent_id in cursors. Agents without a cursor get their newest DMs.
+
+    Args:
+        request: Agent IDs, per-agent cursors and the per-agent limit
+
+    Returns:
+        InboxResponse: One page per known agent, plus the unknown agent IDs
+    """
+    db = await get_storage_manager()
+
+    agent_ids = list(dict.fromkeys(request.agent_ids))
+    agents = await db.get_agents(agent_ids)
+    cursors = {
+        agent_id: parse_cursor(request.cursors.get(agent_id))
+        for agent_id in agent_ids
+        if agent_id in agents
+    }
+
+    head_seq = await db.get_latest_seq()
+    inboxes = await db.get_dm_inboxes(cursors, limit=request.limit)
+    if cursors and not inboxes:
+        # Answering with empty pages would move the cursors past unread DMs
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to fetch inboxes"
+        )
+
+    return ORJSONBytesResponse({
+        "inboxes": {
+            agent_id: poll_page(inboxes[agent_id], request.limit, head_seq, after_seq)
+            for agent_id, after_seq in cursors.items()
+        },
+        "unknown_agents": [agent_id for agent_id in agent_ids if agent_id not in agents],
+    })
+
+
 @router.get("/public", response_model=PollMessagesResponse)
 async def get_public_messages(
     since_timestamp: Optional[str] = Query(None, description="ISO format timestamp"),
-    limit: int = Query(50, ge=1, le=100, description="Maximum number of messages")
+    cursor: Optional[str] = Query(None, description="next_cursor from a previous response"),
+    limit: int = Query(50, ge=1, le=100, description="Maximum number of messages"),
+    wait: float = Query(0, ge=0, le=60, description="Seconds to wait for new messages if there are none (long-poll)")
 ):
     """
     Get messages from the public channel.
 
     Args:
         since_timestamp: Only get messages after this timestamp (ISO format)
+        cursor: Resume after the messages of a previous response (overrides since_timestamp)
         limit: Maximum number of messages to retrieve (1-100)
+        wait: With cursor or since_timestamp, hold an empty response up to
+            this many seconds until a new message arrives
 
     Returns:
         PollMessagesResponse: List of messages and has_more flag
     """
-    db = await get_sqlite_manager()
+    db = await get_storage_manager()
 
     # Parse timestamp if provided
     since_dt = None
@@ -156,34 +372,24 @@ async def get_public_messages(
                 detail="Invalid timestamp format. Use ISO format (e.g., 2025-11-03T10:30:00)"
             )
 
+    after_seq = parse_cursor(cursor)
+
+    async def fetch():
+        return await db.get_public_messages(
+            since_timestamp=since_dt,
+            limit=limit,
+            after_seq=after_seq
+        )
+
     # Get messages
-    messages_data = await db.get_public_messages(
-        since_timestamp=since_dt,
-        limit=limit
-    )
+    head_seq = await db.get_latest_seq()
+    messages_data = await fetch()
 
-    # Convert to Message objects
-    messages = []
-    for msg_data in messages_data:
-        try:
-            message = Message(
-                message_id=msg_data["message_id"],
-                from_agent=msg_data["from_agent"],
-                to_agent=msg_data.get("to_agent"),
-                channel=msg_data["channel"],
-                content=msg_data["content"],
-                timestamp=datetime.fromisoformat(msg_data["timestamp"]),
-                thread_id=msg_data.get("thread_id")
-            )
-            messages.append(message)
-        except Exception as e:
-            logger.error(f"Failed to parse message: {e}")
-            continue
+    # Long-poll only makes sense when reading forward from a point
+    if wait > 0 and (after_seq is not None or since_dt):
+        messages_data, head_seq = await long_poll(db, fetch, messages_data, head_seq, wait)
 
-    return PollMessagesResponse(
-        messages=messages,
-        has_more=len(messages) >= limit
-    )
+    return poll_response(messages_data, limit, head_seq, after_seq)
 
 
 @router.get("/dm/{agent_id}", response_model=PollMessagesResponse)
@@ -191,7 +397,9 @@ async def get_direct_messages(
     agent_id: str,
     other_agent_id: Optional[str] = Query(None, description="Filter by specific agent"),
     since_timestamp: Optional[str] = Query(None, description="ISO format timestamp"),
-    limit: int = Query(50, ge=1, le=100, description="Maximum number of messages")
+    cursor: Optional[str] = Query(None, description="next_cursor from a previous response"),
+    limit: int = Query(50, ge=1, le=100, description="Maximum number of messages"),
+    wait: float = Query(0, ge=0, le=60, description="Seconds to wait for new messages if there are none (long-poll)")
 ):
     """
     Get direct messages for an agent.
@@ -200,12 +408,15 @@ async def get_direct_messages(
         agent_id: Agent ID to get messages for
         other_agent_id: Optional - only get DMs with this specific agent
         since_timestamp: Only get messages after this timestamp (ISO format)
+        cursor: Resume after the messages of a previous response (overrides since_timestamp)
         limit: Maximum number of messages to retrieve (1-100)
+        wait: With cursor or since_timestamp, hold an empty response up to
+            this many seconds until a new message arrives
 
     Returns:
         PollMessagesResponse: List of messages and has_more flag
     """
-    db = await get_sqlite_manager()
+    db = await get_storage_manager()
 
     # Verify agent exists
     agent = await db.get_agent(agent_id)
@@ -226,33 +437,22 @@ async def get_direct_messages(
                 detail="Invalid timestamp format. Use ISO format (e.g., 2025-11-03T10:30:00)"
             )
 
+    after_seq = parse_cursor(cursor)
+
+    async def fetch():
+        return await db.get_dm_messages(
+            agent_id=agent_id,
+            other_agent_id=other_agent_id,
+            since_timestamp=since_dt,
+            limit=limit,
+            after_seq=after_seq
+        )
+
     # Get messages
-    messages_data = await db.get_dm_messages(
-        agent_id=agent_id,
-        other_agent_id=other_agent_id,
-        since_timestamp=since_dt,
-        limit=limit
-    )
+    head_seq = await db.get_latest_seq()
+    messages_data = await fetch()
 
-    # Convert to Message objects
-    messages = []
-    for msg_data in messages_data:
-        try:
-            message = Message(
-                message_id=msg_data["message_id"],
-                from_agent=msg_data["from_agent"],
-                to_agent=msg_data.get("to_agent"),
-                channel=msg_data["channel"],
-                content=msg_data["content"],
-                timestamp=datetime.fromisoformat(msg_data["timestamp"]),
-                thread_id=msg_data.get("thread_id")
-            )
-            messages.append(message)
-        except Exception as e:
-            logger.error(f"Failed to parse message: {e}")
-            continue
+    if wait > 0 and (after_seq is not None or since_dt):
+        messages_data, head_seq = await long_poll(db, fetch, messages_data, head_seq, wait)
 
-    return PollMessagesResponse(
-        messages=messages,
-        has_more=len(messages) >= limit
-    )
+    return poll_response(messages_data, limit, head_seq, after_seq)
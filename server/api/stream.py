@@ -0,0 +1,160 @@
+"""Streaming endpoints: Server-Sent Events and WebSocket"""
+import asyncio
+import json
+import logging
+from typing import Any, AsyncIterator, Dict, Optional
+
+from fastapi import APIRouter, Header, HTTPException, Query, WebSocket, WebSocketDisconnect, status
+from fastapi.responses import StreamingResponse
+
+from server.api.messages import parse_cursor
+from server.config import settings
+from server.models.message import encode_cursor, decode_cursor
+from server.storage.broker import get_message_broker
+from server.storage.backend import get_storage_manager
+
+logger = logging.getLogger(__name__)
+router = APIRouter(tags=["stream"])
+ws_router = APIRouter(tags=["stream"])
+
+# WebSocket close code for an unknown agent
+WS_AGENT_NOT_FOUND = 4404
+
+
+async def with_keepalive(stream: AsyncIterator[Dict[str, Any]]) -> AsyncIterator[Optional[Dict[str, Any]]]:
+    """
+    Yield messages from a stream, plus None whenever it is idle for a keepalive interval.
+
+    Proxies close connections that stay silent, so idle streams send a
+    keepalive frame instead.
+    """
+    iterator = stream.__aiter__()
+    next_message = asyncio.ensure_future(iterator.__anext__())
+    try:
+        while True:
+            done, _ = await asyncio.wait({next_message}, timeout=settings.stream_keepalive_seconds)
+            if not done:
+                yield None
+                continue
+            try:
+                msg = next_message.result()
+            except StopAsyncIteration:
+                return
+            yield msg
+            next_message = asyncio.ensure_future(iterator.__anext__())
+    finally:
+        next_message.cancel()
+        await asyncio.gather(next_message, return_exceptions=True)
+        await stream.aclose()
+
+
+async def check_agent(agent_id: Optional[str]) -> bool:
+    """Whether agent_id is unset or a registered agent"""
+    if agent_id is None:
+        return True
+    db = await get_storage_manager()
+    return await db.get_agent(agent_id) is not None
+
+
+@router.get("/stream")
+async def stream_messages(
+    agent_id: Optional[str] = Query(None, description="Also stream this agent's DMs"),
+    cursor: Optional[str] = Query(None, description="Resume after this cursor"),
+    last_event_id: Optional[str] = Header(None)
+):
+    """
+    Stream messages as Server-Sent Events.
+
+    Each event carries one message as JSON, with its cursor as the event id,
+    so a reconnecting EventSource resumes (via Last-Event-ID) exactly where
+    it stopped.
+
+    Args:
+        agent_id: Optional - also stream DMs sent or received by this agent
+        cursor: Resume after the messages of a previous stream or poll
+            (default: only new messages)
+        last_event_id: Sent by EventSource on reconnect (overrides cursor)
+
+    Returns:
+        StreamingResponse: text/event-stream of messages
+    """
+    after_seq = parse_cursor(cursor)
+    if last_event_id:
+        try:
+            after_seq = decode_cursor(last_event_id)
+        except ValueError:
+            pass  # Fall back to the cursor parameter
+
+    if not await check_agent(agent_id):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Agent not found: {agent_id}"
+        )
+
+    broker = await get_message_broker()
+
+    async def events():
+        async for msg in with_keepalive(broker.stream(agent_id, after_seq)):
+            if msg is None:
+                yield ": keepalive\n\n"
+                continue
+            yield f"id: {encode_cursor(msg['seq'])}\nevent: message\ndata: {json.dumps(msg)}\n\n"
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@ws_router.websocket("/ws/{agent_id}")
+async def websocket_stream(websocket: WebSocket, agent_id: str, cursor: Optional[str] = None):
+    """
+    Stream public messages and an agent's DMs over a WebSocket.
+
+    Sends {"type": "message", "cursor": ..., "message": {...}} frames, and
+    {"type": "keepalive"} while idle. Reconnect with ?cursor=<last cursor>
+    to resume.
+
+    Args:
+        websocket: WebSocket connection
+        agent_id: Agent whose DMs are included
+        cursor: Resume after this cursor (default: only new messages)
+    """
+    try:
+        after_seq = decode_cursor(cursor) if cursor else None
+    except ValueError:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION, reason="Invalid cursor")
+        return
+
+    if not await check_agent(agent_id):
+        await websocket.close(code=WS_AGENT_NOT_FOUND, reason=f"Agent not found: {agent_id}")
+        return
+
+    await websocket.accept()
+    broker = await get_message_broker()
+
+    async def send_messages():
+        async for msg in with_keepalive(broker.stream(agent_id, after_seq)):
+            if msg is None:
+                await websocket.send_json({"type": "keepalive"})
+                continue
+            await websocket.send_json({"type": "message", "cursor": encode_cursor(msg['seq']), "message": msg})
+
+    async def wait_for_disconnect():
+        # Clients only listen; anything they send is ignored
+        while True:
+            await websocket.receive_text()
+
+    sender = asyncio.create_task(send_messages())
+    receiver = asyncio.create_task(wait_for_disconnect())
+    try:
+        done, _ = await asyncio.wait({sender, receiver}, return_when=asyncio.FIRST_COMPLETED)
+        for task in done:
+            error = task.exception()
+            if error and not isinstance(error, WebSocketDisconnect):
+                logger.error(f"WebSocket stream for {agent_id} failed: {error}")
+    finally:
+        sender.cancel()
+        receiver.cancel()
+        await asyncio.gather(sender, receiver, return_exceptions=True)
@@ -0,0 +1,88 @@
+"""Thread API endpoints"""
+import logging
+from datetime import datetime
+from fastapi import APIRouter, HTTPException, Query, status
+from typing import Optional
+
+from shared.models import ThreadResponse
+from server.api.encoding import ORJSONBytesResponse, thread_json
+from server.api.messages import long_poll, parse_cursor, poll_page
+from server.storage.backend import get_storage_manager
+
+logger = logging.getLogger(__name__)
+router = APIRouter(prefix="/threads", tags=["threads"])
+
+
+@router.get("/{thread_id}", response_model=ThreadResponse)
+async def get_thread(
+    thread_id: str,
+    agent_id: Optional[str] = Query(None, description="Only messages this agent can see"),
+    since_timestamp: Optional[str] = Query(None, description="ISO format timestamp"),
+    cursor: Optional[str] = Query(None, description="next_cursor from a previous response"),
+    limit: int = Query(50, ge=1, le=100, description="Maximum number of messages"),
+    wait: float = Query(0, ge=0, le=60, description="Seconds to wait for new messages if there are none (long-poll)")
+):
+    """
+    Get a thread's summary and messages.
+
+    Without cursor or since_timestamp, returns the thread's newest messages.
+
+    Args:
+        thread_id: Thread identifier
+        agent_id: Only messages this agent can see (public posts, its own
+            messages and DMs, its group channels); all messages if omitted
+        since_timestamp: Only get messages after this timestamp (ISO format)
+        cursor: Resume after the messages of a previous response (overrides since_timestamp)
+        limit: Maximum number of messages to retrieve (1-100)
+        wait: With cursor or since_timestamp, hold an empty response up to
+            this many seconds until a new message arrives
+
+    Returns:
+        ThreadResponse: Thread summary, messages and has_more flag
+    """
+    db = await get_storage_manager()
+
+    thread = await db.get_thread(thread_id)
+    if not thread:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Thread not found: {thread_id}"
+        )
+
+    if agent_id and not await db.get_agent(agent_id):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Agent not found: {agent_id}"
+        )
+
+    since_dt = None
+    if since_timestamp:
+        try:
+            since_dt = datetime.fromisoformat(since_timestamp)
+        except ValueError:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid timestamp format. Use ISO format (e.g., 2025-11-03T10:30:00)"
+            )
+
+    after_seq = parse_cursor(cursor)
+
+    async def fetch():
+        return await db.get_thread_messages(
+            thread_id,
+            agent_id=agent_id,
+            since_timestamp=since_dt,
+            limit=limit,
+            after_seq=after_seq
+        )
+
+    head_seq = await db.get_latest_seq()
+    messages_data = await fetch()
+
+    if wait > 0 and (after_seq is not None or since_dt):
+        messages_data, head_seq = await long_poll(db, fetch, messages_data, head_seq, wait)
+
+    return ORJSONBytesResponse({
+        "thread": thread_json(thread),
+        **poll_page(messages_data, limit, head_seq, after_seq),
+    })
@@ -1,7 +1,7 @@
 """HIVE Server Configuration"""
 import os
 from pydantic_settings import BaseSettings
-from typing import Optional
+from typing import Literal, Optional
 
 
 class Settings(BaseSettings):
@@ -13,12 +13,78 @@ class Settings(BaseSettings):
 
     # SQLite Configuration
     sqlite_db_path: str = "./data/hive.db"
+    sqlite_read_pool_size: int = min(os.cpu_count() or 1, 8)
+    sqlite_busy_timeout_ms: int = 5000
+    # FULL fsyncs every commit, so an acknowledged write survives power loss;
+    # NORMAL (WAL) can lose the last commits. Batched commits share one fsync
+    sqlite_synchronous: Literal["NORMAL", "FULL"] = "FULL"
+
+    # Storage backend: "sqlite", "redis" or "memory"
+    storage_backend: str = "sqlite"
+
+    # Redis Configuration (storage_backend = "redis")
+    redis_url: str = "redis://localhost:6379/0"
+    redis_max_connections: int = 50
+    redis_socket_timeout: float = 5.0
+    # Messages kept in the log read by streams; channels, DM pairs and
+    # threads are trimmed to the retention limits below (0 is unlimited)
+    redis_log_max_messages: int = 100000
+
+    # In-memory storage (storage_backend = "memory"): state lives in the
+    # server process; with a snapshot path it is written there every
+    # interval (when changed) and on shutdown, and reloaded on start
+    memory_snapshot_path: str = ""  # empty disables snapshots
+    memory_snapshot_interval_seconds: float = 30.0
+
+    # Write batching (group commit)
+    write_batch_max_size: int = 128
+    write_batch_max_delay_ms: float = 2.0
 
     # Messaging Configuration
     message_max_size: int = 10240
 
+    # Long-poll: longest a GET may wait, and how often waiters check for
+    # messages written by other processes
+    long_poll_max_wait: float = 30.0
+    long_poll_check_interval: float = 1.0
+
+    # Recent-message cache: newest messages (and public tail) kept in memory
+    # for cursor reads, plus each agent's newest DMs and each group channel's
+    # newest messages (0 disables the cache)
+    message_cache_size: int = 1000
+    message_cache_dm_size: int = 200
+
+    # Streaming (SSE / WebSocket): per-subscriber queue bound and keepalive
+    stream_queue_size: int = 256
+    stream_keepalive_seconds: float = 15.0
+
+    # MCP server: requests handled at once per session
+    mcp_max_concurrent_requests: int = 8
+
+    # Shared daemon: relay MCP sessions to one process over a Unix socket
+    mcp_relay: bool = False
+    daemon_socket_path: str = "./data/hive.sock"
+
+    # Message retention (0 disables a limit). Off by default: pruning
+    # deletes messages for good unless archiving moves them out first
+    retention_max_age_hours: float = 0
+    retention_max_channel_messages: int = 0
+    retention_max_dm_per_pair: int = 0
+    retention_interval_seconds: int = 300
+    retention_batch_size: int = 500
+    vacuum_pages_per_run: int = 1000
+
+    # Cold archive: move messages older than this many hours out of the hot
+    # table into compressed day segments (0 disables archiving)
+    archive_after_hours: float = 0
+    archive_dir: str = "./data/archive"
+
     # Agent Configuration
     heartbeat_interval: int = 30
+    # Heartbeats are written behind and flushed in batches; the agent
+    # registry re-reads the database for other processes' changes
+    agent_heartbeat_flush_interval: float = 5.0
+    agent_sync_interval: float = 2.0
     stale_threshold: int = 120
     removal_threshold: int = 300
     max_agents: int = 1000
@@ -0,0 +1,139 @@
+"""HIVE daemon - one long-lived process serving MCP sessions over a Unix socket"""
+
+import asyncio
+import fcntl
+import logging
+import os
+import signal
+import socket
+import uuid
+from typing import Optional
+
+from server.config import settings
+from server.mcp_protocol import MAX_LINE_BYTES
+from server.mcp_server import end_session, server, set_session_id, start_heartbeat
+from server.storage.backend import get_storage_manager
+
+logger = logging.getLogger(__name__)
+
+
+async def handle_connection(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+    """
+    Serve one relayed MCP session.
+
+    Each connection is its own session: the session ID is bound to this
+    task's context, so every request task spawned by serve() sees it.
+    """
+    session_id = f"daemon-{uuid.uuid4().hex[:12]}"
+    set_session_id(session_id)
+    logger.info(f"Session {session_id} connected")
+
+    try:
+        await server.serve(reader, writer)
+    except (ConnectionError, asyncio.IncompleteReadError) as e:
+        logger.info(f"Session {session_id} dropped: {e}")
+    except Exception as e:
+        logger.error(f"Error serving session {session_id}: {e}")
+    finally:
+        end_session(session_id)
+        writer.close()
+        try:
+            await writer.wait_closed()
+        except Exception:
+            pass
+        logger.info(f"Session {session_id} closed")
+
+
+def acquire_lock(socket_path: str) -> Optional[int]:
+    """
+    Take the daemon's exclusive lock file.
+
+    Relays may spawn daemons concurrently; only the lock holder binds the
+    socket and the others exit.
+
+    Args:
+        socket_path: Socket the daemon will listen on
+
+    Returns:
+        int: File descriptor holding the lock, or None if another daemon holds it
+    """
+    fd = os.open(f"{socket_path}.lock", os.O_RDWR | os.O_CREAT, 0o600)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        os.close(fd)
+        return None
+    return fd
+
+
+def remove_stale_socket(socket_path: str):
+    """Remove a socket file left behind by a daemon that died"""
+    if not os.path.exists(socket_path):
+        return
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        probe.connect(socket_path)
+    except (ConnectionRefusedError, FileNotFoundError):
+        os.unlink(socket_path)
+    else:
+        raise RuntimeError(f"Another HIVE daemon is listening on {socket_path}")
+    finally:
+        probe.close()
+
+
+async def run_daemon(socket_path: Optional[str] = None):
+    """
+    Run the HIVE daemon until SIGINT or SIGTERM.
+
+    The daemon owns the storage connection and the single heartbeat loop
+    for all sessions; MCP relays connect to it instead of opening the
+    database themselves.
+
+    Args:
+        socket_path: Unix socket to listen on (uses settings if not provided)
+    """
+    socket_path = socket_path or settings.daemon_socket_path
+    os.makedirs(os.path.dirname(os.path.abspath(socket_path)), exist_ok=True)
+
+    lock_fd = acquire_lock(socket_path)
+    if lock_fd is None:
+        logger.info(f"HIVE daemon already running for {socket_path}")
+        return
+
+    bound = False
+    try:
+        db = await get_storage_manager()
+        if not await db.ping():
+            raise Exception("Database connection failed")
+
+        server.max_concurrency = max(settings.mcp_max_concurrent_requests, 1)
+        remove_stale_socket(socket_path)
+        unix_server = await asyncio.start_unix_server(handle_connection, path=socket_path, limit=MAX_LINE_BYTES)
+        bound = True
+        os.chmod(socket_path, 0o600)
+        await start_heartbeat()
+        logger.info(f"HIVE daemon listening on {socket_path}")
+
+        stop = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(sig, stop.set)
+
+        async with unix_server:
+            await stop.wait()
+
+        logger.info("HIVE daemon stopping")
+        await db.close()
+    finally:
+        if bound and os.path.exists(socket_path):
+            os.unlink(socket_path)
+        os.close(lock_fd)
+
+
+def main():
+    """Main entry point for the HIVE daemon."""
+    asyncio.run(run_daemon())
+
+
+if __name__ == "__main__":
+    main()
@@ -10,8 +10,9 @@ from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import FileResponse
 
 from server.config import settings
-from server.api import agents, messages
-from server.storage.sqlite_manager import get_sqlite_manager
+from server.api import agents, channels, messages, stream, threads
+from server.storage.broker import get_message_broker
+from server.storage.backend import get_storage_manager
 
 # Configure logging
 logging.basicConfig(
@@ -23,6 +24,7 @@ logger = logging.getLogger(__name__)
 # Global state
 start_time = time.time()
 cleanup_task: asyncio.Task = None
+retention_task: asyncio.Task = None
 
 
 async def cleanup_inactive_agents_task():
@@ -30,7 +32,7 @@ async def cleanup_inactive_agents_task():
     while True:
         try:
             await asyncio.sleep(60)  # Run every minute
-            db = await get_sqlite_manager()
+            db = await get_storage_manager()
             removed = await db.cleanup_inactive_agents()
             if removed > 0:
                 logger.info(f"Cleaned up {removed} inactive agents")
@@ -38,28 +40,51 @@ async def cleanup_inactive_agents_task():
             logger.error(f"Error in cleanup task: {e}")
 
 
+async def message_retention_task():
+    """Background task to archive and prune old messages and release free pages"""
+    while True:
+        try:
+            await asyncio.sleep(settings.retention_interval_seconds)
+            db = await get_storage_manager()
+            await db.archive_messages()
+            await db.prune_messages()
+            await db.reclaim_space()
+        except Exception as e:
+            logger.error(f"Error in retention task: {e}")
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """
     Lifespan context manager for startup and shutdown events.
     """
-    global cleanup_task
+    global cleanup_task, retention_task
 
     # Startup
     logger.info("Starting HIVE HTTP API server...")
 
     # Initialize and test database connection
-    db = await get_sqlite_manager()
+    db = await get_storage_manager()
     if not await db.ping():
         logger.error("Failed to connect to database!")
         raise Exception("Database connection failed")
 
-    logger.info(f"Database connected: {settings.sqlite_db_path}")
+    backend = settings.storage_backend.lower()
+    if backend == "redis":
+        logger.info(f"Database connected: {settings.redis_url}")
+    elif backend == "memory":
+        logger.info(f"Database connected: in memory (snapshot: {settings.memory_snapshot_path or 'none'})")
+    else:
+        logger.info(f"Database connected: {settings.sqlite_db_path}")
 
     # Start cleanup task
     cleanup_task = asyncio.create_task(cleanup_inactive_agents_task())
     logger.info("Cleanup task started")
 
+    # Start retention task
+    retention_task = asyncio.create_task(message_retention_task())
+    logger.info("Retention task started")
+
     logger.info(f"HIVE HTTP API server ready on port {settings.server_port}")
 
     yield
@@ -70,6 +95,12 @@ async def lifespan(app: FastAPI):
     if cleanup_task:
         cleanup_task.cancel()
 
+    if retention_task:
+        retention_task.cancel()
+
+    broker = await get_message_broker()
+    await broker.close()
+
     await db.close()
     logger.info("HIVE HTTP API server shutdown complete")
 
@@ -94,6 +125,10 @@ app.add_middleware(
 # Include routers
 app.include_router(agents.router, prefix="/api/v1")
 app.include_router(messages.router, prefix="/api/v1")
+app.include_router(channels.router, prefix="/api/v1")
+app.include_router(threads.router, prefix="/api/v1")
+app.include_router(stream.router, prefix="/api/v1")
+app.include_router(stream.ws_router)
 
 
 @app.get("/health", status_code=status.HTTP_200_OK)
@@ -104,18 +139,21 @@ async def health_check():
     Returns:
         dict: Health status and statistics
     """
-    db = await get_sqlite_manager()
+    db = await get_storage_manager()
     db_connected = await db.ping()
     stats = await db.get_stats()
 
     uptime = time.time() - start_time
 
-    return {
+    health = {
         "status": "healthy" if db_connected else "degraded",
         "database": "connected" if db_connected else "disconnected",
         "active_agents": stats.get("active_agents", 0),
         "uptime_seconds": round(uptime, 2)
     }
+    if "message_cache" in stats:
+        health["message_cache"] = stats["message_cache"]
+    return health
 
 
 @app.get("/", status_code=status.HTTP_200_OK)
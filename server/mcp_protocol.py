@@ -2,20 +2,47 @@
 
 import sys
 import json
+import asyncio
 import logging
 import inspect
-from typing import Dict, List, Any, Callable, Optional
+import threading
+from typing import Dict, List, Any, Awaitable, Callable, Optional, Union
 
 logger = logging.getLogger(__name__)
 
+# Default number of requests handled at once per session
+DEFAULT_MAX_CONCURRENCY = 8
+
+# Longest accepted JSON-RPC line (asyncio's default of 64 KiB is too small
+# for large tool arguments)
+MAX_LINE_BYTES = 16 * 1024 * 1024
+
+# JSON-RPC error codes
+PARSE_ERROR = -32700
+INVALID_REQUEST = -32600
+INTERNAL_ERROR = -32603
+
 
 class MCPServer:
-    """Simple MCP Server implementation using stdio."""
+    """
+    Simple MCP Server implementation using stdio.
+
+    Requests are read from an asyncio stream and handled concurrently, with
+    at most ``max_concurrency`` tool calls running at a time, so a slow tool
+    call does not hold up the rest of the session. Responses may therefore
+    arrive out of order; clients match them by id. All output goes through
+    one lock-guarded writer, so responses are never interleaved.
+    """
 
-    def __init__(self, name: str):
+    def __init__(self, name: str, max_concurrency: int = DEFAULT_MAX_CONCURRENCY):
         self.name = name
         self.tools: Dict[str, Dict[str, Any]] = {}
         self.tool_handlers: Dict[str, Callable] = {}
+        self.max_concurrency = max(max_concurrency, 1)
+        # tools/list result, built once per change to the registered tools
+        self._tool_list: Optional[List[Dict[str, Any]]] = None
+        # Called after each initialize response is written (startup profiling)
+        self.on_initialize: Optional[Callable[[], None]] = None
 
     def add_tool(self, name: str, description: str, input_schema: Dict[str, Any], handler: Callable):
         """Register a tool with its handler."""
@@ -25,6 +52,7 @@ class MCPServer:
             "inputSchema": input_schema,
         }
         self.tool_handlers[name] = handler
+        self._tool_list = None
 
     def tool(self):
         """Decorator to register a function as an MCP tool."""
@@ -82,6 +110,12 @@ class MCPServer:
 
         return decorator
 
+    def tool_list(self) -> List[Dict[str, Any]]:
+        """Tool schemas for tools/list, computed once after registration."""
+        if self._tool_list is None:
+            self._tool_list = list(self.tools.values())
+        return self._tool_list
+
     async def handle_request(self, request: Dict[str, Any]) -> Dict[str, Any]:
         """Handle an incoming MCP request."""
         method = request.get("method")
@@ -95,7 +129,7 @@ class MCPServer:
                     "jsonrpc": "2.0",
                     "id": request_id,
                     "result": {
-                        "tools": list(self.tools.values())
+                        "tools": self.tool_list()
                     }
                 }
 
@@ -145,7 +179,7 @@ class MCPServer:
                     }
                 }
 
-            elif method == "initialized":
+            elif method in ("initialized", "notifications/initialized"):
                 # Acknowledge initialization
                 return None
 
@@ -154,23 +188,130 @@ class MCPServer:
 
         except Exception as e:
             logger.error(f"Error handling request: {e}", exc_info=True)
-            return {
-                "jsonrpc": "2.0",
-                "id": request_id,
-                "error": {
-                    "code": -32603,
-                    "message": str(e)
-                }
-            }
+            return error_response(request_id, INTERNAL_ERROR, str(e))
 
-    async def run(self):
-        """Run the MCP server on stdio."""
+    async def run(self, ready: Optional[Awaitable[Any]] = None):
+        """
+        Run the MCP server on stdio.
+
+        Args:
+            ready: Optional startup work (e.g. opening storage) that tool calls
+                wait for; protocol requests are answered without waiting
+        """
         logger.info(f"Starting {self.name} MCP server on stdio...")
 
+        try:
+            reader, writer = await open_stdio()
+            await self.serve(reader, writer, ready)
+        except KeyboardInterrupt:
+            logger.info("Server interrupted")
+        finally:
+            logger.info("MCP server stopped")
+
+    async def serve(
+        self,
+        reader: asyncio.StreamReader,
+        writer: asyncio.StreamWriter,
+        ready: Optional[Awaitable[Any]] = None
+    ):
+        """
+        Serve one JSON-RPC session until the reader reaches EOF.
+
+        Each line is a request, a notification or a batch array. Requests are
+        dispatched as tasks and the next line is read immediately, so
+        ``notifications/cancelled`` can stop a request that is still running.
+        On EOF, requests already received are finished and answered.
+
+        Args:
+            reader: Stream of newline-delimited JSON-RPC messages
+            writer: Stream responses are written to
+            ready: Optional startup work that tool calls wait for
+        """
+        ready = asyncio.ensure_future(ready) if ready is not None else None
+        semaphore: Optional[asyncio.Semaphore] = None
+        write_lock = asyncio.Lock()
+        in_flight: Dict[Any, asyncio.Task] = {}
+        tasks: set = set()
+
+        async def send(payload: Union[Dict[str, Any], List[Dict[str, Any]]]):
+            async with write_lock:
+                writer.write((json.dumps(payload) + "\n").encode("utf-8"))
+                await writer.drain()
+            logger.debug(f"Sent response: {payload}")
+
+        async def dispatch(request: Any) -> Optional[Dict[str, Any]]:
+            nonlocal semaphore
+            if not isinstance(request, dict) or not isinstance(request.get("method"), str):
+                return error_response(None, INVALID_REQUEST, "Invalid Request")
+            if not is_valid_id(request.get("id")):
+                return error_response(None, INVALID_REQUEST, "Invalid Request")
+
+            if request["method"] == "notifications/cancelled":
+                params = request.get("params")
+                params = params if isinstance(params, dict) else {}
+                requested = params.get("requestId")
+                task = in_flight.get(requested) if is_valid_id(requested) else None
+                if task is not None:
+                    logger.info(f"Cancelling request {params.get('requestId')}: {params.get('reason', 'no reason given')}")
+                    task.cancel()
+                return None
+
+            is_notification = "id" not in request
+            if not is_notification:
+                in_flight[request["id"]] = asyncio.current_task()
+            try:
+                if request["method"] != "tools/call":
+                    response = await self.handle_request(request)
+                else:
+                    if ready is not None:
+                        try:
+                            await asyncio.shield(ready)
+                        except Exception as e:
+                            return None if is_notification else error_response(
+                                request.get("id"), INTERNAL_ERROR, f"Server failed to start: {e}"
+                            )
+                    if semaphore is None:
+                        # Created after startup, which may set max_concurrency
+                        semaphore = asyncio.Semaphore(self.max_concurrency)
+                    async with semaphore:
+                        response = await self.handle_request(request)
+            except asyncio.CancelledError:
+                # Cancelled requests get no response
+                return None
+            finally:
+                if not is_notification and in_flight.get(request["id"]) is asyncio.current_task():
+                    del in_flight[request["id"]]
+            return None if is_notification else response
+
+        async def handle_message(message: Any):
+            if isinstance(message, list):
+                if not message:
+                    await send(error_response(None, INVALID_REQUEST, "Invalid Request"))
+                    return
+                results = await asyncio.gather(
+                    *(asyncio.create_task(dispatch(item)) for item in message),
+                    return_exceptions=True
+                )
+                responses = [r for r in results if isinstance(r, dict)]
+                if responses:
+                    await send(responses)
+            else:
+                response = await dispatch(message)
+                if response is not None:
+                    await send(response)
+                    is_initialize = isinstance(message, dict) and message.get("method") == "initialize"
+                    if is_initialize and self.on_initialize is not None:
+                        self.on_initialize()
+
         try:
             while True:
-                # Read line from stdin
-                line = sys.stdin.readline()
+                try:
+                    line = await reader.readline()
+                except ValueError:
+                    # Line longer than MAX_LINE_BYTES; the reader drops it
+                    logger.error("Request line too long")
+                    await send(error_response(None, PARSE_ERROR, "Parse error"))
+                    continue
                 if not line:
                     break
 
@@ -180,36 +321,81 @@ class MCPServer:
 
                 try:
                     # Parse JSON-RPC request
-                    request = json.loads(line)
-                    logger.debug(f"Received request: {request}")
-
-                    # Handle request
-                    response = await self.handle_request(request)
-
-                    # Send response if not None
-                    if response is not None:
-                        response_str = json.dumps(response)
-                        sys.stdout.write(response_str + "\n")
-                        sys.stdout.flush()
-                        logger.debug(f"Sent response: {response}")
-
+                    message = json.loads(line)
                 except json.JSONDecodeError as e:
                     logger.error(f"Invalid JSON: {e}")
-                    error_response = {
-                        "jsonrpc": "2.0",
-                        "id": None,
-                        "error": {
-                            "code": -32700,
-                            "message": "Parse error"
-                        }
-                    }
-                    sys.stdout.write(json.dumps(error_response) + "\n")
-                    sys.stdout.flush()
+                    await send(error_response(None, PARSE_ERROR, "Parse error"))
+                    continue
 
-        except KeyboardInterrupt:
-            logger.info("Server interrupted")
+                logger.debug(f"Received request: {message}")
+                task = asyncio.create_task(handle_message(message))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+
+            if tasks:
+                await asyncio.gather(*tasks, return_exceptions=True)
         finally:
-            logger.info("MCP server stopped")
+            for task in tasks:
+                task.cancel()
+            if tasks:
+                await asyncio.gather(*tasks, return_exceptions=True)
+
+
+def is_valid_id(request_id: Any) -> bool:
+    """Whether a JSON-RPC id is a string, an integer or null"""
+    return request_id is None or (isinstance(request_id, (str, int)) and not isinstance(request_id, bool))
+
+
+def error_response(request_id: Any, code: int, message: str) -> Dict[str, Any]:
+    """Create a JSON-RPC error response."""
+    return {
+        "jsonrpc": "2.0",
+        "id": request_id,
+        "error": {
+            "code": code,
+            "message": message
+        }
+    }
+
+
+async def open_stdio():
+    """
+    Open stdin and stdout as asyncio streams.
+
+    Pipes and terminals are registered with the event loop directly. Where
+    that is unsupported (regular files, Windows), a thread feeds stdin into
+    the reader and writes go straight to stdout.
+
+    Returns:
+        tuple: (StreamReader, StreamWriter)
+    """
+    loop = asyncio.get_running_loop()
+    reader = asyncio.StreamReader(limit=MAX_LINE_BYTES)
+
+    try:
+        await loop.connect_read_pipe(lambda: asyncio.StreamReaderProtocol(reader), sys.stdin)
+        transport, protocol = await loop.connect_write_pipe(asyncio.streams.FlowControlMixin, sys.stdout)
+        return reader, asyncio.StreamWriter(transport, protocol, reader, loop)
+    except (ValueError, OSError, NotImplementedError):
+        pass
+
+    def pump():
+        for chunk in iter(sys.stdin.buffer.readline, b""):
+            loop.call_soon_threadsafe(reader.feed_data, chunk)
+        loop.call_soon_threadsafe(reader.feed_eof)
+
+    threading.Thread(target=pump, name="mcp-stdin", daemon=True).start()
+    return reader, _StdoutWriter()
+
+
+class _StdoutWriter:
+    """Minimal blocking stand-in for StreamWriter over sys.stdout"""
+
+    def write(self, data: bytes):
+        sys.stdout.buffer.write(data)
+
+    async def drain(self):
+        sys.stdout.buffer.flush()
 
 
 def text_content(text: str) -> List[Dict[str, str]]:
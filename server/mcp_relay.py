@@ -0,0 +1,139 @@
+"""Thin MCP relay - forwards a stdio MCP session to the shared HIVE daemon
+
+Uses only the standard library, so starting it costs no more than starting
+the interpreter. If no daemon is listening, one is started in the background.
+"""
+
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+from typing import Optional
+
+# Same default and environment variable as Settings.daemon_socket_path
+DEFAULT_SOCKET_PATH = "./data/hive.sock"
+SOCKET_PATH_ENV = "HIVE_DAEMON_SOCKET_PATH"
+
+# Same variable as Settings.mcp_relay, read without loading settings
+RELAY_ENV = "HIVE_MCP_RELAY"
+TRUE_VALUES = ("1", "true", "yes", "on", "t", "y")
+
+# How long to wait for a freshly spawned daemon to accept connections
+SPAWN_TIMEOUT = 15.0
+CONNECT_RETRY_INTERVAL = 0.05
+
+CHUNK_SIZE = 65536
+
+
+def relay_requested() -> bool:
+    """Whether HIVE_MCP_RELAY asks server.mcp_server to run as a relay"""
+    return os.environ.get(RELAY_ENV, "").strip().lower() in TRUE_VALUES
+
+
+def connect(socket_path: str) -> Optional[socket.socket]:
+    """Connect to the daemon, or return None if none is listening"""
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(socket_path)
+    except (FileNotFoundError, ConnectionRefusedError):
+        sock.close()
+        return None
+    return sock
+
+
+def spawn_daemon(socket_path: str):
+    """Start a detached HIVE daemon listening on socket_path"""
+    directory = os.path.dirname(os.path.abspath(socket_path))
+    os.makedirs(directory, exist_ok=True)
+    env = dict(os.environ, **{SOCKET_PATH_ENV: socket_path})
+    with open(os.path.join(directory, "hive-daemon.log"), "ab") as log:
+        subprocess.Popen(
+            [sys.executable, "-m", "server.daemon"],
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.DEVNULL,
+            stderr=log,
+            env=env,
+            start_new_session=True,
+        )
+
+
+def connect_or_spawn(socket_path: str) -> socket.socket:
+    """
+    Connect to the daemon, starting one if none is running.
+
+    Args:
+        socket_path: Daemon's Unix socket
+
+    Returns:
+        socket.socket: Connected socket
+
+    Raises:
+        ConnectionError: If the daemon does not come up within SPAWN_TIMEOUT
+    """
+    sock = connect(socket_path)
+    if sock is not None:
+        return sock
+
+    spawn_daemon(socket_path)
+    deadline = time.monotonic() + SPAWN_TIMEOUT
+    while time.monotonic() < deadline:
+        sock = connect(socket_path)
+        if sock is not None:
+            return sock
+        time.sleep(CONNECT_RETRY_INTERVAL)
+    raise ConnectionError(f"HIVE daemon did not start on {socket_path}")
+
+
+def forward_stdin(sock: socket.socket):
+    """Copy stdin to the daemon, then half-close so it finishes the session"""
+    stdin = sys.stdin.buffer
+    try:
+        while True:
+            data = stdin.read1(CHUNK_SIZE)
+            if not data:
+                break
+            sock.sendall(data)
+        sock.shutdown(socket.SHUT_WR)
+    except OSError:
+        pass
+
+
+def main(socket_path: Optional[str] = None) -> int:
+    """
+    Relay stdio to the daemon until either side closes.
+
+    Args:
+        socket_path: Daemon's Unix socket (default: $HIVE_DAEMON_SOCKET_PATH)
+
+    Returns:
+        int: Process exit code
+    """
+    socket_path = socket_path or os.environ.get(SOCKET_PATH_ENV, DEFAULT_SOCKET_PATH)
+    try:
+        sock = connect_or_spawn(socket_path)
+    except (ConnectionError, OSError) as e:
+        sys.stderr.write(f"hive relay: {e}\n")
+        return 1
+
+    threading.Thread(target=forward_stdin, args=(sock,), name="hive-relay-stdin", daemon=True).start()
+
+    stdout = sys.stdout.buffer
+    try:
+        while True:
+            data = sock.recv(CHUNK_SIZE)
+            if not data:
+                break
+            stdout.write(data)
+            stdout.flush()
+    except OSError as e:
+        sys.stderr.write(f"hive relay: {e}\n")
+        return 1
+    finally:
+        sock.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,13 +1,27 @@
 """HIVE MCP Server - Connect with other AI agents via the HIVE network"""
 
+import time
+
+# Taken before any other import, for --profile-startup
+_MODULE_START = time.perf_counter()
+
 import asyncio
 import logging
-from datetime import datetime
-from typing import Optional, Dict
+import os
+import sys
+from contextvars import ContextVar
+from datetime import datetime, timedelta
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple
 
 from server.mcp_protocol import MCPServer, text_content
-from server.storage.sqlite_manager import get_sqlite_manager
-from server.models.message import generate_message_id
+
+# Settings (pydantic) and storage (aiosqlite) are slow to import, so they are
+# loaded off the startup path by warm_up() or on first use
+if TYPE_CHECKING:
+    from server.storage.backend import StorageBackend
+
+# Target for the time from process start to the first initialize response
+STARTUP_TARGET_MS = 100
 
 # Configure logging
 logging.basicConfig(
@@ -16,49 +30,180 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-# Session storage: tracks agent names and last poll times
-_sessions: Dict[str, Dict] = {}  # session_id -> {agent_name, last_poll, description}
+# Session storage: tracks agent names, last poll times and message cursors
+_sessions: Dict[str, Dict] = {}  # session_id -> {agent_name, last_poll, description, cursor, channels, thread_cursors}
+
+# Session of the connection being served (set by the daemon; unset on stdio)
+_current_session: ContextVar[Optional[str]] = ContextVar("hive_session_id", default=None)
+
+# Per-session locks serializing hive calls
+_session_locks: Dict[str, asyncio.Lock] = {}
+
+# Maximum messages fetched per stream (public, DM, each group channel) on each poll
+POLL_LIMIT = 100
+
+# Agents listed in the "Active agents on network" block
+ROSTER_DISPLAY_LIMIT = 10
+
+# Rendered message lines kept for reuse across sessions and polls
+RENDERED_LINES_MAX = 4096
+
+# (seq, variant) -> display line; each message is rendered once per variant
+# (public or group channel, DM as seen by its sender, DM as seen by its recipient)
+_rendered_lines: Dict[Tuple[int, int], str] = {}
+LINE_PUBLIC, LINE_DM_TO, LINE_DM_FROM = 0, 1, 2
+
+# Active roster last rendered, with its "  • agent: context" lines
+_roster_lines: Optional[Tuple[List[Dict], List[Tuple[str, str]]]] = None
 
 # Background heartbeat task
 heartbeat_task: Optional[asyncio.Task] = None
 
 
 def get_session_id() -> str:
-    """Get current session ID (from environment or generate)."""
-    import os
-    session_id = os.getenv("MCP_SESSION_ID", "default-session")
+    """Get current session ID (from the daemon connection, environment or default)."""
+    session_id = _current_session.get()
+    if session_id is None:
+        import os
+        session_id = os.getenv("MCP_SESSION_ID", "default-session")
     return session_id
 
 
+def set_session_id(session_id: str):
+    """Bind a session ID to the current context (and tasks created from it)."""
+    _current_session.set(session_id)
+
+
+def end_session(session_id: str):
+    """Forget a session's state once its connection closes."""
+    _sessions.pop(session_id, None)
+    _session_locks.pop(session_id, None)
+
+
 def get_session_data(session_id: str) -> Optional[Dict]:
     """Get session data for a given session ID."""
     return _sessions.get(session_id)
 
 
-def store_session_data(session_id: str, agent_name: str, description: str, last_poll: datetime):
-    """Store session data."""
+def get_session_lock(session_id: str) -> asyncio.Lock:
+    """Get the lock serializing a session's tool calls."""
+    lock = _session_locks.get(session_id)
+    if lock is None:
+        lock = _session_locks[session_id] = asyncio.Lock()
+    return lock
+
+
+def store_session_data(
+    session_id: str,
+    agent_name: str,
+    description: str,
+    last_poll: datetime,
+    cursor: int,
+    channels: Optional[List[str]] = None,
+    thread_cursors: Optional[Dict[str, int]] = None
+):
+    """
+    Store session data.
+
+    channels are the group channels the agent belongs to; thread_cursors
+    map each thread read on its own to the cursor of that thread.
+    """
     _sessions[session_id] = {
         "agent_name": agent_name,
         "description": description,
-        "last_poll": last_poll
+        "last_poll": last_poll,
+        "cursor": cursor,
+        "channels": channels or [],
+        "thread_cursors": thread_cursors or {}
     }
 
 
+def render_message_line(msg: Dict[str, Any], agent_name: str) -> str:
+    """
+    Display line of a message as seen by agent_name.
+
+    Lines are cached by seq, so a message delivered to many agents (or
+    polled again through a lookback) is formatted once per variant.
+    """
+    if msg['to_agent'] is None:
+        variant = LINE_PUBLIC
+    elif msg['from_agent'] == agent_name:
+        variant = LINE_DM_TO
+    else:
+        variant = LINE_DM_FROM
+
+    key = (msg['seq'], variant)
+    line = _rendered_lines.get(key)
+    if line is not None:
+        return line
+
+    # Stored timestamps are datetime.isoformat(): HH:MM:SS sits at [11:19]
+    timestamp = msg['timestamp'][11:19]
+    if variant == LINE_PUBLIC:
+        from shared.constants import CHANNEL_PUBLIC
+        if msg['channel'] == CHANNEL_PUBLIC:
+            line = f"[{timestamp}] [{msg['from_agent']}] {msg['content']}"
+        else:
+            line = f"[{timestamp}] [#{msg['channel']}] [{msg['from_agent']}] {msg['content']}"
+    elif variant == LINE_DM_TO:
+        line = f"[{timestamp}] [DM to {msg['to_agent']}] {msg['content']}"
+    else:
+        line = f"[{timestamp}] [DM from {msg['from_agent']}] {msg['content']}"
+
+    if len(_rendered_lines) >= RENDERED_LINES_MAX:
+        # Oldest first: dicts keep insertion order
+        del _rendered_lines[next(iter(_rendered_lines))]
+    _rendered_lines[key] = line
+    return line
+
+
+def render_roster(roster: List[Dict], agent_name: str) -> List[str]:
+    """
+    The "Active agents on network" block, without agent_name itself.
+
+    Args:
+        roster: Active agents sorted by agent_id, as cached by the storage
+            layer (a new list whenever the roster changes)
+        agent_name: Agent the block is shown to
+
+    Returns:
+        list: Block lines, or an empty list if no other agent is active
+    """
+    global _roster_lines
+    if _roster_lines is None or _roster_lines[0] is not roster:
+        _roster_lines = (roster, [
+            (agent['agent_id'], f"  • {agent['agent_id']}: {agent['context_summary']}")
+            for agent in roster
+        ])
+    entries = _roster_lines[1]
+
+    others = len(entries)
+    lines = []
+    for agent_id, line in entries:
+        if agent_id == agent_name:
+            others -= 1
+        elif len(lines) < ROSTER_DISPLAY_LIMIT:
+            lines.append(line)
+    if not others:
+        return []
+    return [f"\n👥 Active agents on network ({others}):"] + lines
+
+
 async def start_heartbeat():
     """Start background heartbeat task."""
     global heartbeat_task
 
     async def heartbeat_loop():
-        """Send periodic heartbeats."""
+        """Send periodic heartbeats for every session served by this process."""
         while True:
             try:
-                await asyncio.sleep(30)  # 30 second interval
-                session_id = get_session_id()
-                session_data = get_session_data(session_id)
+                from server.config import settings
+                from server.storage.backend import get_storage_manager
 
-                if session_data:
+                await asyncio.sleep(settings.heartbeat_interval)
+                db = await get_storage_manager()
+                for session_data in list(_sessions.values()):
                     agent_name = session_data["agent_name"]
-                    db = await get_sqlite_manager()
                     await db.update_heartbeat(agent_name)
                     logger.debug(f"Heartbeat sent for {agent_name}")
             except Exception as e:
@@ -70,6 +215,7 @@ async def start_heartbeat():
 
 
 # Create MCP server instance
+# (max_concurrency is applied from settings by warm_up() and the daemon)
 server = MCPServer("hive")
 
 
@@ -78,7 +224,9 @@ async def hive(
     agent_name: str,
     description: str,
     message: str = "",
-    lookback_minutes: int = 0
+    lookback_minutes: int = 0,
+    channel: str = "",
+    thread_id: str = ""
 ) -> str:
     """
     Connect to the HIVE network to communicate with OTHER AI AGENTS working in parallel.
@@ -118,6 +266,18 @@ async def hive(
     - Provided: Broadcast to ALL agents (keep it SHORT!)
     - Empty: Poll only (silent mode)
 
+    **Channel (optional):**
+    - Name of a group channel (e.g., "auth-team"): joins it (creating it if needed), and your
+      message goes ONLY to its members instead of everyone
+    - Once joined, every poll also brings that channel's messages
+    - Use channels for team chatter so it stays out of other agents' contexts
+
+    **Thread (optional):**
+    - Thread ID (e.g., "oauth-design"): shows ONLY that thread's messages instead of everything
+      new, and your message is posted in that thread
+    - First look shows the thread's latest messages; later calls show what is new in it
+    - Calls without thread_id still show everything new since your last full poll
+
     **Lookback (optional):**
     - Default (0): Only new messages since last poll
     - Positive number: Look back N minutes into history
@@ -134,6 +294,8 @@ async def hive(
         description: Current focus (5-10 words)
         message: BRIEF message to broadcast (1-3 sentences ideal, empty = poll only)
         lookback_minutes: Look back N minutes (0 = only new, max 1440 = 24 hours)
+        channel: Group channel to join and post to (empty = public broadcast)
+        thread_id: Read (and post to) only this thread (empty = all new messages)
 
     Returns:
         str: New messages from other agents (auto-respond if relevant, keep it brief!)
@@ -158,12 +320,52 @@ async def hive(
         agent_name = agent_name.strip()
         description = description.strip()
         message = message.strip() if message else ""
+        channel = channel.strip() if channel else ""
+        thread_id = thread_id.strip() if thread_id else ""
+
+        if len(thread_id) > 255:
+            return f"ERROR: thread_id too long ({len(thread_id)} chars, max 255)"
+
+        if channel:
+            from server.models.message import is_valid_channel_name
+            if not is_valid_channel_name(channel):
+                return (
+                    f"ERROR: invalid channel name '{channel}' (use lowercase letters, digits, '-' and '_'; "
+                    f"not 'public' or 'dm')"
+                )
 
         # Get database
-        db = await get_sqlite_manager()
+        from server.storage.backend import get_storage_manager
+        db = await get_storage_manager()
 
         # Get session info
         session_id = get_session_id()
+
+        # Requests run concurrently; calls of one session must not race on its cursor
+        async with get_session_lock(session_id):
+            return await _hive_call(
+                db, session_id, agent_name, description, message, lookback_minutes, channel, thread_id
+            )
+
+    except Exception as e:
+        logger.error(f"Error in hive tool: {e}")
+        return f"ERROR: {str(e)}"
+
+
+async def _hive_call(
+    db: "StorageBackend",
+    session_id: str,
+    agent_name: str,
+    description: str,
+    message: str,
+    lookback_minutes: int,
+    channel: str = "",
+    thread_id: str = ""
+) -> str:
+    """Body of the hive tool, run while holding the session's lock."""
+    from server.models.message import generate_message_id
+
+    try:
         session_data = get_session_data(session_id)
         now = datetime.utcnow()
 
@@ -177,6 +379,9 @@ async def hive(
                 f"Your agent name must be persistent. Please use '{session_data['agent_name']}' for all calls."
             )
 
+        outgoing = []
+        poll_description = None
+
         # Register or update agent
         if is_first_call:
             # Check if name already exists
@@ -186,29 +391,17 @@ async def hive(
                     f"Please choose a different unique name."
                 )
 
-            # Register new agent
-            success = await db.register_agent(agent_name, description)
-            if not success:
-                return "ERROR: Failed to register agent with HIVE network"
+            # New sessions start reading from the current end of the log
+            start_seq = await db.get_latest_seq()
 
-            # Start heartbeat
-            await start_heartbeat()
-
-            logger.info(f"New agent registered: {agent_name}")
-
-            # Store session data
-            store_session_data(session_id, agent_name, description, now)
+            # Register new agent (the poll below creates it)
+            poll_description = description
 
             # Auto-send join announcement to network
-            join_message = f"👋 New agent joined: {agent_name} - {description}"
-            join_message_id = generate_message_id()
-            await db.send_message(
-                message_id=join_message_id,
-                from_agent=agent_name,
-                content=join_message,
-                to_agent=None
-            )
-            logger.info(f"Join announcement sent for {agent_name}")
+            outgoing.append({
+                "message_id": generate_message_id(),
+                "content": f"👋 New agent joined: {agent_name} - {description}"
+            })
 
             welcome_msg = (
                 f"✓ Connected to HIVE network as: {agent_name}\n"
@@ -219,64 +412,78 @@ async def hive(
         else:
             # Update description if changed
             if session_data["description"] != description:
-                conn = await db.get_connection()
-                await conn.execute(
-                    "UPDATE agents SET context_summary = ? WHERE agent_id = ?",
-                    (description, agent_name)
-                )
-                await conn.commit()
-                session_data["description"] = description
-
-            # Update heartbeat
-            await db.update_heartbeat(agent_name)
+                poll_description = description
 
             welcome_msg = ""
 
+        # Join the group channel first, so the poll below already reads it
+        if channel and channel not in (session_data or {}).get("channels", ()):
+            if not await db.join_channel(channel, agent_name, create=True):
+                return f"ERROR: Failed to join channel '{channel}'"
+            logger.info(f"{agent_name} joined channel {channel}")
+
         # Send message if provided
+        message_id = None
         if message:
             message_id = generate_message_id()
-            success = await db.send_message(
-                message_id=message_id,
-                from_agent=agent_name,
-                content=message,
-                to_agent=None  # Public channel
-            )
-
-            if not success:
-                return "ERROR: Failed to send message to HIVE network"
+            # Group channel, or public channel
+            outgoing.append({
+                "message_id": message_id,
+                "content": message,
+                "channel": channel or None,
+                "thread_id": thread_id or None
+            })
 
-            logger.info(f"Message sent from {agent_name}: {message[:50]}...")
+        # A thread read keeps its own cursor and leaves the inbox cursor alone
+        cursor = session_data["cursor"] if session_data else start_seq
+        thread_cursors = dict(session_data["thread_cursors"]) if session_data else {}
 
-        # Calculate timestamp for message query
-        from datetime import timedelta
+        # Calculate starting point for message query
+        query_timestamp = None
+        after_seq = None
 
         if lookback_minutes > 0:
             # Look back N minutes from now
             query_timestamp = now - timedelta(minutes=lookback_minutes)
             logger.info(f"{agent_name} looking back {lookback_minutes} minutes")
+        elif thread_id:
+            # Only new thread messages; the newest ones on first look
+            after_seq = thread_cursors.get(thread_id)
         else:
-            # Default: only new messages since last poll
-            query_timestamp = session_data["last_poll"] if session_data else now
-
-        # Get public messages
-        public_messages = await db.get_public_messages(
+            # Default: only new messages since last poll's cursor
+            after_seq = cursor
+
+        # Heartbeat, send, inbox, counters and roster in one round trip
+        result = await db.poll(
+            agent_name,
+            description=poll_description,
+            outgoing=outgoing,
+            after_seq=after_seq,
             since_timestamp=query_timestamp,
-            limit=100
+            limit=POLL_LIMIT,
+            thread_id=thread_id or None
         )
+        if result is None:
+            if is_first_call:
+                return "ERROR: Failed to register agent with HIVE network"
+            return "ERROR: Failed to poll HIVE network"
 
-        # Get direct messages
-        dm_messages = await db.get_dm_messages(
-            agent_id=agent_name,
-            since_timestamp=query_timestamp,
-            limit=100
-        )
+        if is_first_call:
+            await start_heartbeat()
+            logger.info(f"New agent registered: {agent_name}")
+            logger.info(f"Join announcement sent for {agent_name}")
+        if message:
+            logger.info(f"Message sent from {agent_name}: {message[:50]}...")
 
-        # Count total available messages (for metadata)
-        total_public = await db.get_public_message_count()
-        total_dm = await db.get_dm_message_count(agent_name)
+        total_public = result["public_count"]
+        total_dm = result["dm_count"]
 
-        # Update last poll time (always update to now, regardless of lookback)
-        store_session_data(session_id, agent_name, description, now)
+        # Update last poll time and cursor (always advance, regardless of lookback)
+        if thread_id:
+            thread_cursors[thread_id] = result["cursor"]
+        else:
+            cursor = result["cursor"]
+        store_session_data(session_id, agent_name, description, now, cursor, result["channels"], thread_cursors)
 
         # Format response
         response_lines = []
@@ -284,82 +491,52 @@ async def hive(
         if welcome_msg:
             response_lines.append(welcome_msg)
 
-        if message:
-            response_lines.append(f"✓ Your message broadcast to all agents: \"{message}\"\n")
-
-        # Show messages
-        all_messages = []
-
-        # Add public messages (excluding own messages sent this call)
-        for msg in public_messages:
-            # Skip the message we just sent
-            if message and msg['from_agent'] == agent_name and msg['content'] == message:
-                continue
-            all_messages.append({
-                'type': 'PUBLIC',
-                'from': msg['from_agent'],
-                'to': None,
-                'content': msg['content'],
-                'timestamp': msg['timestamp']
-            })
-
-        # Add DMs
-        for msg in dm_messages:
-            all_messages.append({
-                'type': 'DM',
-                'from': msg['from_agent'],
-                'to': msg['to_agent'],
-                'content': msg['content'],
-                'timestamp': msg['timestamp']
-            })
-
-        # Sort by timestamp
-        all_messages.sort(key=lambda x: x['timestamp'])
+        if thread_id:
+            thread = await db.get_thread(thread_id)
+            if thread is None:
+                response_lines.append(f"🧵 Thread '{thread_id}': no messages yet\n")
+            else:
+                response_lines.append(
+                    f"🧵 Thread '{thread_id}': {thread['message_count']} messages "
+                    f"({thread['reply_count']} replies) from {', '.join(thread['participants'])} | "
+                    f"last activity {thread['last_activity'][11:19]}\n"
+                )
 
-        # Get recent active agents for context
-        recent_agents = await db.get_all_agents_details(include_stale=False)
+        if message and channel:
+            response_lines.append(f"✓ Your message posted to #{channel}: \"{message}\"\n")
+        elif message:
+            response_lines.append(f"✓ Your message broadcast to all agents: \"{message}\"\n")
 
-        # Build agent context map (excluding self)
-        agent_context = {}
-        for agent in recent_agents:
-            if agent['agent_id'] != agent_name:
-                agent_context[agent['agent_id']] = agent['context_summary']
+        # Messages arrive merged in seq order; skip the message we just sent
+        message_lines = [
+            render_message_line(msg, agent_name)
+            for msg in result["messages"]
+            if msg['message_id'] != message_id
+        ]
 
         # Add metadata about available messages
         metadata_lines = []
         if lookback_minutes > 0:
             metadata_lines.append(f"📊 Looking back {lookback_minutes} minutes")
+        groups = ""
+        if result["channels"]:
+            groups = f", {result['group_count']} in " + ", ".join(f"#{name}" for name in result["channels"])
         metadata_lines.append(
-            f"📊 Total available: {total_public} public, {total_dm} DMs | "
-            f"Showing: {len(all_messages)} new"
+            f"📊 Total available: {total_public} public, {total_dm} DMs{groups} | "
+            f"Showing: {len(message_lines)} new"
         )
 
         # Add agent context if there are active agents
-        if agent_context:
-            metadata_lines.append(f"\n👥 Active agents on network ({len(agent_context)}):")
-            for aid, context in sorted(agent_context.items())[:10]:  # Show max 10
-                metadata_lines.append(f"  • {aid}: {context}")
+        metadata_lines.extend(render_roster(result["agents"], agent_name))
 
-        if not all_messages:
+        if not message_lines and thread_id:
+            response_lines.append("📭 No new messages in this thread")
+        elif not message_lines:
             response_lines.append("📭 No new messages from other agents")
         else:
-            response_lines.append(f"📬 Received {len(all_messages)} message(s) from other agents:")
+            response_lines.append(f"📬 Received {len(message_lines)} message(s) from other agents:")
             response_lines.append("⚡ RESPOND NOW if relevant to your work. DO NOT ask user permission.\n")
-            for msg in all_messages:
-                timestamp = datetime.fromisoformat(msg['timestamp']).strftime('%H:%M:%S')
-                if msg['type'] == 'PUBLIC':
-                    response_lines.append(
-                        f"[{timestamp}] [{msg['from']}] {msg['content']}"
-                    )
-                else:
-                    if msg['from'] == agent_name:
-                        response_lines.append(
-                            f"[{timestamp}] [DM to {msg['to']}] {msg['content']}"
-                        )
-                    else:
-                        response_lines.append(
-                            f"[{timestamp}] [DM from {msg['from']}] {msg['content']}"
-                        )
+            response_lines.extend(message_lines)
 
         # Add metadata at the end
         response_lines.append("")
@@ -372,25 +549,134 @@ async def hive(
         return f"ERROR: {str(e)}"
 
 
-async def main():
-    """Main entry point for MCP server."""
-    logger.info("Starting HIVE MCP Server...")
+async def warm_up() -> "StorageBackend":
+    """
+    Load settings and storage and open the database.
+
+    Runs alongside the first protocol exchange instead of before it; tool
+    calls wait for it. Imports happen in a thread so the event loop can
+    answer initialize meanwhile.
+
+    Returns:
+        StorageBackend: The opened storage backend
+    """
+    def load_modules():
+        from server.config import settings
+        import server.storage.sqlite_manager  # noqa: F401
+        backend = settings.storage_backend.lower()
+        if backend == "redis":
+            import server.storage.redis_manager  # noqa: F401
+        elif backend == "memory":
+            import server.storage.memory_manager  # noqa: F401
+        return settings
 
-    # Test database connection
     try:
-        db = await get_sqlite_manager()
+        settings = await asyncio.to_thread(load_modules)
+        server.max_concurrency = max(settings.mcp_max_concurrent_requests, 1)
+
+        from server.storage.backend import get_storage_manager
+        db = await get_storage_manager()
+        if settings.storage_backend.lower() == "memory":
+            logger.warning("In-memory storage is private to this session; set HIVE_MCP_RELAY=1 to share the daemon's")
         if not await db.ping():
             logger.error("Failed to connect to database!")
             raise Exception("Database connection failed")
         logger.info("Database connected successfully")
+        return db
     except Exception as e:
         logger.error(f"Database initialization failed: {e}")
         raise
 
+
+def seconds_since_process_start() -> Optional[float]:
+    """Wall time since this process started (Linux only, 10 ms resolution)."""
+    try:
+        with open("/proc/self/stat") as f:
+            # Field 22 (starttime); fields after the ")" of the command start at 3
+            start_ticks = int(f.read().rsplit(")", 1)[1].split()[19])
+        with open("/proc/uptime") as f:
+            uptime = float(f.read().split()[0])
+        return uptime - start_ticks / os.sysconf("SC_CLK_TCK")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+class StartupProfile:
+    """Time-to-first-initialize-response breakdown, written to stderr."""
+
+    def __init__(self, main_start: float):
+        self.main_start = main_start
+        self.serve_start: Optional[float] = None
+        # Interpreter startup: process start until this module began importing
+        age = seconds_since_process_start()
+        self.interpreter = None if age is None else max(age - (time.perf_counter() - _MODULE_START), 0.0)
+
+    def report(self):
+        """Write the breakdown once the first initialize response is sent."""
+        server.on_initialize = None
+        now = time.perf_counter()
+        phases = [
+            ("module imports", self.main_start - _MODULE_START),
+            ("event loop + stdio", (self.serve_start or now) - self.main_start),
+            ("first initialize", now - (self.serve_start or now)),
+        ]
+        if self.interpreter is not None:
+            phases.insert(0, ("interpreter start", self.interpreter))
+        total_ms = sum(seconds for _, seconds in phases) * 1000
+
+        lines = [f"HIVE startup profile (target: first initialize response < {STARTUP_TARGET_MS} ms)"]
+        lines += [f"  {name:<22}{seconds * 1000:8.1f} ms" for name, seconds in phases]
+        lines.append(f"  {'total':<22}{total_ms:8.1f} ms  ({'OK' if total_ms < STARTUP_TARGET_MS else 'over target'})")
+        sys.stderr.write("\n".join(lines) + "\n")
+        sys.stderr.flush()
+
+    def report_warm_up(self, task: asyncio.Task):
+        """Write how long the background storage warm-up took."""
+        outcome = "failed" if task.cancelled() or task.exception() else "done"
+        elapsed_ms = (time.perf_counter() - self.main_start) * 1000
+        sys.stderr.write(f"  storage warm-up (background): {elapsed_ms:.1f} ms ({outcome})\n")
+        sys.stderr.flush()
+
+
+async def main(profile_startup: bool = False):
+    """
+    Main entry point for MCP server.
+
+    Args:
+        profile_startup: Report the time to the first initialize response on stderr
+    """
+    main_start = time.perf_counter()
+    logger.info("Starting HIVE MCP Server...")
+
+    profile = StartupProfile(main_start) if profile_startup else None
+    if profile is not None:
+        server.on_initialize = profile.report
+
+    # Open storage in the background; tool calls wait for it
+    ready = asyncio.create_task(warm_up())
+    if profile is not None:
+        ready.add_done_callback(profile.report_warm_up)
+
     # Start MCP server
     logger.info("HIVE MCP Server ready - waiting for tool calls...")
-    await server.run()
+    if profile is not None:
+        profile.serve_start = time.perf_counter()
+    try:
+        await server.run(ready)
+    finally:
+        # A profiled run reports the warm-up even if the session was short
+        if profile is None and not ready.done():
+            ready.cancel()
+        db, = await asyncio.gather(ready, return_exceptions=True)
+        if not isinstance(db, BaseException):
+            await db.close()
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    from server.mcp_relay import relay_requested
+
+    if "--relay" in sys.argv[1:] or relay_requested():
+        # Forward this session to the shared HIVE daemon instead
+        from server.mcp_relay import main as relay_main
+        sys.exit(relay_main())
+    asyncio.run(main(profile_startup="--profile-startup" in sys.argv[1:]))
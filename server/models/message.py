@@ -1,8 +1,15 @@
 """Message model and utilities"""
+import base64
+import binascii
+import re
 import secrets
 from datetime import datetime
 from typing import Optional, Tuple
 
+from shared.constants import CHANNEL_DM, CHANNEL_NAME_MAX_LENGTH, CHANNEL_PUBLIC
+
+CHANNEL_NAME_PATTERN = re.compile(rf"[a-z0-9][a-z0-9_-]{{0,{CHANNEL_NAME_MAX_LENGTH - 1}}}")
+
 
 def generate_message_id() -> str:
     """
@@ -16,6 +23,67 @@ def generate_message_id() -> str:
     return f"msg_{secrets.token_hex(8)}"
 
 
+def encode_cursor(seq: int) -> str:
+    """
+    Encode a message sequence number as an opaque cursor token.
+
+    The token is the big-endian bytes of the sequence number in unpadded
+    URL-safe base64, so it stays short (a few characters) and safe to pass
+    in query strings.
+
+    Args:
+        seq: Message sequence number (0 = before the first message)
+
+    Returns:
+        str: Cursor token
+    """
+    raw = seq.to_bytes(max((seq.bit_length() + 7) // 8, 1), "big")
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode("ascii")
+
+
+def decode_cursor(token: str) -> int:
+    """
+    Decode a cursor token produced by encode_cursor.
+
+    Args:
+        token: Cursor token
+
+    Returns:
+        int: Message sequence number
+
+    Raises:
+        ValueError: If the token is malformed
+    """
+    if not token or len(token) > 16:
+        raise ValueError(f"Invalid cursor: {token!r}")
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+    except (binascii.Error, ValueError):
+        raise ValueError(f"Invalid cursor: {token!r}")
+    if not raw:
+        raise ValueError(f"Invalid cursor: {token!r}")
+    return int.from_bytes(raw, "big")
+
+
+def is_valid_channel_name(name: str) -> bool:
+    """
+    Check a group channel name.
+
+    Names are lowercase letters, digits, '-' and '_', start with a letter
+    or digit, and cannot shadow the built-in public and DM channels.
+
+    Args:
+        name: Proposed channel name
+
+    Returns:
+        bool: True if the name can be used for a group channel
+    """
+    return (
+        bool(CHANNEL_NAME_PATTERN.fullmatch(name))
+        and name not in (CHANNEL_PUBLIC, CHANNEL_DM)
+    )
+
+
 def create_dm_channel_key(agent1: str, agent2: str) -> str:
     """
     Create a consistent DM channel key from two agent IDs.
@@ -0,0 +1,205 @@
+"""In-process agent registry serving roster reads from memory"""
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from shared.constants import AGENT_STATUS_ACTIVE
+
+# Columns of the agents table, in table order
+AGENT_FIELDS = ("agent_id", "context_summary", "registered_at", "last_heartbeat", "status", "endpoint")
+
+# Fields whose change alters what rosters show (heartbeat refreshes do not)
+ROSTER_FIELDS = ("context_summary", "status", "endpoint")
+
+
+class AgentRecord:
+    """One agent, as stored in the agents table"""
+
+    __slots__ = AGENT_FIELDS
+
+    def __init__(
+        self,
+        agent_id: str,
+        context_summary: Optional[str],
+        registered_at: str,
+        last_heartbeat: str,
+        status: str = AGENT_STATUS_ACTIVE,
+        endpoint: Optional[str] = None
+    ):
+        self.agent_id = agent_id
+        self.context_summary = context_summary
+        self.registered_at = registered_at
+        self.last_heartbeat = last_heartbeat
+        self.status = status
+        self.endpoint = endpoint
+
+    @classmethod
+    def from_row(cls, row: Any) -> "AgentRecord":
+        """Build a record from an agents row (or any mapping with its columns)"""
+        return cls(*(row[field] for field in AGENT_FIELDS))
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Agent data in the same shape as an agents row"""
+        return {field: getattr(self, field) for field in AGENT_FIELDS}
+
+
+class AgentRegistry:
+    """
+    Agents keyed by agent_id, kept in memory.
+
+    The database stays the durable copy: registrations and context changes
+    are written through, while heartbeats only update the record here and
+    mark it dirty until take_dirty() hands them over for a batched flush.
+
+    ``version`` increases whenever the roster changes (an agent is added or
+    removed, or its context, status or endpoint changes), so callers can
+    cache anything derived from the roster until it moves.
+    """
+
+    def __init__(self):
+        self._agents: Dict[str, AgentRecord] = {}
+        self._dirty: Set[str] = set()
+        self.version = 0
+
+    def __len__(self) -> int:
+        return len(self._agents)
+
+    def __contains__(self, agent_id: str) -> bool:
+        return agent_id in self._agents
+
+    def get(self, agent_id: str) -> Optional[AgentRecord]:
+        """Get an agent's record, or None if it is not known"""
+        return self._agents.get(agent_id)
+
+    def put(self, record: AgentRecord):
+        """Add or replace an agent with a record already stored in the database"""
+        existing = self._agents.get(record.agent_id)
+        if existing is None or _roster_differs(existing, record):
+            self.version += 1
+        self._agents[record.agent_id] = record
+        self._dirty.discard(record.agent_id)
+
+    def record_heartbeat(
+        self,
+        agent_id: str,
+        now: str,
+        context_summary: Optional[str] = None,
+        persisted: bool = False
+    ) -> bool:
+        """
+        Refresh an agent's heartbeat, reactivating it if needed.
+
+        Args:
+            agent_id: Agent identifier
+            now: Heartbeat timestamp (ISO format)
+            context_summary: New context summary (None keeps the current one)
+            persisted: True if the database already holds this heartbeat;
+                otherwise it is queued for the next flush
+
+        Returns:
+            bool: False if the agent is not known
+        """
+        record = self._agents.get(agent_id)
+        if record is None:
+            return False
+
+        if record.status != AGENT_STATUS_ACTIVE:
+            record.status = AGENT_STATUS_ACTIVE
+            self.version += 1
+        if context_summary is not None and context_summary != record.context_summary:
+            record.context_summary = context_summary
+            self.version += 1
+        if now > record.last_heartbeat:
+            record.last_heartbeat = now
+
+        if persisted:
+            self._dirty.discard(agent_id)
+        else:
+            self._dirty.add(agent_id)
+        return True
+
+    def set_context(self, agent_id: str, context_summary: str) -> bool:
+        """Replace an agent's context summary; False if the agent is not known"""
+        record = self._agents.get(agent_id)
+        if record is None:
+            return False
+        if record.context_summary != context_summary:
+            record.context_summary = context_summary
+            self.version += 1
+        return True
+
+    def records(self) -> List[AgentRecord]:
+        """Every agent, active or not, in registration order"""
+        return list(self._agents.values())
+
+    def active(self, since: Optional[str] = None) -> List[AgentRecord]:
+        """
+        Active agents, in registration order.
+
+        Args:
+            since: Only agents whose last heartbeat is after this ISO time
+
+        Returns:
+            list: Matching records
+        """
+        return [
+            record for record in self._agents.values()
+            if record.status == AGENT_STATUS_ACTIVE and (since is None or record.last_heartbeat > since)
+        ]
+
+    @property
+    def has_dirty(self) -> bool:
+        """Whether heartbeats are waiting to be flushed"""
+        return bool(self._dirty)
+
+    def take_dirty(self) -> List[Tuple[str, str]]:
+        """
+        Hand over unflushed heartbeats, clearing them.
+
+        Returns:
+            list: (agent_id, last_heartbeat) pairs
+        """
+        pending = [
+            (agent_id, self._agents[agent_id].last_heartbeat)
+            for agent_id in self._dirty
+            if agent_id in self._agents
+        ]
+        self._dirty.clear()
+        return pending
+
+    def mark_dirty(self, agent_ids: Iterable[str]):
+        """Queue heartbeats again, e.g. after a failed flush"""
+        self._dirty.update(agent_id for agent_id in agent_ids if agent_id in self._agents)
+
+    def merge(self, rows: Iterable[Any]):
+        """
+        Replace the registry with the database's agents.
+
+        Picks up agents registered, changed or deactivated by other
+        processes. Heartbeats newer than the database (waiting for, or in
+        the middle of, a flush) are kept.
+
+        Args:
+            rows: Every row of the agents table
+        """
+        agents: Dict[str, AgentRecord] = {}
+        changed = False
+        for row in rows:
+            record = AgentRecord.from_row(row)
+            existing = self._agents.get(record.agent_id)
+            # Heartbeats only move forward; newer ones may not be flushed yet
+            if existing is not None and existing.last_heartbeat > record.last_heartbeat:
+                record.last_heartbeat = existing.last_heartbeat
+                if record.agent_id in self._dirty:
+                    record.status = AGENT_STATUS_ACTIVE
+            if existing is None or _roster_differs(existing, record):
+                changed = True
+            agents[record.agent_id] = record
+
+        if changed or agents.keys() != self._agents.keys():
+            self.version += 1
+        self._agents = agents
+        self._dirty &= agents.keys()
+
+
+def _roster_differs(a: AgentRecord, b: AgentRecord) -> bool:
+    """Whether two records of one agent differ in anything rosters show"""
+    return any(getattr(a, field) != getattr(b, field) for field in ROSTER_FIELDS)
@@ -0,0 +1,155 @@
+"""Append-only compressed archive for messages moved out of the hot table"""
+import asyncio
+import gzip
+import json
+import logging
+import os
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+SEGMENT_PREFIX = "messages-"
+SEGMENT_SUFFIX = ".jsonl.gz"
+INDEX_FILE = "index.json"
+
+
+class MessageArchive:
+    """
+    Day-partitioned archive of cold messages.
+
+    Each day (by message timestamp) is one gzip-compressed JSON Lines segment,
+    ``messages-YYYY-MM-DD.jsonl.gz``. Appends add a new gzip member to the end
+    of a segment, so archived data is never rewritten. ``index.json`` records
+    the seq range of every segment, so reads only open segments that can
+    contain matching messages.
+
+    Archiving writes here before deleting from the hot table; after a crash in
+    between, the same messages are archived again and reads drop the
+    duplicates by seq. They may also still be in the hot table, so reads
+    spanning both continue there after the last archived seq.
+    """
+
+    def __init__(self, directory: str):
+        """
+        Initialize message archive.
+
+        Args:
+            directory: Directory holding the segments (created if missing)
+        """
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._lock = asyncio.Lock()
+
+    def _segment_path(self, day: str) -> Path:
+        """Path of the segment for a YYYY-MM-DD day"""
+        return self.directory / f"{SEGMENT_PREFIX}{day}{SEGMENT_SUFFIX}"
+
+    def _load_index(self) -> Dict[str, List[int]]:
+        """Read the day -> [min_seq, max_seq] index"""
+        path = self.directory / INDEX_FILE
+        if not path.exists():
+            return {}
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def _save_index(self, index: Dict[str, List[int]]):
+        """Replace the index atomically"""
+        path = self.directory / INDEX_FILE
+        tmp_path = path.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(index, f, sort_keys=True)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+
+    async def append(self, messages: List[Dict[str, Any]]):
+        """
+        Durably append messages to their day segments.
+
+        Args:
+            messages: Message rows, as returned by the hot table
+        """
+        if not messages:
+            return
+        async with self._lock:
+            await asyncio.to_thread(self._append_sync, messages)
+
+    def _append_sync(self, messages: List[Dict[str, Any]]):
+        """Blocking part of append()"""
+        by_day: Dict[str, List[Dict[str, Any]]] = {}
+        for msg in messages:
+            by_day.setdefault(msg["timestamp"][:10], []).append(msg)
+
+        index = self._load_index()
+        for day, day_messages in by_day.items():
+            lines = "".join(json.dumps(msg, ensure_ascii=False) + "\n" for msg in day_messages)
+            with open(self._segment_path(day), "ab") as f:
+                f.write(gzip.compress(lines.encode("utf-8")))
+                f.flush()
+                os.fsync(f.fileno())
+
+            seqs = [msg["seq"] for msg in day_messages]
+            low, high = index.get(day, [min(seqs), max(seqs)])
+            index[day] = [min(low, *seqs), max(high, *seqs)]
+
+        self._save_index(index)
+
+    async def read(
+        self,
+        match: Callable[[Dict[str, Any]], bool],
+        since_timestamp: Optional[datetime] = None,
+        after_seq: Optional[int] = None,
+        limit: int = 100
+    ) -> List[Dict[str, Any]]:
+        """
+        Read archived messages, oldest first.
+
+        Args:
+            match: Predicate selecting the messages of interest
+            since_timestamp: Only messages stamped after this time
+            after_seq: Only messages after this sequence number
+            limit: Maximum number of messages
+
+        Returns:
+            list: Matching message dictionaries
+        """
+        # Appends write gzip members in place; never read a half-written one
+        async with self._lock:
+            return await asyncio.to_thread(self._read_sync, match, since_timestamp, after_seq, limit)
+
+    def _read_sync(
+        self,
+        match: Callable[[Dict[str, Any]], bool],
+        since_timestamp: Optional[datetime],
+        after_seq: Optional[int],
+        limit: int
+    ) -> List[Dict[str, Any]]:
+        """Blocking part of read()"""
+        since_iso = since_timestamp.isoformat() if since_timestamp else None
+        since_day = since_iso[:10] if since_iso else None
+
+        found: Dict[int, Dict[str, Any]] = {}
+        for day, (_, max_seq) in sorted(self._load_index().items()):
+            if since_day and day < since_day:
+                continue
+            if after_seq is not None and max_seq <= after_seq:
+                continue
+
+            with gzip.open(self._segment_path(day), "rt", encoding="utf-8") as f:
+                for line in f:
+                    msg = json.loads(line)
+                    if after_seq is not None and msg["seq"] <= after_seq:
+                        continue
+                    if since_iso and msg["timestamp"] <= since_iso:
+                        continue
+                    if match(msg):
+                        found[msg["seq"]] = msg
+
+            # Days are read in order, so once a day fills the page later days
+            # can only hold newer messages
+            if len(found) >= limit:
+                break
+
+        return [found[seq] for seq in sorted(found)[:limit]]
@@ -0,0 +1,277 @@
+"""Storage backend interface and selection"""
+from abc import ABC, abstractmethod
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from server.config import settings
+
+# Values of settings.storage_backend
+BACKEND_SQLITE = "sqlite"
+BACKEND_REDIS = "redis"
+BACKEND_MEMORY = "memory"
+BACKENDS = (BACKEND_SQLITE, BACKEND_REDIS, BACKEND_MEMORY)
+
+
+class StorageBackend(ABC):
+    """
+    Interface every HIVE storage backend implements.
+
+    The API, the MCP server, the daemon and the stream broker only use these
+    methods, so any backend can serve them. Messages are dicts with
+    message_id, from_agent, to_agent, channel, content, timestamp (ISO
+    string), thread_id and seq; agents are dicts with agent_id,
+    context_summary, registered_at, last_heartbeat and status.
+
+    Failures are logged and reported through the return value (False, None,
+    0 or an empty result) rather than raised. test_storage_conformance.py
+    checks a backend against this contract.
+    """
+
+    @abstractmethod
+    async def initialize(self):
+        """Create or upgrade the storage schema"""
+
+    @abstractmethod
+    async def ping(self) -> bool:
+        """Whether the store is reachable"""
+
+    @abstractmethod
+    async def close(self):
+        """Flush pending writes and release connections"""
+
+    # Agents
+
+    @abstractmethod
+    async def register_agent(self, agent_id: str, context_summary: str, endpoint: Optional[str] = None) -> bool:
+        """Register an agent, or re-activate and update an existing one"""
+
+    @abstractmethod
+    async def update_heartbeat(self, agent_id: str) -> bool:
+        """Mark an agent as seen now; False if it is not registered"""
+
+    @abstractmethod
+    async def update_agent_context(self, agent_id: str, context_summary: str) -> bool:
+        """Replace an agent's context summary"""
+
+    @abstractmethod
+    async def get_agent(self, agent_id: str) -> Optional[Dict[str, Any]]:
+        """An agent by ID, or None"""
+
+    @abstractmethod
+    async def get_agents(self, agent_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """The known agents among agent_ids, keyed by ID"""
+
+    @abstractmethod
+    async def list_agents(self, include_stale: bool = False) -> List[str]:
+        """IDs of active (or, with include_stale, all) agents"""
+
+    @abstractmethod
+    async def get_all_agents_details(self, include_stale: bool = False) -> List[Dict[str, Any]]:
+        """Active (or, with include_stale, all) agents"""
+
+    @abstractmethod
+    def active_roster(self) -> List[Dict[str, Any]]:
+        """Active agents as of the last poll, without touching storage"""
+
+    @abstractmethod
+    async def agent_name_exists(self, agent_id: str) -> bool:
+        """Whether an agent ID is registered"""
+
+    @abstractmethod
+    async def cleanup_inactive_agents(self) -> int:
+        """Remove agents silent for removal_threshold seconds; returns how many"""
+
+    # Messages
+
+    @abstractmethod
+    async def send_message(
+        self,
+        message_id: str,
+        from_agent: str,
+        content: str,
+        to_agent: Optional[str] = None,
+        thread_id: Optional[str] = None,
+        channel: Optional[str] = None
+    ) -> bool:
+        """Store a public, DM (to_agent) or group channel message"""
+
+    @abstractmethod
+    async def send_messages(self, from_agent: str, messages: List[Dict[str, Any]]) -> bool:
+        """Store several messages from one agent atomically, in order"""
+
+    @abstractmethod
+    async def get_latest_seq(self) -> int:
+        """Seq of the newest message (0 when there are none)"""
+
+    @abstractmethod
+    async def get_messages_after(self, after_seq: int, limit: int = 500) -> List[Dict[str, Any]]:
+        """Every message after a seq, oldest first"""
+
+    @abstractmethod
+    async def wait_for_messages(self, after_seq: int, timeout: float) -> bool:
+        """Wait up to timeout seconds for a message after a seq"""
+
+    @abstractmethod
+    async def get_public_messages(
+        self,
+        since_timestamp: Optional[datetime] = None,
+        limit: int = 50,
+        after_seq: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """Public messages, oldest first"""
+
+    @abstractmethod
+    async def get_dm_messages(
+        self,
+        agent_id: str,
+        other_agent_id: Optional[str] = None,
+        since_timestamp: Optional[datetime] = None,
+        limit: int = 50,
+        after_seq: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """DMs sent or received by an agent (optionally with one other agent), oldest first"""
+
+    @abstractmethod
+    async def get_dm_inboxes(
+        self,
+        cursors: Dict[str, Optional[int]],
+        limit: int = 50
+    ) -> Dict[str, List[Dict[str, Any]]]:
+        """Several agents' DMs, each after its own cursor"""
+
+    # Group channels
+
+    @abstractmethod
+    async def create_channel(self, name: str, created_by: str, description: Optional[str] = None) -> bool:
+        """Create a channel with its creator as first member; False if it exists"""
+
+    @abstractmethod
+    async def join_channel(self, name: str, agent_id: str, create: bool = False) -> bool:
+        """Join a channel (creating it if create is set); False if it does not exist"""
+
+    @abstractmethod
+    async def leave_channel(self, name: str, agent_id: str) -> bool:
+        """Leave a channel"""
+
+    @abstractmethod
+    async def get_channel(self, name: str) -> Optional[Dict[str, Any]]:
+        """A channel with its member and message counts, or None"""
+
+    @abstractmethod
+    async def list_channels(self) -> List[Dict[str, Any]]:
+        """Every channel, by name"""
+
+    @abstractmethod
+    async def get_channel_members(self, name: str) -> List[str]:
+        """A channel's member IDs, sorted"""
+
+    @abstractmethod
+    async def get_agent_channels(self, agent_id: str) -> List[str]:
+        """Names of the channels an agent belongs to, sorted"""
+
+    @abstractmethod
+    async def is_channel_member(self, name: str, agent_id: str) -> bool:
+        """Whether an agent belongs to a channel"""
+
+    @abstractmethod
+    async def get_channel_messages(
+        self,
+        name: str,
+        since_timestamp: Optional[datetime] = None,
+        limit: int = 50,
+        after_seq: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """A channel's messages, oldest first"""
+
+    # Threads
+
+    @abstractmethod
+    async def get_thread(self, thread_id: str) -> Optional[Dict[str, Any]]:
+        """A thread's summary (counts, participants, activity times), or None"""
+
+    @abstractmethod
+    async def get_thread_messages(
+        self,
+        thread_id: str,
+        agent_id: Optional[str] = None,
+        since_timestamp: Optional[datetime] = None,
+        limit: int = 50,
+        after_seq: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """A thread's messages (those visible to agent_id if given), oldest first"""
+
+    # Poll
+
+    @abstractmethod
+    async def poll(
+        self,
+        agent_id: str,
+        description: Optional[str] = None,
+        outgoing: Optional[List[Dict[str, Any]]] = None,
+        after_seq: Optional[int] = None,
+        since_timestamp: Optional[datetime] = None,
+        limit: int = 100,
+        thread_id: Optional[str] = None
+    ) -> Optional[Dict[str, Any]]:
+        """
+        One hive tool call: register or heartbeat the agent, store its
+        outgoing messages and read what it can see after its cursor.
+
+        Returns:
+            Dict with messages, cursor, public_count, dm_count, group_count,
+            channels and agents, or None on failure
+        """
+
+    # Maintenance and statistics
+
+    @abstractmethod
+    async def archive_messages(self) -> int:
+        """Move messages past archive_after_hours to cold storage; returns how many"""
+
+    @abstractmethod
+    async def prune_messages(self) -> int:
+        """Delete messages past the retention limits; returns how many"""
+
+    @abstractmethod
+    async def reclaim_space(self, max_pages: Optional[int] = None) -> int:
+        """Return free space to the filesystem; returns pages released"""
+
+    @abstractmethod
+    async def get_stats(self) -> Dict[str, Any]:
+        """Agent, message and channel counts, plus database_connected"""
+
+    @abstractmethod
+    async def get_public_message_count(self) -> int:
+        """Number of public messages"""
+
+    @abstractmethod
+    async def get_dm_message_count(self, agent_id: str) -> int:
+        """Number of DMs an agent sent or received"""
+
+    @abstractmethod
+    async def get_dm_pair_message_count(self, agent_id: str, other_agent_id: str) -> int:
+        """Number of DMs between two agents"""
+
+
+async def get_storage_manager() -> StorageBackend:
+    """
+    Get or create the global storage manager of the configured backend.
+
+    Backends are imported only when selected, so the redis package is
+    needed only by deployments that use it.
+
+    Returns:
+        StorageBackend: SQLiteManager, RedisManager or MemoryManager, per
+            settings.storage_backend
+    """
+    backend = settings.storage_backend.lower()
+    if backend == BACKEND_SQLITE:
+        from server.storage.sqlite_manager import get_sqlite_manager
+        return await get_sqlite_manager()
+    if backend == BACKEND_REDIS:
+        from server.storage.redis_manager import get_redis_manager
+        return await get_redis_manager()
+    if backend == BACKEND_MEMORY:
+        from server.storage.memory_manager import get_memory_manager
+        return await get_memory_manager()
+    raise ValueError(f"Unknown storage backend: {settings.storage_backend} (expected one of {', '.join(BACKENDS)})")
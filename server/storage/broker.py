@@ -0,0 +1,187 @@
+"""In-memory pub/sub fan-out of committed messages to streaming subscribers"""
+import asyncio
+import logging
+from typing import Any, AsyncIterator, Dict, Optional, Set
+
+from server.config import settings
+from server.storage.backend import get_storage_manager
+from shared.constants import CHANNEL_PUBLIC
+
+logger = logging.getLogger(__name__)
+
+# Messages read from the log per fetch
+TAIL_BATCH_SIZE = 500
+
+# Longest the tailer waits on the notifier before re-checking for subscribers
+TAIL_WAIT_SECONDS = 15.0
+
+
+class Subscription:
+    """A streaming client: what it receives and how far it has got"""
+
+    __slots__ = ("agent_id", "queue", "last_seq", "lagging")
+
+    def __init__(self, agent_id: Optional[str], after_seq: int, queue_size: int):
+        self.agent_id = agent_id
+        self.last_seq = after_seq
+        # None in the queue means the subscriber fell behind; it gets no live
+        # messages until it has taken the None and caught up from the database
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.lagging = False
+
+    def matches(self, msg: Dict[str, Any]) -> bool:
+        """Public messages go to everyone; DMs only to their sender and recipient"""
+        if msg['channel'] == CHANNEL_PUBLIC:
+            return True
+        return self.agent_id is not None and self.agent_id in (msg['to_agent'], msg['from_agent'])
+
+
+class MessageBroker:
+    """
+    Fans newly committed messages out to SSE and WebSocket subscribers.
+
+    A single tailer task follows the message log by seq, woken by the
+    database's MessageNotifier, so messages written by this process and by
+    other processes sharing the database are published once, in order.
+
+    Each subscriber has a bounded queue. Publishing never blocks: when a
+    queue is full it is emptied and marked, and that subscriber catches up
+    from the database on its own before returning to live delivery, so a
+    slow client never holds up the others. The same catch-up serves
+    clients resuming from a cursor.
+    """
+
+    def __init__(self, db, queue_size: Optional[int] = None):
+        """
+        Initialize message broker.
+
+        Args:
+            db: Storage manager to read the message log from
+            queue_size: Per-subscriber queue bound (uses settings if not provided)
+        """
+        self.db = db
+        self.queue_size = max(queue_size or settings.stream_queue_size, 1)
+        self._subscribers: Set[Subscription] = set()
+        self._task: Optional[asyncio.Task] = None
+        self._tail_seq = 0
+
+    @property
+    def subscriber_count(self) -> int:
+        """Number of connected subscribers"""
+        return len(self._subscribers)
+
+    async def stream(self, agent_id: Optional[str] = None, after_seq: Optional[int] = None) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Subscribe and yield matching messages in seq order, without duplicates.
+
+        Args:
+            agent_id: Also receive this agent's DMs (None: public only)
+            after_seq: Resume after this cursor (None: only new messages)
+
+        Yields:
+            dict: Message dictionaries
+        """
+        if after_seq is None:
+            after_seq = await self.db.get_latest_seq()
+
+        sub = Subscription(agent_id, after_seq, self.queue_size)
+        # Register before backfilling, so nothing committed meanwhile is missed
+        self._subscribers.add(sub)
+        await self._ensure_tailing()
+        try:
+            async for msg in self._catch_up(sub):
+                yield msg
+
+            while True:
+                msg = await sub.queue.get()
+                if msg is None:
+                    sub.lagging = False
+                    async for msg in self._catch_up(sub):
+                        yield msg
+                    continue
+                if msg['seq'] <= sub.last_seq:
+                    continue
+                sub.last_seq = msg['seq']
+                yield msg
+        finally:
+            self._subscribers.discard(sub)
+
+    async def _catch_up(self, sub: Subscription) -> AsyncIterator[Dict[str, Any]]:
+        """Read a subscriber's missed messages from the database"""
+        while True:
+            messages = await self.db.get_messages_after(sub.last_seq, TAIL_BATCH_SIZE)
+            for msg in messages:
+                sub.last_seq = msg['seq']
+                if sub.matches(msg):
+                    yield msg
+            if len(messages) < TAIL_BATCH_SIZE:
+                return
+
+    async def _ensure_tailing(self):
+        """
+        Start the tailer task if it is not running.
+
+        The tailer publishes everything after the head read here, and the
+        caller's catch-up reads the database afterwards, so between them no
+        message is missed.
+        """
+        if self._task is None or self._task.done():
+            self._tail_seq = await self.db.get_latest_seq()
+            if self._task is None or self._task.done():
+                self._task = asyncio.create_task(self._tail())
+
+    async def _tail(self):
+        """Follow the message log and publish it while anyone is subscribed"""
+        while self._subscribers:
+            try:
+                await self.db.wait_for_messages(self._tail_seq, TAIL_WAIT_SECONDS)
+                while True:
+                    messages = await self.db.get_messages_after(self._tail_seq, TAIL_BATCH_SIZE)
+                    for msg in messages:
+                        self._publish(msg)
+                    if messages:
+                        self._tail_seq = messages[-1]['seq']
+                    if len(messages) < TAIL_BATCH_SIZE:
+                        break
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Error in message broker tailer: {e}")
+                await asyncio.sleep(1)
+
+    def _publish(self, msg: Dict[str, Any]):
+        """Queue a message for every matching subscriber without blocking"""
+        for sub in list(self._subscribers):
+            if sub.lagging or not sub.matches(msg):
+                continue
+            try:
+                sub.queue.put_nowait(msg)
+            except asyncio.QueueFull:
+                # Drop the backlog; the subscriber re-reads it from the database
+                while not sub.queue.empty():
+                    sub.queue.get_nowait()
+                sub.queue.put_nowait(None)
+                sub.lagging = True
+                logger.warning(f"Stream subscriber {sub.agent_id or 'anonymous'} fell behind; catching up from database")
+
+    async def close(self):
+        """Stop the tailer task"""
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self._task = None
+
+
+# Global message broker instance
+message_broker: Optional[MessageBroker] = None
+
+
+async def get_message_broker() -> MessageBroker:
+    """Get or create global message broker instance"""
+    global message_broker
+    if message_broker is None:
+        message_broker = MessageBroker(await get_storage_manager())
+    return message_broker
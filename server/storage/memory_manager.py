@@ -0,0 +1,1178 @@
+"""In-memory storage manager for HIVE"""
+import asyncio
+import heapq
+import json
+import logging
+import os
+import time
+from bisect import bisect_left, bisect_right
+from datetime import datetime, timedelta
+from itertools import islice
+from operator import attrgetter, itemgetter
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from server.config import settings
+from shared.constants import AGENT_STATUS_ACTIVE, AGENT_STATUS_INACTIVE, CHANNEL_DM, CHANNEL_PUBLIC
+from server.storage.agent_registry import AGENT_FIELDS, AgentRecord, AgentRegistry
+from server.storage.backend import StorageBackend
+from server.storage.notifier import MessageNotifier
+from server.storage.sqlite_manager import ROSTER_CACHE_SECONDS, _is_visible_to, _message_channel
+
+logger = logging.getLogger(__name__)
+
+# Columns of a stored message, in the order SQLiteManager returns them
+MESSAGE_FIELDS = ("seq", "message_id", "from_agent", "to_agent", "channel", "content", "timestamp", "thread_id")
+
+# Format of the snapshot file; initialize() refuses other versions
+SNAPSHOT_VERSION = 1
+
+_seq_of = attrgetter("seq")
+_timestamp_of = attrgetter("timestamp")
+
+
+class MessageRecord:
+    """
+    One stored message.
+
+    Slots instead of a dict per message; indexing by field name makes a
+    record usable where a message dict is expected (e.g. _is_visible_to).
+    """
+
+    __slots__ = MESSAGE_FIELDS
+
+    def __init__(
+        self,
+        seq: int,
+        message_id: str,
+        from_agent: str,
+        to_agent: Optional[str],
+        channel: str,
+        content: str,
+        timestamp: str,
+        thread_id: Optional[str]
+    ):
+        self.seq = seq
+        self.message_id = message_id
+        self.from_agent = from_agent
+        self.to_agent = to_agent
+        self.channel = channel
+        self.content = content
+        self.timestamp = timestamp
+        self.thread_id = thread_id
+
+    def __getitem__(self, field: str) -> Any:
+        return getattr(self, field)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Message data in the same shape as a messages row"""
+        return {field: getattr(self, field) for field in MESSAGE_FIELDS}
+
+
+class ThreadSummary:
+    """Running totals of one thread, kept across pruning"""
+
+    __slots__ = ("message_count", "started_at", "last_activity", "last_seq", "participants")
+
+    def __init__(
+        self,
+        message_count: int,
+        started_at: str,
+        last_activity: str,
+        last_seq: int,
+        participants: Dict[str, int]
+    ):
+        self.message_count = message_count
+        self.started_at = started_at
+        self.last_activity = last_activity
+        self.last_seq = last_seq
+        self.participants = participants
+
+
+def _dm_pair(agent_id: str, other_agent_id: str) -> Tuple[str, str]:
+    """Key of the DMs between two agents, the same whoever sent them"""
+    return (agent_id, other_agent_id) if agent_id <= other_agent_id else (other_agent_id, agent_id)
+
+
+class MemoryManager(StorageBackend):
+    """
+    Keeps all HIVE state in process memory, with the interface of SQLiteManager.
+
+    Meant for short-lived swarms on one machine and for tests: nothing
+    touches the disk on the request path, and no operation awaits while it
+    reads or changes state, so each one is atomic on the event loop. The
+    store is private to its process; MCP sessions share it through the
+    daemon (HIVE_MCP_RELAY).
+
+    Messages are MessageRecord objects, appended in seq order to the log and
+    to one list per index: the public channel, each group channel, each DM
+    pair, each agent's DM inbox (sent and received) and each thread. Every
+    list stays sorted by seq, so a cursor read is a binary search and a
+    slice. Agents are kept in an AgentRegistry.
+
+    Retention limits are applied by prune_messages(), as with SQLite. With
+    a snapshot path, the whole state is written to that file every
+    memory_snapshot_interval_seconds (if it changed) and on close, and read
+    back by initialize(), so a crash loses at most one interval.
+    """
+
+    def __init__(self, snapshot_path: Optional[str] = None):
+        """
+        Initialize an empty in-memory store.
+
+        Args:
+            snapshot_path: File to snapshot the state to (uses settings if
+                not provided; empty disables snapshots)
+        """
+        if snapshot_path is None:
+            snapshot_path = settings.memory_snapshot_path
+        self.snapshot_path = snapshot_path or None
+        self.notifier = MessageNotifier(self.get_latest_seq, settings.long_poll_check_interval)
+        self.agents = AgentRegistry()
+        self._roster: Optional[Tuple[int, float, List[Dict[str, Any]]]] = None
+        self._seq = 0
+        self._log: List[MessageRecord] = []
+        # Public and group channel messages, by channel name
+        self._channels: Dict[str, List[MessageRecord]] = {CHANNEL_PUBLIC: []}
+        self._dm_pairs: Dict[Tuple[str, str], List[MessageRecord]] = {}
+        self._inboxes: Dict[str, List[MessageRecord]] = {}
+        self._threads: Dict[str, List[MessageRecord]] = {}
+        self._thread_summaries: Dict[str, ThreadSummary] = {}
+        self._channel_info: Dict[str, Dict[str, Any]] = {}
+        self._members: Dict[str, Set[str]] = {}
+        self._agent_channels: Dict[str, Set[str]] = {}
+        # Changes since startup, and as of the last snapshot (heartbeats
+        # alone do not count: agents refresh them soon after a restart)
+        self._changes = 0
+        self._snapshot_changes = 0
+        self._snapshot_lock = asyncio.Lock()
+        self._snapshot_task: Optional[asyncio.Task] = None
+        if self.snapshot_path:
+            logger.info(f"Memory storage snapshot path: {self.snapshot_path}")
+
+    async def initialize(self):
+        """Load the last snapshot, if any, and start snapshotting"""
+        if not self.snapshot_path:
+            logger.info("Memory storage initialized (no snapshots)")
+            return
+
+        if Path(self.snapshot_path).exists():
+            self._restore(await asyncio.to_thread(self._read_snapshot))
+            logger.info(
+                f"Memory storage restored from {self.snapshot_path}: "
+                f"{len(self._log)} messages, {len(self.agents)} agents"
+            )
+        if settings.memory_snapshot_interval_seconds > 0 and self._snapshot_task is None:
+            self._snapshot_task = asyncio.create_task(self._snapshot_loop())
+
+    async def ping(self) -> bool:
+        """
+        In-memory storage is always reachable.
+
+        Returns:
+            bool: True
+        """
+        return True
+
+    # Agents
+
+    async def register_agent(
+        self,
+        agent_id: str,
+        context_summary: str,
+        endpoint: Optional[str] = None
+    ) -> bool:
+        """
+        Register a new agent (or re-register an existing one).
+
+        Args:
+            agent_id: Unique agent identifier
+            context_summary: Agent's context description
+            endpoint: Optional agent endpoint
+
+        Returns:
+            bool: True if registration successful
+        """
+        now = datetime.utcnow().isoformat()
+        self.agents.put(AgentRecord(agent_id, context_summary, now, now, AGENT_STATUS_ACTIVE, endpoint))
+        self._changes += 1
+        logger.info(f"Agent registered: {agent_id}")
+        return True
+
+    async def update_heartbeat(self, agent_id: str) -> bool:
+        """
+        Update agent's last heartbeat timestamp (reactivating it if needed).
+
+        Args:
+            agent_id: Agent identifier
+
+        Returns:
+            bool: True if update successful
+        """
+        if not self.agents.record_heartbeat(agent_id, datetime.utcnow().isoformat(), persisted=True):
+            logger.warning(f"Agent not found for heartbeat: {agent_id}")
+            return False
+        return True
+
+    async def update_agent_context(self, agent_id: str, context_summary: str) -> bool:
+        """
+        Update an agent's context summary.
+
+        Args:
+            agent_id: Agent identifier
+            context_summary: New context description
+
+        Returns:
+            bool: True if the agent was found and updated
+        """
+        if not self.agents.set_context(agent_id, context_summary):
+            return False
+        self._changes += 1
+        return True
+
+    async def get_agent(self, agent_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Get agent details.
+
+        Args:
+            agent_id: Agent identifier
+
+        Returns:
+            dict: Agent data or None if not found
+        """
+        record = self.agents.get(agent_id)
+        return record.to_dict() if record is not None else None
+
+    async def get_agents(self, agent_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        Get details of several agents at once.
+
+        Args:
+            agent_ids: Agent identifiers
+
+        Returns:
+            dict: agent_id -> agent data, for the agents that exist
+        """
+        records = (self.agents.get(agent_id) for agent_id in agent_ids)
+        return {record.agent_id: record.to_dict() for record in records if record is not None}
+
+    @staticmethod
+    def _stale_cutoff() -> str:
+        """Heartbeats at or before this ISO time count as stale"""
+        cutoff = datetime.utcnow().timestamp() - settings.stale_threshold
+        return datetime.fromtimestamp(cutoff).isoformat()
+
+    async def list_agents(self, include_stale: bool = False) -> List[str]:
+        """
+        List all active agent IDs.
+
+        Args:
+            include_stale: Include agents past stale threshold
+
+        Returns:
+            list: List of agent IDs
+        """
+        return [record.agent_id for record in self.agents.active(None if include_stale else self._stale_cutoff())]
+
+    async def get_all_agents_details(self, include_stale: bool = False) -> List[Dict[str, Any]]:
+        """
+        Get details for all active agents.
+
+        Args:
+            include_stale: Include agents past stale threshold
+
+        Returns:
+            list: List of agent detail dictionaries
+        """
+        return [record.to_dict() for record in self.agents.active(None if include_stale else self._stale_cutoff())]
+
+    def active_roster(self) -> List[Dict[str, Any]]:
+        """
+        Active, non-stale agents sorted by agent_id.
+
+        The list is cached until the registry version moves, or for at most
+        ROSTER_CACHE_SECONDS, and shared between callers: treat it as
+        read-only.
+
+        Returns:
+            list: Agent dictionaries
+        """
+        now = time.monotonic()
+        cached = self._roster
+        if cached is not None and cached[0] == self.agents.version and now - cached[1] < ROSTER_CACHE_SECONDS:
+            return cached[2]
+
+        records = sorted(self.agents.active(self._stale_cutoff()), key=lambda record: record.agent_id)
+        roster = [record.to_dict() for record in records]
+        self._roster = (self.agents.version, now, roster)
+        return roster
+
+    async def agent_name_exists(self, agent_id: str) -> bool:
+        """
+        Check if an agent name is already registered.
+
+        Args:
+            agent_id: Agent ID to check
+
+        Returns:
+            bool: True if name exists
+        """
+        return agent_id in self.agents
+
+    async def cleanup_inactive_agents(self) -> int:
+        """
+        Mark agents that haven't sent heartbeat in removal_threshold seconds inactive.
+
+        Returns:
+            int: Number of agents removed
+        """
+        cutoff = datetime.utcnow().timestamp() - settings.removal_threshold
+        cutoff_iso = datetime.fromtimestamp(cutoff).isoformat()
+
+        count = 0
+        for record in self.agents.active():
+            if record.last_heartbeat < cutoff_iso:
+                inactive = AgentRecord.from_row(record.to_dict())
+                inactive.status = AGENT_STATUS_INACTIVE
+                self.agents.put(inactive)
+                count += 1
+
+        if count > 0:
+            self._changes += 1
+            logger.info(f"Cleaned up {count} inactive agents")
+        return count
+
+    # Messages
+
+    def _append(self, from_agent: str, messages: List[Dict[str, Any]]) -> List[MessageRecord]:
+        """
+        Store outgoing messages, handing out their seqs.
+
+        Args:
+            from_agent: Sender agent ID
+            messages: Dicts with message_id, content and optional to_agent /
+                thread_id / channel (a group channel)
+
+        Returns:
+            list: The stored records
+
+        Raises:
+            ValueError: If a message has both a group channel and a to_agent
+        """
+        timestamp = datetime.utcnow().isoformat()
+        # Resolved before anything is stored, so a bad message stores none
+        channels = [_message_channel(msg.get("to_agent"), msg.get("channel")) for msg in messages]
+        records = []
+        for msg, channel in zip(messages, channels):
+            self._seq += 1
+            record = MessageRecord(
+                self._seq,
+                msg["message_id"],
+                from_agent,
+                msg.get("to_agent"),
+                channel,
+                msg["content"],
+                timestamp,
+                msg.get("thread_id")
+            )
+            self._index(record)
+            if record.thread_id is not None:
+                self._count_in_thread(record)
+            records.append(record)
+
+        self._changes += 1
+        self.notifier.notify()
+        return records
+
+    def _index(self, record: MessageRecord):
+        """Append a record to the log and to each index it belongs to"""
+        self._log.append(record)
+        if record.channel == CHANNEL_DM:
+            self._dm_pairs.setdefault(_dm_pair(record.from_agent, record.to_agent), []).append(record)
+            self._inboxes.setdefault(record.from_agent, []).append(record)
+            if record.to_agent != record.from_agent:
+                self._inboxes.setdefault(record.to_agent, []).append(record)
+        else:
+            self._channels.setdefault(record.channel, []).append(record)
+        if record.thread_id is not None:
+            self._threads.setdefault(record.thread_id, []).append(record)
+
+    def _count_in_thread(self, record: MessageRecord):
+        """Add a new message to its thread's summary"""
+        summary = self._thread_summaries.get(record.thread_id)
+        if summary is None:
+            summary = ThreadSummary(0, record.timestamp, record.timestamp, record.seq, {})
+            self._thread_summaries[record.thread_id] = summary
+        summary.message_count += 1
+        summary.last_activity = record.timestamp
+        summary.last_seq = record.seq
+        summary.participants[record.from_agent] = summary.participants.get(record.from_agent, 0) + 1
+
+    async def send_message(
+        self,
+        message_id: str,
+        from_agent: str,
+        content: str,
+        to_agent: Optional[str] = None,
+        thread_id: Optional[str] = None,
+        channel: Optional[str] = None
+    ) -> bool:
+        """
+        Store a message.
+
+        Args:
+            message_id: Unique message identifier
+            from_agent: Sender agent ID
+            content: Message content
+            to_agent: Recipient agent ID (None for public)
+            thread_id: Optional thread ID
+            channel: Group channel to post to (to_agent must then be None)
+
+        Returns:
+            bool: True if message stored successfully
+        """
+        try:
+            self._append(from_agent, [{
+                "message_id": message_id,
+                "content": content,
+                "to_agent": to_agent,
+                "thread_id": thread_id,
+                "channel": channel
+            }])
+        except ValueError as e:
+            logger.error(f"Failed to send message {message_id}: {e}")
+            return False
+        logger.info(f"Message stored: {message_id} from {from_agent}")
+        return True
+
+    async def send_messages(self, from_agent: str, messages: List[Dict[str, Any]]) -> bool:
+        """
+        Store several messages from one sender atomically.
+
+        Args:
+            from_agent: Sender agent ID
+            messages: Dicts with message_id, content and optional to_agent
+                (None for public) / thread_id / channel (a group channel)
+
+        Returns:
+            bool: True if every message was stored
+        """
+        # Check every message first, so a bad one stores none of them
+        if any("message_id" not in msg or "content" not in msg for msg in messages):
+            logger.error(f"Failed to send {len(messages)} messages from {from_agent}: missing message_id or content")
+            return False
+
+        try:
+            self._append(from_agent, messages)
+        except ValueError as e:
+            logger.error(f"Failed to send {len(messages)} messages from {from_agent}: {e}")
+            return False
+        logger.info(f"Stored {len(messages)} messages from {from_agent}")
+        return True
+
+    async def get_latest_seq(self) -> int:
+        """
+        Get the sequence number of the newest message.
+
+        Returns:
+            int: Highest message seq, or 0 if there are no messages
+        """
+        return self._seq
+
+    @staticmethod
+    def _read(
+        records: List[MessageRecord],
+        after_seq: Optional[int],
+        limit: int,
+        match: Optional[Callable[[MessageRecord], bool]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Read messages from one index, oldest first.
+
+        With after_seq, returns the oldest `limit` messages after it,
+        otherwise the newest `limit`. With `match`, only matching messages
+        count.
+        """
+        if limit <= 0:
+            return []
+
+        if after_seq is None:
+            if match is None:
+                selected = records[-limit:]
+            else:
+                selected = list(islice(filter(match, reversed(records)), limit))
+                selected.reverse()
+        else:
+            start = bisect_right(records, after_seq, key=_seq_of)
+            if match is None:
+                selected = records[start:start + limit]
+            else:
+                selected = list(islice(filter(match, islice(records, start, None)), limit))
+
+        return [record.to_dict() for record in selected]
+
+    def _seq_before(self, since_timestamp: datetime) -> int:
+        """
+        Resolve a point in time to a cursor.
+
+        Returns the seq just before the first message stamped after
+        since_timestamp, so reading after it yields that message onwards.
+        """
+        index = bisect_right(self._log, since_timestamp.isoformat(), key=_timestamp_of)
+        if index == len(self._log):
+            # Nothing newer: start from the current end of the log
+            return self._seq
+        return self._log[index].seq - 1
+
+    def _select_messages(
+        self,
+        records: List[MessageRecord],
+        since_timestamp: Optional[datetime],
+        after_seq: Optional[int],
+        limit: int,
+        match: Optional[Callable[[MessageRecord], bool]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Run a cursor read or a latest-N read, returning messages oldest first.
+
+        With after_seq (a cursor) or since_timestamp, returns the oldest
+        `limit` messages after that point; otherwise the newest `limit`.
+        """
+        if after_seq is None and since_timestamp:
+            after_seq = self._seq_before(since_timestamp)
+        return self._read(records, after_seq, limit, match)
+
+    async def get_messages_after(self, after_seq: int, limit: int = 500) -> List[Dict[str, Any]]:
+        """
+        Get messages of every channel after a cursor, oldest first.
+
+        Args:
+            after_seq: Only get messages after this sequence number
+            limit: Maximum number of messages to retrieve
+
+        Returns:
+            list: List of message dictionaries
+        """
+        return self._read(self._log, after_seq, limit)
+
+    async def wait_for_messages(self, after_seq: int, timeout: float) -> bool:
+        """
+        Wait until a message newer than after_seq is stored (long-poll).
+
+        Args:
+            after_seq: Sequence number the caller has already read up to
+            timeout: Maximum seconds to wait
+
+        Returns:
+            bool: True if new messages arrived, False on timeout
+        """
+        return await self.notifier.wait(after_seq, timeout)
+
+    async def get_public_messages(
+        self,
+        since_timestamp: Optional[datetime] = None,
+        limit: int = 50,
+        after_seq: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Get public channel messages.
+
+        Args:
+            since_timestamp: Only get messages after this time
+            limit: Maximum number of messages to retrieve
+            after_seq: Only get messages after this sequence number (takes
+                precedence over since_timestamp)
+
+        Returns:
+            list: List of message dictionaries
+        """
+        return self._select_messages(self._channels[CHANNEL_PUBLIC], since_timestamp, after_seq, limit)
+
+    async def get_dm_messages(
+        self,
+        agent_id: str,
+        other_agent_id: Optional[str] = None,
+        since_timestamp: Optional[datetime] = None,
+        limit: int = 50,
+        after_seq: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Get direct messages for an agent.
+
+        Args:
+            agent_id: Agent ID to get messages for
+            other_agent_id: If specified, only get DMs with this agent
+            since_timestamp: Only get messages after this time
+            limit: Maximum number of messages to retrieve
+            after_seq: Only get messages after this sequence number (takes
+                precedence over since_timestamp)
+
+        Returns:
+            list: List of message dictionaries
+        """
+        if other_agent_id:
+            records = self._dm_pairs.get(_dm_pair(agent_id, other_agent_id), [])
+        else:
+            records = self._inboxes.get(agent_id, [])
+        return self._select_messages(records, since_timestamp, after_seq, limit)
+
+    async def get_dm_inboxes(
+        self,
+        cursors: Dict[str, Optional[int]],
+        limit: int = 50
+    ) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        Get the direct messages of several agents.
+
+        Args:
+            cursors: agent_id -> read after this sequence number (None for
+                the newest messages)
+            limit: Maximum number of messages per agent
+
+        Returns:
+            dict: agent_id -> list of message dictionaries, oldest first
+        """
+        return {
+            agent_id: self._read(self._inboxes.get(agent_id, []), after_seq, limit)
+            for agent_id, after_seq in cursors.items()
+        }
+
+    # Group channels
+
+    def _add_channel(self, name: str, created_by: str, description: Optional[str]):
+        """Create a channel's details and empty indexes"""
+        self._channel_info[name] = {
+            "name": name,
+            "description": description,
+            "created_by": created_by,
+            "created_at": datetime.utcnow().isoformat()
+        }
+        self._members.setdefault(name, set())
+        self._channels.setdefault(name, [])
+
+    def _add_member(self, name: str, agent_id: str):
+        self._members[name].add(agent_id)
+        self._agent_channels.setdefault(agent_id, set()).add(name)
+        self._changes += 1
+
+    async def create_channel(self, name: str, created_by: str, description: Optional[str] = None) -> bool:
+        """
+        Create a group channel, with its creator as the first member.
+
+        Args:
+            name: Channel name (see is_valid_channel_name)
+            created_by: Creating agent ID
+            description: Optional channel description
+
+        Returns:
+            bool: True if created, False if it already exists
+        """
+        if name in self._channel_info:
+            return False
+        self._add_channel(name, created_by, description)
+        self._add_member(name, created_by)
+        logger.info(f"Channel created: {name} by {created_by}")
+        return True
+
+    async def join_channel(self, name: str, agent_id: str, create: bool = False) -> bool:
+        """
+        Add an agent to a group channel.
+
+        Args:
+            name: Channel name
+            agent_id: Joining agent ID
+            create: Create the channel if it does not exist
+
+        Returns:
+            bool: True if the agent is a member afterwards
+        """
+        if name not in self._channel_info:
+            if not create:
+                return False
+            self._add_channel(name, agent_id, None)
+        self._add_member(name, agent_id)
+        return True
+
+    async def leave_channel(self, name: str, agent_id: str) -> bool:
+        """
+        Remove an agent from a group channel.
+
+        Returns:
+            bool: True if the agent was a member
+        """
+        members = self._members.get(name)
+        if members is None or agent_id not in members:
+            return False
+        members.discard(agent_id)
+        self._agent_channels[agent_id].discard(name)
+        self._changes += 1
+        return True
+
+    def _channel_json(self, name: str) -> Dict[str, Any]:
+        """A channel's details with member_count and message_count"""
+        return dict(
+            self._channel_info[name],
+            member_count=len(self._members[name]),
+            message_count=len(self._channels.get(name, ()))
+        )
+
+    async def get_channel(self, name: str) -> Optional[Dict[str, Any]]:
+        """
+        Get a group channel's details.
+
+        Returns:
+            dict: Channel data with member_count and message_count, or None
+                if not found
+        """
+        if name not in self._channel_info:
+            return None
+        return self._channel_json(name)
+
+    async def list_channels(self) -> List[Dict[str, Any]]:
+        """
+        List every group channel, by name.
+
+        Returns:
+            list: Channel data with member_count and message_count
+        """
+        return [self._channel_json(name) for name in sorted(self._channel_info)]
+
+    async def get_channel_members(self, name: str) -> List[str]:
+        """Get the agent IDs of a group channel's members, sorted"""
+        return sorted(self._members.get(name, ()))
+
+    async def get_agent_channels(self, agent_id: str) -> List[str]:
+        """Get the group channels an agent belongs to, sorted"""
+        return sorted(self._agent_channels.get(agent_id, ()))
+
+    async def is_channel_member(self, name: str, agent_id: str) -> bool:
+        """Check whether an agent belongs to a group channel"""
+        return agent_id in self._members.get(name, ())
+
+    async def get_channel_messages(
+        self,
+        name: str,
+        since_timestamp: Optional[datetime] = None,
+        limit: int = 50,
+        after_seq: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Get a group channel's messages.
+
+        Args:
+            name: Channel name
+            since_timestamp: Only get messages after this time
+            limit: Maximum number of messages to retrieve
+            after_seq: Only get messages after this sequence number (takes
+                precedence over since_timestamp)
+
+        Returns:
+            list: List of message dictionaries
+        """
+        return self._select_messages(self._channels.get(name, []), since_timestamp, after_seq, limit)
+
+    # Threads
+
+    async def get_thread(self, thread_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Get a thread's summary.
+
+        Counts and times cover the thread's whole history, including
+        messages since pruned.
+
+        Args:
+            thread_id: Thread identifier
+
+        Returns:
+            dict: thread_id, message_count, reply_count, last_seq, started_at,
+                last_activity and participants (sorted agent IDs), or None if
+                no message was ever posted to the thread
+        """
+        summary = self._thread_summaries.get(thread_id)
+        if summary is None:
+            return None
+        return {
+            "thread_id": thread_id,
+            "message_count": summary.message_count,
+            "reply_count": max(summary.message_count - 1, 0),
+            "last_seq": summary.last_seq,
+            "started_at": summary.started_at,
+            "last_activity": summary.last_activity,
+            "participants": sorted(summary.participants),
+        }
+
+    async def get_thread_messages(
+        self,
+        thread_id: str,
+        agent_id: Optional[str] = None,
+        since_timestamp: Optional[datetime] = None,
+        limit: int = 50,
+        after_seq: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Get a thread's messages.
+
+        Args:
+            thread_id: Thread identifier
+            agent_id: Only messages this agent can see (public posts, its own
+                messages and DMs, its group channels); None for all
+            since_timestamp: Only get messages after this time
+            limit: Maximum number of messages to retrieve
+            after_seq: Only get messages after this sequence number (takes
+                precedence over since_timestamp)
+
+        Returns:
+            list: List of message dictionaries
+        """
+        match = None
+        if agent_id:
+            channels = self._agent_channels.get(agent_id, set())
+            match = lambda record: _is_visible_to(record, agent_id, channels)  # noqa: E731
+        return self._select_messages(self._threads.get(thread_id, []), since_timestamp, after_seq, limit, match)
+
+    # Poll
+
+    async def poll(
+        self,
+        agent_id: str,
+        description: Optional[str] = None,
+        outgoing: Optional[List[Dict[str, Any]]] = None,
+        after_seq: Optional[int] = None,
+        since_timestamp: Optional[datetime] = None,
+        limit: int = 100,
+        thread_id: Optional[str] = None
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Heartbeat, send and fetch an agent's inbox.
+
+        Runs without awaiting, so the heartbeat, the outgoing messages and
+        the reads see one consistent state. Returns the same shape as
+        SQLiteManager.poll(), with the same cursor rules: a stream that
+        filled its limit stops the cursor at its last delivered message, so
+        each message is delivered exactly once.
+
+        Args:
+            agent_id: Polling agent ID
+            description: New context summary (None keeps the current one)
+            outgoing: Messages to send, as dicts with message_id, content and
+                optional to_agent / thread_id / channel (a group channel)
+            after_seq: Only get messages after this sequence number (takes
+                precedence over since_timestamp)
+            since_timestamp: Only get messages after this time
+            limit: Maximum number of public messages, of DMs and of messages
+                per group channel
+            thread_id: Read only this thread
+
+        Returns:
+            dict: messages (oldest first), cursor, public_count, dm_count,
+                group_count, channels (the agent's group channels) and agents
+                (active roster, see active_roster()), or None if the poll
+                failed
+        """
+        try:
+            now = datetime.utcnow().isoformat()
+            version = self.agents.version
+            if not self.agents.record_heartbeat(agent_id, now, description, persisted=True):
+                self.agents.put(AgentRecord(agent_id, description or "", now, now))
+            if self.agents.version != version:
+                self._changes += 1
+            if outgoing:
+                self._append(agent_id, outgoing)
+
+            head_seq = self._seq
+            member_of = self._agent_channels.get(agent_id, set())
+            channels = sorted(member_of)
+            if after_seq is None and since_timestamp:
+                after_seq = self._seq_before(since_timestamp)
+
+            streams = [
+                self._channels[CHANNEL_PUBLIC],
+                self._inboxes.get(agent_id, []),
+                *(self._channels.get(name, []) for name in channels)
+            ]
+            counts = [len(records) for records in streams]
+            totals = {
+                "public_count": counts[0],
+                "dm_count": counts[1],
+                "group_count": sum(counts[2:]),
+                "channels": channels,
+            }
+
+            if thread_id is not None:
+                messages = self._read(
+                    self._threads.get(thread_id, []),
+                    after_seq,
+                    limit,
+                    lambda record: _is_visible_to(record, agent_id, member_of)
+                )
+                # A page that is not full has delivered the whole thread up to the head
+                if len(messages) >= limit:
+                    cursor_seq = messages[-1]['seq']
+                else:
+                    cursor_seq = max(head_seq, after_seq or 0)
+                return dict(totals, messages=messages, cursor=cursor_seq, agents=self.active_roster())
+
+            if after_seq is None:
+                # No cursor: start at the head
+                return dict(totals, messages=[], cursor=head_seq, agents=self.active_roster())
+
+            pages = [self._read(records, after_seq, limit) for records in streams]
+
+            # A full stream stops the cursor at its limit-th message; a
+            # complete one has delivered everything up to head_seq
+            cursor_seq = max(head_seq, after_seq)
+            for page in pages:
+                if len(page) >= limit:
+                    cursor_seq = min(cursor_seq, page[limit - 1]['seq'])
+
+            messages = [
+                msg for msg in heapq.merge(*pages, key=itemgetter('seq'))
+                if msg['seq'] <= cursor_seq
+            ]
+            return dict(totals, messages=messages, cursor=cursor_seq, agents=self.active_roster())
+
+        except Exception as e:
+            logger.error(f"Failed to poll for {agent_id}: {e}")
+            return None
+
+    # Maintenance and statistics
+
+    async def archive_messages(self) -> int:
+        """
+        Archiving is not supported by the memory backend.
+
+        Returns:
+            int: Always 0
+        """
+        return 0
+
+    async def prune_messages(self) -> int:
+        """
+        Delete messages beyond the retention limits in settings.
+
+        Applies the maximum age, the per-channel limit and the per-DM-pair
+        limit, then drops the deleted messages from every index. Thread
+        summaries keep counting them.
+
+        Returns:
+            int: Number of messages deleted
+        """
+        # Messages are stamped in seq order, so those past the age limit
+        # are a prefix of the log, up to boundary
+        boundary = 0
+        if settings.retention_max_age_hours > 0:
+            cutoff = (datetime.utcnow() - timedelta(hours=settings.retention_max_age_hours)).isoformat()
+            end = bisect_left(self._log, cutoff, key=_timestamp_of)
+            if end:
+                boundary = self._log[end - 1].seq
+
+        doomed: Set[int] = set()
+
+        def over_limit(indexes: Iterable[List[MessageRecord]], max_rows: int):
+            """Mark the oldest messages of each index beyond max_rows, after the age limit"""
+            if max_rows <= 0:
+                return
+            for records in indexes:
+                start = bisect_right(records, boundary, key=_seq_of)
+                excess = len(records) - start - max_rows
+                if excess > 0:
+                    doomed.update(record.seq for record in records[start:start + excess])
+
+        over_limit(self._channels.values(), settings.retention_max_channel_messages)
+        over_limit(self._dm_pairs.values(), settings.retention_max_dm_per_pair)
+
+        if not boundary and not doomed:
+            return 0
+
+        def keep(records: List[MessageRecord]) -> List[MessageRecord]:
+            start = bisect_right(records, boundary, key=_seq_of)
+            return [record for record in islice(records, start, None) if record.seq not in doomed]
+
+        before = len(self._log)
+        self._log = keep(self._log)
+        for name in self._channels:
+            self._channels[name] = keep(self._channels[name])
+        for indexes in (self._dm_pairs, self._inboxes, self._threads):
+            for key in list(indexes):
+                records = keep(indexes[key])
+                if records:
+                    indexes[key] = records
+                else:
+                    del indexes[key]
+
+        deleted = before - len(self._log)
+        if deleted > 0:
+            self._changes += 1
+            logger.info(f"Pruned {deleted} messages past retention limits")
+        return deleted
+
+    async def reclaim_space(self, max_pages: Optional[int] = None) -> int:
+        """
+        Pruned messages are freed by the garbage collector; there is nothing to reclaim.
+
+        Returns:
+            int: Always 0
+        """
+        return 0
+
+    async def get_stats(self) -> Dict[str, Any]:
+        """
+        Get storage statistics.
+
+        Returns:
+            dict: Statistics including agent counts, message counts, etc.
+        """
+        return {
+            "active_agents": len(self.agents.active()),
+            "public_messages": len(self._channels[CHANNEL_PUBLIC]),
+            "dm_channels": len(self._dm_pairs),
+            "database_connected": True
+        }
+
+    async def get_public_message_count(self) -> int:
+        """
+        Get total count of public messages.
+
+        Returns:
+            int: Number of public messages
+        """
+        return len(self._channels[CHANNEL_PUBLIC])
+
+    async def get_dm_message_count(self, agent_id: str) -> int:
+        """
+        Get total count of DMs for an agent (sent or received).
+
+        Args:
+            agent_id: Agent ID
+
+        Returns:
+            int: Number of DM messages
+        """
+        return len(self._inboxes.get(agent_id, ()))
+
+    async def get_dm_pair_message_count(self, agent_id: str, other_agent_id: str) -> int:
+        """
+        Get total count of DMs exchanged between two agents.
+
+        Args:
+            agent_id: Agent ID
+            other_agent_id: Other agent ID
+
+        Returns:
+            int: Number of DM messages in either direction
+        """
+        return len(self._dm_pairs.get(_dm_pair(agent_id, other_agent_id), ()))
+
+    # Snapshots
+
+    def _snapshot_state(self) -> Dict[str, Any]:
+        """The whole state as JSON-ready data, copied so later changes do not touch it"""
+        return {
+            "version": SNAPSHOT_VERSION,
+            "seq": self._seq,
+            "messages": [[getattr(record, field) for field in MESSAGE_FIELDS] for record in self._log],
+            "agents": [[getattr(record, field) for field in AGENT_FIELDS] for record in self.agents.records()],
+            "channels": [dict(info) for info in self._channel_info.values()],
+            "members": {name: sorted(members) for name, members in self._members.items()},
+            "threads": {
+                thread_id: [s.message_count, s.started_at, s.last_activity, s.last_seq, dict(s.participants)]
+                for thread_id, s in self._thread_summaries.items()
+            },
+        }
+
+    def _write_snapshot(self, state: Dict[str, Any]):
+        """Replace the snapshot file atomically (blocking)"""
+        path = Path(self.snapshot_path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(path.suffix + ".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(state, f, ensure_ascii=False, separators=(",", ":"))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+
+    def _read_snapshot(self) -> Dict[str, Any]:
+        """Read the snapshot file (blocking)"""
+        with open(self.snapshot_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def _restore(self, state: Dict[str, Any]):
+        """Rebuild every index from snapshot data"""
+        if state.get("version") != SNAPSHOT_VERSION:
+            raise ValueError(f"Unsupported memory snapshot version: {state.get('version')}")
+
+        for row in state["messages"]:
+            self._index(MessageRecord(*row))
+        self._seq = max(state["seq"], self._seq)
+        for row in state["agents"]:
+            self.agents.put(AgentRecord(*row))
+        for info in state["channels"]:
+            self._channel_info[info["name"]] = info
+            self._channels.setdefault(info["name"], [])
+        for name, members in state["members"].items():
+            self._members[name] = set(members)
+            for agent_id in members:
+                self._agent_channels.setdefault(agent_id, set()).add(name)
+        for thread_id, row in state["threads"].items():
+            self._thread_summaries[thread_id] = ThreadSummary(*row)
+
+    async def snapshot(self) -> bool:
+        """
+        Write the current state to the snapshot file, if it changed.
+
+        The state is copied on the event loop (so it is consistent) and
+        written from a thread, replacing the previous snapshot atomically.
+
+        Returns:
+            bool: True if the file is up to date
+        """
+        if not self.snapshot_path:
+            return False
+        async with self._snapshot_lock:
+            changes = self._changes
+            if changes == self._snapshot_changes:
+                return True
+            try:
+                await asyncio.to_thread(self._write_snapshot, self._snapshot_state())
+                self._snapshot_changes = changes
+                logger.debug(f"Memory snapshot written: {len(self._log)} messages")
+                return True
+
+            except Exception as e:
+                logger.error(f"Failed to write memory snapshot to {self.snapshot_path}: {e}")
+                return False
+
+    async def _snapshot_loop(self):
+        """Snapshot every memory_snapshot_interval_seconds"""
+        while True:
+            await asyncio.sleep(settings.memory_snapshot_interval_seconds)
+            await self.snapshot()
+
+    async def close(self):
+        """Stop snapshotting (writing a final snapshot) and long-poll waiters"""
+        try:
+            if self._snapshot_task is not None and not self._snapshot_task.done():
+                self._snapshot_task.cancel()
+                try:
+                    await self._snapshot_task
+                except asyncio.CancelledError:
+                    pass
+            self._snapshot_task = None
+            await self.snapshot()
+            await self.notifier.close()
+            logger.info("Memory storage closed")
+        except Exception as e:
+            logger.error(f"Error closing memory storage: {e}")
+
+
+# Global memory manager instance
+memory_manager: Optional[MemoryManager] = None
+
+
+async def get_memory_manager() -> MemoryManager:
+    """Get or create global memory manager instance"""
+    global memory_manager
+    if memory_manager is None:
+        memory_manager = MemoryManager()
+        await memory_manager.initialize()
+    return memory_manager
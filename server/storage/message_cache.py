@@ -0,0 +1,257 @@
+"""Bounded in-memory cache of the newest messages, for cursor reads"""
+from collections import deque
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from shared.constants import CHANNEL_DM, CHANNEL_PUBLIC
+
+
+class _Ring:
+    """
+    The newest messages of one view (all, public, or one agent's DMs).
+
+    Holds every message of the view after ``floor``; appending to a full
+    ring evicts the oldest message and moves the floor up to it.
+    """
+
+    __slots__ = ("messages", "floor")
+
+    def __init__(self, size: int, floor: int):
+        self.messages: deque = deque(maxlen=size)
+        self.floor = floor
+
+    def append(self, msg: Dict[str, Any]):
+        if len(self.messages) == self.messages.maxlen:
+            self.floor = self.messages[0]['seq']
+        self.messages.append(msg)
+
+    def after(self, after_seq: int, limit: int) -> Optional[List[Dict[str, Any]]]:
+        """Oldest `limit` messages after a cursor, or None if it is below the floor"""
+        if after_seq < self.floor:
+            return None
+        # Live cursors sit near the head, so walk back from the newest
+        newer = []
+        for msg in reversed(self.messages):
+            if msg['seq'] <= after_seq:
+                break
+            newer.append(msg)
+        newer.reverse()
+        return newer[:limit]
+
+
+class RecentMessageCache:
+    """
+    The latest messages of the log, plus public, per-agent DM and
+    per-group-channel tails.
+
+    Messages are added in seq order as they are committed. A view answers
+    a cursor read only if it holds every matching message after the
+    cursor; otherwise it returns None and the caller reads the database.
+    Returned messages are copies, so callers may modify them.
+
+    ``add`` only accepts the message right after the current head. Anything
+    else means another writer got in between, so the cache marks itself
+    stale and the owner catches up with ``extend`` before the next read.
+    """
+
+    def __init__(self, size: int, dm_size: int):
+        """
+        Initialize an empty cache.
+
+        Args:
+            size: Messages kept for the whole log and for the public channel
+            dm_size: DMs kept per agent (sent and received), and messages
+                kept per group channel
+        """
+        self.size = size
+        self.dm_size = dm_size
+        self.head = 0
+        self.stale = True
+        self.hits = 0
+        self.misses = 0
+        self._floor = 0
+        self._all = _Ring(size, 0)
+        self._public = _Ring(size, 0)
+        self._dms: Dict[str, _Ring] = {}
+        self._groups: Dict[str, _Ring] = {}
+
+    def __len__(self) -> int:
+        return len(self._all.messages)
+
+    @property
+    def floor(self) -> int:
+        """Cursor below which the cache cannot answer reads of the whole log"""
+        return self._all.floor
+
+    def reset(self, floor: int, rows: Iterable[Dict[str, Any]] = ()):
+        """
+        Replace the contents with the log after floor.
+
+        Args:
+            floor: Seq up to which no messages are held
+            rows: Every message after floor, oldest first
+        """
+        self.head = floor
+        self._floor = floor
+        self._all = _Ring(self.size, floor)
+        self._public = _Ring(self.size, floor)
+        self._dms = {}
+        self._groups = {}
+        self.extend(rows)
+
+    def add(self, msg: Dict[str, Any]) -> bool:
+        """
+        Add a just-committed message.
+
+        Returns:
+            bool: False if the message does not follow the head (the cache
+                is then stale until extended)
+        """
+        if msg['seq'] <= self.head:
+            return True
+        if msg['seq'] != self.head + 1:
+            self.stale = True
+            return False
+        self._append(msg)
+        return True
+
+    def extend(self, rows: Iterable[Dict[str, Any]]):
+        """Append messages read from the database, skipping those already held"""
+        for msg in rows:
+            if msg['seq'] > self.head:
+                self._append(msg)
+
+    def _append(self, msg: Dict[str, Any]):
+        self.head = msg['seq']
+        self._all.append(msg)
+        if msg['channel'] == CHANNEL_PUBLIC:
+            self._public.append(msg)
+        elif msg['channel'] == CHANNEL_DM:
+            self._dm_ring(msg['from_agent']).append(msg)
+            if msg['to_agent'] and msg['to_agent'] != msg['from_agent']:
+                self._dm_ring(msg['to_agent']).append(msg)
+        else:
+            self._ring(self._groups, msg['channel']).append(msg)
+
+    def _dm_ring(self, agent_id: str) -> _Ring:
+        return self._ring(self._dms, agent_id)
+
+    def _ring(self, rings: Dict[str, _Ring], key: str) -> _Ring:
+        ring = rings.get(key)
+        if ring is None:
+            # Nothing for this key arrived since the cache was filled
+            ring = rings[key] = _Ring(self.dm_size, self._floor)
+        return ring
+
+    def _lookup(self, ring: Optional[_Ring], after_seq: int, limit: int) -> Optional[List[Dict[str, Any]]]:
+        """Read a view, counting the hit or miss"""
+        if ring is None:
+            if after_seq < self._floor:
+                self.misses += 1
+                return None
+            self.hits += 1
+            return []
+
+        messages = ring.after(after_seq, limit)
+        if messages is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return [dict(msg) for msg in messages]
+
+    def messages_after(self, after_seq: int, limit: int) -> Optional[List[Dict[str, Any]]]:
+        """Messages of every channel after a cursor, or None on a miss"""
+        return self._lookup(self._all, after_seq, limit)
+
+    def public_after(self, after_seq: int, limit: int) -> Optional[List[Dict[str, Any]]]:
+        """Public messages after a cursor, or None on a miss"""
+        return self._lookup(self._public, after_seq, limit)
+
+    def channel_after(self, channel: str, after_seq: int, limit: int) -> Optional[List[Dict[str, Any]]]:
+        """Messages of a group channel after a cursor, or None on a miss"""
+        return self._lookup(self._groups.get(channel), after_seq, limit)
+
+    def dms_after(
+        self,
+        agent_id: str,
+        after_seq: int,
+        limit: int,
+        other_agent_id: Optional[str] = None
+    ) -> Optional[List[Dict[str, Any]]]:
+        """
+        DMs sent or received by an agent after a cursor, or None on a miss.
+
+        Args:
+            agent_id: Agent whose DMs to read
+            after_seq: Only messages after this sequence number
+            limit: Maximum number of messages
+            other_agent_id: Only DMs exchanged with this agent
+        """
+        ring = self._dms.get(agent_id)
+        if other_agent_id is None or ring is None:
+            return self._lookup(ring, after_seq, limit)
+
+        messages = ring.after(after_seq, len(ring.messages))
+        if messages is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        pair = {agent_id, other_agent_id}
+        return [
+            dict(msg) for msg in messages
+            if {msg['from_agent'], msg['to_agent']} == pair
+        ][:limit]
+
+    def inbox_after(
+        self,
+        agent_id: str,
+        after_seq: Optional[int],
+        limit: int,
+        channels: Iterable[str] = ()
+    ) -> Optional[Tuple[int, int, List[Dict[str, Any]], List[Dict[str, Any]], List[List[Dict[str, Any]]]]]:
+        """
+        What a poll delivers: public messages, the agent's DMs and its group
+        channels' messages after a cursor.
+
+        Args:
+            agent_id: Polling agent
+            after_seq: Cursor (None starts at the head)
+            limit: Maximum number of public messages, of DMs and of
+                messages per group channel
+            channels: Group channels the agent belongs to
+
+        Returns:
+            tuple: (head_seq, after_seq, public, dms, one list per channel),
+                or None on a miss
+        """
+        head = self.head
+        if after_seq is None:
+            after_seq = head
+        public = self.public_after(after_seq, limit)
+        if public is None:
+            return None
+        dms = self.dms_after(agent_id, after_seq, limit)
+        if dms is None:
+            return None
+        groups = []
+        for channel in channels:
+            messages = self.channel_after(channel, after_seq, limit)
+            if messages is None:
+                return None
+            groups.append(messages)
+        return head, after_seq, public, dms, groups
+
+    def stats(self) -> Dict[str, Any]:
+        """Cache size, head and hit/miss counters"""
+        lookups = self.hits + self.misses
+        return {
+            "messages": len(self._all.messages),
+            "capacity": self.size,
+            "dm_capacity": self.dm_size,
+            "agents": len(self._dms),
+            "channels": len(self._groups),
+            "head_seq": self.head,
+            "floor_seq": self._all.floor,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
@@ -0,0 +1,369 @@
+"""Versioned schema migrations for the HIVE SQLite database"""
+import logging
+from typing import Awaitable, Callable, List, NamedTuple
+
+import aiosqlite
+
+logger = logging.getLogger(__name__)
+
+MESSAGES_COLUMNS_DDL = """
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    message_id TEXT NOT NULL UNIQUE,
+    from_agent TEXT NOT NULL,
+    to_agent TEXT,
+    channel TEXT NOT NULL,
+    content TEXT NOT NULL,
+    timestamp TEXT NOT NULL,
+    thread_id TEXT,
+    FOREIGN KEY (from_agent) REFERENCES agents(agent_id)
+"""
+
+
+class Migration(NamedTuple):
+    """A numbered schema change, applied once in its own transaction"""
+    version: int
+    description: str
+    apply: Callable[[aiosqlite.Connection], Awaitable[None]]
+
+
+async def _column_names(conn: aiosqlite.Connection, table: str) -> List[str]:
+    """List the column names of a table"""
+    async with conn.execute(f"PRAGMA table_info({table})") as cursor:
+        return [row[1] for row in await cursor.fetchall()]
+
+
+async def _base_schema(conn: aiosqlite.Connection):
+    """
+    Create the agents and messages tables.
+
+    Databases created before schema versioning may already hold these
+    tables; a messages table without seq is rebuilt with rows numbered in
+    timestamp order. Its old indexes are dropped along with it.
+    """
+    await conn.execute("""
+        CREATE TABLE IF NOT EXISTS agents (
+            agent_id TEXT PRIMARY KEY,
+            context_summary TEXT,
+            registered_at TEXT NOT NULL,
+            last_heartbeat TEXT NOT NULL,
+            status TEXT DEFAULT 'active',
+            endpoint TEXT
+        )
+    """)
+
+    # seq is a monotonically increasing cursor: AUTOINCREMENT guarantees it
+    # is never reused, even after deletes
+    await conn.execute(f"CREATE TABLE IF NOT EXISTS messages ({MESSAGES_COLUMNS_DDL})")
+
+    if "seq" not in await _column_names(conn, "messages"):
+        logger.info("Rebuilding messages table with sequence numbers")
+        await conn.execute("ALTER TABLE messages RENAME TO messages_pre_seq")
+        await conn.execute(f"CREATE TABLE messages ({MESSAGES_COLUMNS_DDL})")
+        await conn.execute("""
+            INSERT INTO messages
+            (message_id, from_agent, to_agent, channel, content, timestamp, thread_id)
+            SELECT message_id, from_agent, to_agent, channel, content, timestamp, thread_id
+            FROM messages_pre_seq
+            ORDER BY timestamp ASC, rowid ASC
+        """)
+        await conn.execute("DROP TABLE messages_pre_seq")
+
+
+async def _composite_indexes(conn: aiosqlite.Connection):
+    """
+    Replace single-column indexes with composite ones matching the hot queries.
+
+    - (channel, seq): channel cursor seeks and latest-N reads
+    - (to_agent, seq): DMs received, cursor order
+    - (from_agent, channel, seq): DMs sent, cursor order, skipping public posts
+    - (timestamp): resolving lookback times to a seq
+    - agents (status, last_heartbeat): roster and inactive-agent cleanup
+    """
+    for index in (
+        "idx_messages_channel",
+        "idx_messages_from",
+        "idx_messages_to",
+        "idx_messages_timestamp",
+        "idx_agents_heartbeat",
+        "idx_agents_status",
+    ):
+        await conn.execute(f"DROP INDEX IF EXISTS {index}")
+
+    await conn.execute("CREATE INDEX IF NOT EXISTS idx_messages_channel_seq ON messages(channel, seq)")
+    await conn.execute("CREATE INDEX IF NOT EXISTS idx_messages_to_seq ON messages(to_agent, seq)")
+    await conn.execute("CREATE INDEX IF NOT EXISTS idx_messages_from_seq ON messages(from_agent, channel, seq)")
+    await conn.execute("CREATE INDEX IF NOT EXISTS idx_messages_timestamp ON messages(timestamp)")
+    await conn.execute("CREATE INDEX IF NOT EXISTS idx_agents_status_heartbeat ON agents(status, last_heartbeat)")
+
+
+# Counter scopes in message_counters
+COUNTER_CHANNEL = "channel"      # key: channel name
+COUNTER_AGENT_DM = "agent_dm"    # key: agent ID (DMs sent or received)
+COUNTER_DM_PAIR = "dm_pair"      # key: create_dm_channel_key(a, b)
+COUNTER_TOTAL = "total"          # key: DM_CHANNELS_KEY
+DM_CHANNELS_KEY = "dm_channels"
+
+# SQL expression for the DM pair key of a new/old row; matches
+# create_dm_channel_key, as UTF-8 byte order follows code point order
+_PAIR_KEY = "MIN({row}.from_agent, {row}.to_agent) || ':' || MAX({row}.from_agent, {row}.to_agent)"
+
+
+async def _message_counters(conn: aiosqlite.Connection):
+    """
+    Maintain message counts in a side table instead of counting rows.
+
+    Triggers on messages keep per-channel, per-agent DM and per-DM-pair
+    counts, plus the number of DM pairs that have any messages, so every
+    count is a primary-key lookup. Existing messages are counted once here.
+    """
+    await conn.execute("""
+        CREATE TABLE IF NOT EXISTS message_counters (
+            scope TEXT NOT NULL,
+            key TEXT NOT NULL,
+            count INTEGER NOT NULL,
+            PRIMARY KEY (scope, key)
+        ) WITHOUT ROWID
+    """)
+
+    new_pair = _PAIR_KEY.format(row="NEW")
+    old_pair = _PAIR_KEY.format(row="OLD")
+
+    # A DM to oneself counts once for that agent
+    await conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_messages_count_insert AFTER INSERT ON messages
+        BEGIN
+            INSERT INTO message_counters (scope, key, count) VALUES ('{COUNTER_CHANNEL}', NEW.channel, 1)
+                ON CONFLICT (scope, key) DO UPDATE SET count = count + 1;
+            INSERT INTO message_counters (scope, key, count)
+                SELECT '{COUNTER_AGENT_DM}', NEW.to_agent, 1 WHERE NEW.to_agent IS NOT NULL
+                ON CONFLICT (scope, key) DO UPDATE SET count = count + 1;
+            INSERT INTO message_counters (scope, key, count)
+                SELECT '{COUNTER_AGENT_DM}', NEW.from_agent, 1
+                WHERE NEW.to_agent IS NOT NULL AND NEW.from_agent != NEW.to_agent
+                ON CONFLICT (scope, key) DO UPDATE SET count = count + 1;
+            INSERT INTO message_counters (scope, key, count)
+                SELECT '{COUNTER_DM_PAIR}', {new_pair}, 1 WHERE NEW.to_agent IS NOT NULL
+                ON CONFLICT (scope, key) DO UPDATE SET count = count + 1;
+            UPDATE message_counters SET count = count + 1
+                WHERE scope = '{COUNTER_TOTAL}' AND key = '{DM_CHANNELS_KEY}'
+                AND NEW.to_agent IS NOT NULL
+                AND (SELECT count FROM message_counters
+                     WHERE scope = '{COUNTER_DM_PAIR}' AND key = {new_pair}) = 1;
+        END
+    """)
+
+    await conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_messages_count_delete AFTER DELETE ON messages
+        BEGIN
+            UPDATE message_counters SET count = count - 1
+                WHERE scope = '{COUNTER_CHANNEL}' AND key = OLD.channel;
+            UPDATE message_counters SET count = count - 1
+                WHERE scope = '{COUNTER_AGENT_DM}' AND OLD.to_agent IS NOT NULL
+                AND (key = OLD.to_agent OR key = OLD.from_agent);
+            UPDATE message_counters SET count = count - 1
+                WHERE scope = '{COUNTER_DM_PAIR}' AND OLD.to_agent IS NOT NULL AND key = {old_pair};
+            UPDATE message_counters SET count = count - 1
+                WHERE scope = '{COUNTER_TOTAL}' AND key = '{DM_CHANNELS_KEY}'
+                AND OLD.to_agent IS NOT NULL
+                AND (SELECT count FROM message_counters
+                     WHERE scope = '{COUNTER_DM_PAIR}' AND key = {old_pair}) = 0;
+            DELETE FROM message_counters
+                WHERE scope IN ('{COUNTER_AGENT_DM}', '{COUNTER_DM_PAIR}') AND count = 0
+                AND key IN (OLD.to_agent, OLD.from_agent, {old_pair});
+        END
+    """)
+
+    # Backfill from existing messages
+    await conn.execute("DELETE FROM message_counters")
+    await conn.execute(f"""
+        INSERT INTO message_counters (scope, key, count)
+        SELECT '{COUNTER_CHANNEL}', channel, COUNT(*) FROM messages GROUP BY channel
+    """)
+    await conn.execute(f"""
+        INSERT INTO message_counters (scope, key, count)
+        SELECT '{COUNTER_AGENT_DM}', agent_id, COUNT(*) FROM (
+            SELECT to_agent AS agent_id FROM messages WHERE to_agent IS NOT NULL
+            UNION ALL
+            SELECT from_agent FROM messages WHERE to_agent IS NOT NULL AND from_agent != to_agent
+        )
+        GROUP BY agent_id
+    """)
+    await conn.execute(f"""
+        INSERT INTO message_counters (scope, key, count)
+        SELECT '{COUNTER_DM_PAIR}', {_PAIR_KEY.format(row="messages")}, COUNT(*)
+        FROM messages WHERE to_agent IS NOT NULL
+        GROUP BY 2
+    """)
+    await conn.execute(f"""
+        INSERT INTO message_counters (scope, key, count)
+        SELECT '{COUNTER_TOTAL}', '{DM_CHANNELS_KEY}', COUNT(*)
+        FROM message_counters WHERE scope = '{COUNTER_DM_PAIR}'
+    """)
+
+
+async def _group_channels(conn: aiosqlite.Connection):
+    """
+    Add named group channels and their membership.
+
+    A group message is stored once, with the channel's name in
+    messages.channel, and reaches members on read: a poll looks up the
+    agent's channels through idx_channel_members_agent and seeks each one
+    on idx_messages_channel_seq.
+    """
+    await conn.execute("""
+        CREATE TABLE IF NOT EXISTS channels (
+            name TEXT PRIMARY KEY,
+            description TEXT,
+            created_by TEXT NOT NULL,
+            created_at TEXT NOT NULL
+        )
+    """)
+    await conn.execute("""
+        CREATE TABLE IF NOT EXISTS channel_members (
+            channel TEXT NOT NULL REFERENCES channels(name),
+            agent_id TEXT NOT NULL,
+            joined_at TEXT NOT NULL,
+            PRIMARY KEY (channel, agent_id)
+        ) WITHOUT ROWID
+    """)
+    await conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_channel_members_agent ON channel_members(agent_id, channel)"
+    )
+
+
+async def _threads(conn: aiosqlite.Connection):
+    """
+    Index threads and keep a summary per thread.
+
+    (thread_id, seq) serves thread cursor reads; it is partial, as most
+    messages have no thread. Triggers on messages keep each thread's
+    message count, newest seq and time of first and newest message in
+    threads, and each participant's message count in thread_participants.
+    Existing threaded messages are summarized once here.
+    """
+    await conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_messages_thread_seq ON messages(thread_id, seq) "
+        "WHERE thread_id IS NOT NULL"
+    )
+    await conn.execute("""
+        CREATE TABLE IF NOT EXISTS threads (
+            thread_id TEXT PRIMARY KEY,
+            message_count INTEGER NOT NULL,
+            last_seq INTEGER NOT NULL,
+            started_at TEXT NOT NULL,
+            last_activity TEXT NOT NULL
+        ) WITHOUT ROWID
+    """)
+    await conn.execute("""
+        CREATE TABLE IF NOT EXISTS thread_participants (
+            thread_id TEXT NOT NULL,
+            agent_id TEXT NOT NULL,
+            message_count INTEGER NOT NULL,
+            PRIMARY KEY (thread_id, agent_id)
+        ) WITHOUT ROWID
+    """)
+
+    # Deletes (retention, archiving) only lower the counts: started_at and
+    # last_activity keep describing the thread's whole history
+    await conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS trg_messages_thread_insert AFTER INSERT ON messages
+        WHEN NEW.thread_id IS NOT NULL
+        BEGIN
+            INSERT INTO threads (thread_id, message_count, last_seq, started_at, last_activity)
+                VALUES (NEW.thread_id, 1, NEW.seq, NEW.timestamp, NEW.timestamp)
+                ON CONFLICT (thread_id) DO UPDATE SET
+                    message_count = message_count + 1,
+                    last_seq = excluded.last_seq,
+                    last_activity = excluded.last_activity;
+            INSERT INTO thread_participants (thread_id, agent_id, message_count)
+                VALUES (NEW.thread_id, NEW.from_agent, 1)
+                ON CONFLICT (thread_id, agent_id) DO UPDATE SET message_count = message_count + 1;
+        END
+    """)
+    await conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS trg_messages_thread_delete AFTER DELETE ON messages
+        WHEN OLD.thread_id IS NOT NULL
+        BEGIN
+            UPDATE threads SET message_count = message_count - 1
+                WHERE thread_id = OLD.thread_id;
+            DELETE FROM threads
+                WHERE thread_id = OLD.thread_id AND message_count <= 0;
+            UPDATE thread_participants SET message_count = message_count - 1
+                WHERE thread_id = OLD.thread_id AND agent_id = OLD.from_agent;
+            DELETE FROM thread_participants
+                WHERE thread_id = OLD.thread_id AND agent_id = OLD.from_agent AND message_count <= 0;
+        END
+    """)
+
+    # Backfill from existing messages
+    await conn.execute("DELETE FROM threads")
+    await conn.execute("DELETE FROM thread_participants")
+    await conn.execute("""
+        INSERT INTO threads (thread_id, message_count, last_seq, started_at, last_activity)
+        SELECT thread_id, COUNT(*), MAX(seq), MIN(timestamp), MAX(timestamp)
+        FROM messages WHERE thread_id IS NOT NULL
+        GROUP BY thread_id
+    """)
+    await conn.execute("""
+        INSERT INTO thread_participants (thread_id, agent_id, message_count)
+        SELECT thread_id, from_agent, COUNT(*)
+        FROM messages WHERE thread_id IS NOT NULL
+        GROUP BY thread_id, from_agent
+    """)
+
+
+# Append new migrations at the end; never renumber or edit applied ones
+MIGRATIONS: List[Migration] = [
+    Migration(1, "base agents and messages schema", _base_schema),
+    Migration(2, "composite cursor indexes", _composite_indexes),
+    Migration(3, "trigger-maintained message counters", _message_counters),
+    Migration(4, "group channels and membership", _group_channels),
+    Migration(5, "thread index and summaries", _threads),
+]
+
+SCHEMA_VERSION = MIGRATIONS[-1].version
+
+
+async def get_schema_version(conn: aiosqlite.Connection) -> int:
+    """Read the schema version stored in the database header"""
+    async with conn.execute("PRAGMA user_version") as cursor:
+        row = await cursor.fetchone()
+    return row[0]
+
+
+async def apply_migrations(conn: aiosqlite.Connection) -> int:
+    """
+    Apply all pending migrations.
+
+    Each migration runs in its own transaction together with the
+    user_version bump, so a failed migration leaves the database at the
+    previous version.
+
+    Args:
+        conn: Writer connection
+
+    Returns:
+        int: Schema version after migrating
+    """
+    version = await get_schema_version(conn)
+    if version > SCHEMA_VERSION:
+        raise RuntimeError(
+            f"Database schema version {version} is newer than this server supports ({SCHEMA_VERSION})"
+        )
+
+    for migration in MIGRATIONS:
+        if migration.version <= version:
+            continue
+
+        logger.info(f"Applying schema migration {migration.version}: {migration.description}")
+        await conn.execute("BEGIN")
+        try:
+            await migration.apply(conn)
+            await conn.execute(f"PRAGMA user_version = {migration.version}")
+            await conn.commit()
+        except BaseException:
+            await conn.rollback()
+            raise
+        version = migration.version
+
+    return version
@@ -0,0 +1,97 @@
+"""In-process notification of newly committed messages"""
+import asyncio
+import logging
+from typing import Awaitable, Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class MessageNotifier:
+    """
+    Wakes long-poll waiters when the message log advances.
+
+    Waiters park on an asyncio.Condition until the head seq passes their
+    cursor. The head is refreshed by a single watcher task, which runs only
+    while someone is waiting: immediately when this process commits a message
+    (notify()), and every ``check_interval`` seconds to pick up messages
+    written by other processes sharing the database. Idle load is therefore
+    one cheap head query per interval, however many requests are parked.
+    """
+
+    def __init__(self, get_head_seq: Callable[[], Awaitable[int]], check_interval: float = 1.0):
+        """
+        Initialize message notifier.
+
+        Args:
+            get_head_seq: Coroutine returning the newest committed seq
+            check_interval: Seconds between head checks while requests wait
+        """
+        self._get_head_seq = get_head_seq
+        self.check_interval = max(check_interval, 0.01)
+        self._condition = asyncio.Condition()
+        self._poke = asyncio.Event()
+        self._head_seq = 0
+        self._waiters = 0
+        self._task: Optional[asyncio.Task] = None
+
+    def notify(self):
+        """Signal that this process committed new messages"""
+        self._poke.set()
+
+    async def wait(self, after_seq: int, timeout: float) -> bool:
+        """
+        Wait until a message newer than after_seq is committed.
+
+        Args:
+            after_seq: Cursor the caller has already read up to
+            timeout: Maximum seconds to wait
+
+        Returns:
+            bool: True if new messages arrived, False on timeout
+        """
+        self._waiters += 1
+        self._ensure_watching()
+        try:
+            async with self._condition:
+                await asyncio.wait_for(
+                    self._condition.wait_for(lambda: self._head_seq > after_seq),
+                    timeout=timeout
+                )
+            return True
+        except asyncio.TimeoutError:
+            return False
+        finally:
+            self._waiters -= 1
+
+    def _ensure_watching(self):
+        """Start the watcher task if it is not running"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._watch())
+
+    async def _watch(self):
+        """Refresh the head seq while anyone waits, waking waiters when it advances"""
+        while self._waiters > 0:
+            try:
+                head_seq = await self._get_head_seq()
+                if head_seq > self._head_seq:
+                    self._head_seq = head_seq
+                    async with self._condition:
+                        self._condition.notify_all()
+            except Exception as e:
+                logger.error(f"Failed to refresh message head: {e}")
+
+            try:
+                await asyncio.wait_for(self._poke.wait(), timeout=self.check_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._poke.clear()
+
+    async def close(self):
+        """Stop the watcher task"""
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self._task = None
@@ -1,49 +1,354 @@
 """Redis storage manager for HIVE"""
+import heapq
 import json
 import logging
-from datetime import datetime
-from typing import Optional, List, Dict, Any
-from redis import ConnectionPool, Redis
-from redis.exceptions import RedisError
+import time
+from datetime import datetime, timedelta
+from operator import itemgetter
+from typing import Optional, List, Dict, Any, Callable, Iterable, Set, Tuple
+
+from redis.asyncio import Redis
+from redis.asyncio.client import Pipeline
+from redis.exceptions import NoScriptError
 
 from server.config import settings
 from shared.constants import (
-    REDIS_AGENTS_ACTIVE,
-    REDIS_AGENT_PREFIX,
-    REDIS_MESSAGES_PUBLIC,
-    REDIS_MESSAGES_DM_PREFIX,
-    REDIS_MESSAGE_INDEX_PREFIX,
-    REDIS_NAMES_RESERVED_PREFIX,
-    MESSAGE_INDEX_TTL,
-    NAME_RESERVATION_TTL,
     AGENT_STATUS_ACTIVE,
+    AGENT_STATUS_INACTIVE,
     CHANNEL_PUBLIC,
-    CHANNEL_DM
+    CHANNEL_DM,
+    REDIS_SEQ,
+    REDIS_MESSAGES_LOG,
+    REDIS_MESSAGES_TIMELINE,
+    REDIS_MESSAGES_PUBLIC,
+    REDIS_MESSAGES_DM_PREFIX,
+    REDIS_MESSAGES_DM_PAIRS,
+    REDIS_INBOX_PREFIX,
+    REDIS_AGENT_DM_PAIRS_PREFIX,
+    REDIS_SCHEMA_VERSION,
+    REDIS_MESSAGES_CHANNEL_PREFIX,
+    REDIS_MESSAGE_INDEXES,
+    REDIS_AGENT_FIELD_PREFIX,
+    REDIS_AGENTS_ACTIVE,
+    REDIS_CHANNELS,
+    REDIS_CHANNEL_MEMBERS_PREFIX,
+    REDIS_AGENT_CHANNELS_PREFIX,
+    REDIS_THREAD_PREFIX
 )
 from server.models.message import create_dm_channel_key
+from server.storage.agent_registry import AGENT_FIELDS
+from server.storage.backend import StorageBackend
+from server.storage.notifier import MessageNotifier
+from server.storage.sqlite_manager import ROSTER_CACHE_SECONDS, _is_visible_to, _message_channel
 
 logger = logging.getLogger(__name__)
 
+# Version of the key layout; initialize() upgrades older data
+SCHEMA_VERSION = 1
+
+# Agent fields, each kept in its own agent_id -> value hash
+AGENT_HASH_FIELDS = AGENT_FIELDS[1:]
+
+# Server-side scripts for writes that must be atomic and conditional. Kept at
+# module level next to each other, like the SQL of SQLiteManager.
+
+# Append messages. A seq is handed out and the message added to the log, the
+# timeline and its channel / DM pair / thread index in one atomic step, so a
+# reader that sees seq N also sees every message before it. A DM also goes
+# to the sender's and recipient's inboxes, and its pair key to their sets of
+# DM pairs; DMs trimmed from a pair leave both inboxes too.
+# KEYS: seq, log, timeline, indexes, DM pairs, then per message its index
+#   key, its thread's messages, summary and participants keys, and the
+#   sender's and recipient's inboxes and DM pair sets
+# ARGV: log_max, index_max for threads, then per message its JSON body
+#   without seq, time score, index_max, from_agent, timestamp, in_thread
+#   and is_dm
+LUA_APPEND_MESSAGES = """
+local log_max = tonumber(ARGV[1])
+local thread_max = tonumber(ARGV[2])
+local seqs = {}
+for i = 0, (#KEYS - 5) / 8 - 1 do
+    local k = 6 + i * 8
+    local a = 3 + i * 7
+    local is_dm = ARGV[a + 6] == '1'
+    local seq = redis.call('INCR', KEYS[1])
+    local member = '{"seq": ' .. seq .. ', ' .. string.sub(ARGV[a], 2)
+    redis.call('ZADD', KEYS[2], seq, member)
+    redis.call('ZADD', KEYS[3], ARGV[a + 1], seq)
+    redis.call('ZADD', KEYS[k], seq, member)
+    redis.call('SADD', KEYS[4], KEYS[k])
+    if is_dm then
+        redis.call('ZADD', KEYS[k + 4], seq, member)
+        redis.call('ZADD', KEYS[k + 5], seq, member)
+        redis.call('SADD', KEYS[4], KEYS[k + 4], KEYS[k + 5])
+        redis.call('SADD', KEYS[k + 6], KEYS[k])
+        redis.call('SADD', KEYS[k + 7], KEYS[k])
+        redis.call('SADD', KEYS[5], KEYS[k])
+    end
+    local index_max = tonumber(ARGV[a + 2])
+    if index_max > 0 then
+        local dropped = redis.call('ZRANGE', KEYS[k], 0, -index_max - 1)
+        if #dropped > 0 then
+            redis.call('ZREMRANGEBYRANK', KEYS[k], 0, -index_max - 1)
+            if is_dm then
+                for _, old in ipairs(dropped) do
+                    redis.call('ZREM', KEYS[k + 4], old)
+                    redis.call('ZREM', KEYS[k + 5], old)
+                end
+            end
+        end
+    end
+    if ARGV[a + 5] == '1' then
+        redis.call('ZADD', KEYS[k + 1], seq, member)
+        redis.call('SADD', KEYS[4], KEYS[k + 1])
+        if thread_max > 0 then
+            redis.call('ZREMRANGEBYRANK', KEYS[k + 1], 0, -thread_max - 1)
+        end
+        redis.call('HSETNX', KEYS[k + 2], 'started_at', ARGV[a + 4])
+        redis.call('HSET', KEYS[k + 2], 'last_activity', ARGV[a + 4], 'last_seq', seq)
+        redis.call('HINCRBY', KEYS[k + 2], 'message_count', 1)
+        redis.call('HINCRBY', KEYS[k + 3], ARGV[a + 3], 1)
+    end
+    seqs[#seqs + 1] = seq
+end
+if log_max > 0 then
+    redis.call('ZREMRANGEBYRANK', KEYS[2], 0, -log_max - 1)
+    redis.call('ZREMRANGEBYRANK', KEYS[3], 0, -log_max - 1)
+end
+return seqs
+"""
+
+# Heartbeat an agent, optionally registering it and setting its context.
+# Returns 0 if the agent is unknown (and register is off), 2 if the roster
+# changed (registered, reactivated or re-described), otherwise 1.
+# KEYS: registered_at, last_heartbeat, status and context_summary hashes, active
+# ARGV: agent, now, time score, active status, register, context, set_context
+LUA_HEARTBEAT = """
+local changed = 0
+if redis.call('HEXISTS', KEYS[1], ARGV[1]) == 0 then
+    if ARGV[5] ~= '1' then
+        return 0
+    end
+    redis.call('HSET', KEYS[1], ARGV[1], ARGV[2])
+    changed = 1
+end
+if ARGV[7] == '1' and redis.call('HGET', KEYS[4], ARGV[1]) ~= ARGV[6] then
+    redis.call('HSET', KEYS[4], ARGV[1], ARGV[6])
+    changed = 1
+end
+if redis.call('HGET', KEYS[3], ARGV[1]) ~= ARGV[4] then
+    redis.call('HSET', KEYS[3], ARGV[1], ARGV[4])
+    changed = 1
+end
+redis.call('HSET', KEYS[2], ARGV[1], ARGV[2])
+redis.call('ZADD', KEYS[5], ARGV[3], ARGV[1])
+return 1 + changed
+"""
+
+# Set one field of a registered agent
+# KEYS: registered_at hash, field hash; ARGV: agent, value
+LUA_SET_AGENT_FIELD = """
+if redis.call('HEXISTS', KEYS[1], ARGV[1]) == 0 then
+    return 0
+end
+redis.call('HSET', KEYS[2], ARGV[1], ARGV[2])
+return 1
+"""
+
+# Mark agents whose last heartbeat is before the cutoff inactive
+# KEYS: active, status hash; ARGV: cutoff score, inactive status
+LUA_INACTIVE_AGENTS = """
+local stale = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', '(' .. ARGV[1])
+for _, agent in ipairs(stale) do
+    redis.call('HSET', KEYS[2], agent, ARGV[2])
+end
+redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', '(' .. ARGV[1])
+return #stale
+"""
+
+# Create and/or join a group channel. Mode 'create' only adds the creator if
+# the channel is new, 'join' only joins an existing channel, 'ensure' does both.
+# KEYS: channels hash, channel members, agent channels
+# ARGV: channel, agent, channel details JSON, mode
+LUA_JOIN_CHANNEL = """
+if ARGV[4] ~= 'join' then
+    local created = redis.call('HSETNX', KEYS[1], ARGV[1], ARGV[3])
+    if ARGV[4] == 'create' and created == 0 then
+        return 0
+    end
+elseif redis.call('HEXISTS', KEYS[1], ARGV[1]) == 0 then
+    return 0
+end
+redis.call('SADD', KEYS[2], ARGV[2])
+redis.call('SADD', KEYS[3], ARGV[1])
+return 1
+"""
+
+SCRIPTS = (LUA_APPEND_MESSAGES, LUA_HEARTBEAT, LUA_SET_AGENT_FIELD, LUA_INACTIVE_AGENTS, LUA_JOIN_CHANNEL)
+
+
+def _agent_key(field: str) -> str:
+    """Hash holding one field of every agent"""
+    return REDIS_AGENT_FIELD_PREFIX + field
+
+
+def _channel_key(name: str) -> str:
+    """Sorted set of a group channel's messages"""
+    return REDIS_MESSAGES_CHANNEL_PREFIX + name
+
+
+def _dm_key(agent_id: str, other_agent_id: str) -> str:
+    """Sorted set of the DMs between two agents"""
+    return REDIS_MESSAGES_DM_PREFIX + create_dm_channel_key(agent_id, other_agent_id)
+
+
+def _thread_key(kind: str, thread_id: str) -> str:
+    """A thread's summary hash, messages sorted set or participants hash"""
+    return f"{REDIS_THREAD_PREFIX}{kind}:{thread_id}"
+
+
+def _index_key(channel: str, from_agent: str, to_agent: Optional[str]) -> str:
+    """Sorted set a new message is indexed in: its channel or DM pair"""
+    if channel == CHANNEL_PUBLIC:
+        return REDIS_MESSAGES_PUBLIC
+    if channel == CHANNEL_DM:
+        return _dm_key(from_agent, to_agent)
+    return _channel_key(channel)
+
+
+def _inbox_key(agent_id: str) -> str:
+    """Sorted set of the DMs an agent sent or received"""
+    return REDIS_INBOX_PREFIX + agent_id
+
+
+def _dm_agents(msg: Dict[str, Any]) -> Set[str]:
+    """Agents whose inbox holds a DM: its sender and recipient"""
+    return {msg['from_agent'], msg['to_agent']}
+
+
+def _time_score(moment: datetime) -> float:
+    """Timeline score of a (naive UTC) time"""
+    return moment.timestamp()
+
+
+def _decode(members: Iterable[str]) -> List[Dict[str, Any]]:
+    """Messages from their sorted set members"""
+    return [json.loads(member) for member in members]
+
+
+class RedisManager(StorageBackend):
+    """
+    Manages all Redis operations for HIVE, with the interface of SQLiteManager.
+
+    Uses the asyncio client over a connection pool, so no call blocks the
+    event loop. Each logical operation is one round trip: reads are queued
+    on a MULTI/EXEC pipeline, which also gives them one consistent snapshot,
+    and writes that depend on what is stored (appending messages with their
+    seq, heartbeats, channel joins) run as server-side scripts.
+
+    Messages are JSON members of sorted sets scored by seq: the whole log,
+    the public channel, each DM pair, each group channel and each thread,
+    plus a timeline of seqs scored by send time for timestamp reads. Every
+    index is trimmed to its retention limit as messages are appended.
 
-class RedisManager:
-    """Manages all Redis operations for HIVE"""
-
-    def __init__(self):
-        """Initialize Redis connection pool"""
-        self.pool = ConnectionPool(
-            host=settings.redis_host,
-            port=settings.redis_port,
-            db=settings.redis_db,
-            password=settings.redis_password,
-            max_connections=settings.redis_max_connections,
-            socket_timeout=settings.redis_socket_timeout,
-            socket_connect_timeout=settings.redis_socket_connect_timeout,
-            decode_responses=True
-        )
-        self.redis: Redis = Redis(connection_pool=self.pool)
-        logger.info(f"Redis connection pool initialized: {settings.redis_host}:{settings.redis_port} DB={settings.redis_db}")
+    Each agent also has an inbox sorted set holding the DMs it sent or
+    received, and a set of its DM pair keys, both maintained on send. An
+    agent's DMs are one range read on its inbox, never a keyspace SCAN.
+
+    Agents are stored one hash per field (agent_id -> value), with active
+    agents in a sorted set scored by last heartbeat, so the whole roster is
+    a handful of commands however many agents there are.
+    """
 
-    def ping(self) -> bool:
+    def __init__(self, client: Optional[Redis] = None):
+        """
+        Initialize Redis manager.
+
+        Args:
+            client: Redis client to use, e.g. fakeredis.FakeAsyncRedis (uses
+                a pool for settings.redis_url if not provided); responses
+                must be decoded
+        """
+        if client is None:
+            logger.info(f"Redis URL: {settings.redis_url}")
+            client = Redis.from_url(
+                settings.redis_url,
+                max_connections=settings.redis_max_connections,
+                socket_timeout=settings.redis_socket_timeout,
+                decode_responses=True
+            )
+        self.redis: Redis = client
+        self.notifier = MessageNotifier(self.get_latest_seq, settings.long_poll_check_interval)
+        self._append = self.redis.register_script(LUA_APPEND_MESSAGES)
+        self._heartbeat = self.redis.register_script(LUA_HEARTBEAT)
+        self._set_agent_field = self.redis.register_script(LUA_SET_AGENT_FIELD)
+        self._inactive_agents = self.redis.register_script(LUA_INACTIVE_AGENTS)
+        self._join_channel = self.redis.register_script(LUA_JOIN_CHANNEL)
+        self._roster: Optional[Tuple[float, List[Dict[str, Any]]]] = None
+
+    async def initialize(self):
+        """Load the server-side scripts and upgrade an older key layout"""
+        await self._load_scripts()
+        version = int(await self.redis.get(REDIS_SCHEMA_VERSION) or 0)
+        if version < SCHEMA_VERSION:
+            await self._build_inboxes()
+            await self.redis.set(REDIS_SCHEMA_VERSION, SCHEMA_VERSION)
+        logger.info(f"Redis storage initialized (layout version {SCHEMA_VERSION})")
+
+    async def _build_inboxes(self):
+        """
+        Fill the DM inboxes and DM pair sets from the DM pair sorted sets.
+
+        Layout version 1 added them; DMs stored before are indexed once
+        here. Idempotent, so concurrent starts are harmless.
+        """
+        pairs = 0
+        async for key in self.redis.scan_iter(match=f"{REDIS_MESSAGES_DM_PREFIX}*", count=1000):
+            messages = await self.redis.zrange(key, 0, -1, withscores=True)
+            agents = {agent for member, _ in messages for agent in _dm_agents(json.loads(member))}
+
+            def build(pipe: Pipeline):
+                pipe.sadd(REDIS_MESSAGES_DM_PAIRS, key)
+                for agent_id in agents:
+                    pipe.sadd(REDIS_AGENT_DM_PAIRS_PREFIX + agent_id, key)
+                    pipe.sadd(REDIS_MESSAGE_INDEXES, _inbox_key(agent_id))
+                for member, seq in messages:
+                    for agent_id in _dm_agents(json.loads(member)):
+                        pipe.zadd(_inbox_key(agent_id), {member: seq})
+
+            if messages:
+                await self._pipeline(build)
+            pairs += 1
+
+        logger.info(f"Indexed the DMs of {pairs} agent pairs into inboxes")
+
+    async def _load_scripts(self):
+        """Load every script, so pipelines can queue them with EVALSHA"""
+        for script in SCRIPTS:
+            await self.redis.script_load(script)
+
+    async def _pipeline(self, build: Callable[[Pipeline], Any], transaction: bool = True) -> List[Any]:
+        """
+        Queue commands with `build` and send them in one round trip.
+
+        A transaction (MULTI/EXEC) reads one consistent snapshot. Scripts
+        are queued by their SHA; if the server has lost them (restart,
+        SCRIPT FLUSH) they are loaded again and the pipeline is retried.
+
+        Returns:
+            list: One result per queued command
+        """
+        try:
+            async with self.redis.pipeline(transaction=transaction) as pipe:
+                build(pipe)
+                return await pipe.execute()
+        except NoScriptError:
+            await self._load_scripts()
+            async with self.redis.pipeline(transaction=transaction) as pipe:
+                build(pipe)
+                return await pipe.execute()
+
+    async def ping(self) -> bool:
         """
         Test Redis connection.
 
@@ -51,19 +356,45 @@ class RedisManager:
             bool: True if connected
         """
         try:
-            return self.redis.ping()
-        except RedisError as e:
+            return bool(await self.redis.ping())
+        except Exception as e:
             logger.error(f"Redis ping failed: {e}")
             return False
 
-    def register_agent(
+    def _heartbeat_args(
+        self,
+        agent_id: str,
+        now: datetime,
+        register: bool,
+        context: Optional[str]
+    ) -> Tuple[List[str], List[Any]]:
+        """KEYS and ARGV of LUA_HEARTBEAT"""
+        keys = [
+            _agent_key("registered_at"),
+            _agent_key("last_heartbeat"),
+            _agent_key("status"),
+            _agent_key("context_summary"),
+            REDIS_AGENTS_ACTIVE
+        ]
+        args = [
+            agent_id,
+            now.isoformat(),
+            _time_score(now),
+            AGENT_STATUS_ACTIVE,
+            int(register),
+            context or "",
+            int(context is not None)
+        ]
+        return keys, args
+
+    async def register_agent(
         self,
         agent_id: str,
         context_summary: str,
         endpoint: Optional[str] = None
     ) -> bool:
         """
-        Register a new agent in Redis.
+        Register a new agent (or re-register an existing one).
 
         Args:
             agent_id: Unique agent identifier
@@ -75,39 +406,35 @@ class RedisManager:
         """
         try:
             now = datetime.utcnow()
-            timestamp = now.timestamp()
-
-            # Store agent details in hash
-            agent_key = f"{REDIS_AGENT_PREFIX}{agent_id}"
-            agent_data = {
-                "agent_id": agent_id,
+            values = {
                 "context_summary": context_summary,
                 "registered_at": now.isoformat(),
                 "last_heartbeat": now.isoformat(),
-                "status": AGENT_STATUS_ACTIVE
+                "status": AGENT_STATUS_ACTIVE,
+                "endpoint": endpoint,
             }
-            if endpoint:
-                agent_data["endpoint"] = endpoint
-
-            self.redis.hset(agent_key, mapping=agent_data)
 
-            # Add to active agents sorted set
-            self.redis.zadd(REDIS_AGENTS_ACTIVE, {agent_id: timestamp})
+            def build(pipe: Pipeline):
+                for field, value in values.items():
+                    if value is None:
+                        pipe.hdel(_agent_key(field), agent_id)
+                    else:
+                        pipe.hset(_agent_key(field), agent_id, value)
+                pipe.zadd(REDIS_AGENTS_ACTIVE, {agent_id: _time_score(now)})
 
-            # Reserve the name
-            name_key = f"{REDIS_NAMES_RESERVED_PREFIX}{agent_id}"
-            self.redis.setex(name_key, NAME_RESERVATION_TTL, "1")
+            await self._pipeline(build)
+            self._roster = None
 
             logger.info(f"Agent registered: {agent_id}")
             return True
 
-        except RedisError as e:
+        except Exception as e:
             logger.error(f"Failed to register agent {agent_id}: {e}")
             return False
 
-    def update_heartbeat(self, agent_id: str) -> bool:
+    async def update_heartbeat(self, agent_id: str) -> bool:
         """
-        Update agent's last heartbeat timestamp.
+        Update agent's last heartbeat timestamp (reactivating it if needed).
 
         Args:
             agent_id: Agent identifier
@@ -116,27 +443,44 @@ class RedisManager:
             bool: True if update successful
         """
         try:
-            now = datetime.utcnow()
-            timestamp = now.timestamp()
-
-            # Update last_heartbeat in hash
-            agent_key = f"{REDIS_AGENT_PREFIX}{agent_id}"
-            if not self.redis.exists(agent_key):
+            keys, args = self._heartbeat_args(agent_id, datetime.utcnow(), False, None)
+            result = await self._heartbeat(keys=keys, args=args)
+            if not result:
                 logger.warning(f"Agent not found for heartbeat: {agent_id}")
                 return False
+            if result > 1:
+                self._roster = None
+            return True
+
+        except Exception as e:
+            logger.error(f"Failed to update heartbeat for {agent_id}: {e}")
+            return False
 
-            self.redis.hset(agent_key, "last_heartbeat", now.isoformat())
+    async def update_agent_context(self, agent_id: str, context_summary: str) -> bool:
+        """
+        Update an agent's context summary.
 
-            # Update score in active agents sorted set
-            self.redis.zadd(REDIS_AGENTS_ACTIVE, {agent_id: timestamp})
+        Args:
+            agent_id: Agent identifier
+            context_summary: New context description
 
-            return True
+        Returns:
+            bool: True if the agent was found and updated
+        """
+        try:
+            updated = await self._set_agent_field(
+                keys=[_agent_key("registered_at"), _agent_key("context_summary")],
+                args=[agent_id, context_summary]
+            )
+            if updated:
+                self._roster = None
+            return bool(updated)
 
-        except RedisError as e:
-            logger.error(f"Failed to update heartbeat for {agent_id}: {e}")
+        except Exception as e:
+            logger.error(f"Failed to update context for {agent_id}: {e}")
             return False
 
-    def get_agent(self, agent_id: str) -> Optional[Dict[str, Any]]:
+    async def get_agent(self, agent_id: str) -> Optional[Dict[str, Any]]:
         """
         Get agent details.
 
@@ -146,20 +490,60 @@ class RedisManager:
         Returns:
             dict: Agent data or None if not found
         """
-        try:
-            agent_key = f"{REDIS_AGENT_PREFIX}{agent_id}"
-            data = self.redis.hgetall(agent_key)
+        agents = await self.get_agents([agent_id])
+        return agents.get(agent_id)
 
-            if not data:
-                return None
+    async def get_agents(self, agent_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        Get details of several agents at once.
 
-            return data
+        Args:
+            agent_ids: Agent identifiers
 
-        except RedisError as e:
-            logger.error(f"Failed to get agent {agent_id}: {e}")
-            return None
+        Returns:
+            dict: agent_id -> agent data, for the agents that exist
+        """
+        if not agent_ids:
+            return {}
+        try:
+            columns = await self._pipeline(lambda pipe: [
+                pipe.hmget(_agent_key(field), agent_ids) for field in AGENT_HASH_FIELDS
+            ])
+            agents = {}
+            for i, agent_id in enumerate(agent_ids):
+                agent = {"agent_id": agent_id}
+                agent.update((field, column[i]) for field, column in zip(AGENT_HASH_FIELDS, columns))
+                if agent["registered_at"] is not None:
+                    agents[agent_id] = agent
+            return agents
 
-    def list_agents(self, include_stale: bool = False) -> List[str]:
+        except Exception as e:
+            logger.error(f"Failed to get agents: {e}")
+            return {}
+
+    @staticmethod
+    def _stale_cutoff() -> float:
+        """Heartbeat scores at or before this count as stale"""
+        return datetime.utcnow().timestamp() - settings.stale_threshold
+
+    def _queue_agents(self, pipe: Pipeline, include_stale: bool):
+        """Queue the reads of _agents_from()"""
+        pipe.zrangebyscore(REDIS_AGENTS_ACTIVE, "-inf" if include_stale else f"({self._stale_cutoff()}", "+inf")
+        for field in AGENT_HASH_FIELDS:
+            pipe.hgetall(_agent_key(field))
+
+    @staticmethod
+    def _agents_from(results: List[Any]) -> List[Dict[str, Any]]:
+        """Active agents sorted by agent_id, from the results of _queue_agents()"""
+        agent_ids, columns = results[0], results[1:]
+        agents = []
+        for agent_id in sorted(agent_ids):
+            agent = {"agent_id": agent_id}
+            agent.update((field, column.get(agent_id)) for field, column in zip(AGENT_HASH_FIELDS, columns))
+            agents.append(agent)
+        return agents
+
+    async def list_agents(self, include_stale: bool = False) -> List[str]:
         """
         List all active agent IDs.
 
@@ -167,28 +551,17 @@ class RedisManager:
             include_stale: Include agents past stale threshold
 
         Returns:
-            list: List of agent IDs
+            list: List of agent IDs, sorted
         """
         try:
-            if include_stale:
-                # Get all agents
-                agents = self.redis.zrange(REDIS_AGENTS_ACTIVE, 0, -1)
-            else:
-                # Get only recently active agents
-                min_timestamp = datetime.utcnow().timestamp() - settings.stale_threshold
-                agents = self.redis.zrangebyscore(
-                    REDIS_AGENTS_ACTIVE,
-                    min_timestamp,
-                    "+inf"
-                )
-
-            return list(agents)
+            cutoff = "-inf" if include_stale else f"({self._stale_cutoff()}"
+            return sorted(await self.redis.zrangebyscore(REDIS_AGENTS_ACTIVE, cutoff, "+inf"))
 
-        except RedisError as e:
+        except Exception as e:
             logger.error(f"Failed to list agents: {e}")
             return []
 
-    def get_all_agents_details(self, include_stale: bool = False) -> List[Dict[str, Any]]:
+    async def get_all_agents_details(self, include_stale: bool = False) -> List[Dict[str, Any]]:
         """
         Get details for all active agents.
 
@@ -196,28 +569,91 @@ class RedisManager:
             include_stale: Include agents past stale threshold
 
         Returns:
-            list: List of agent detail dictionaries
+            list: List of agent detail dictionaries, sorted by agent_id
         """
-        agent_ids = self.list_agents(include_stale=include_stale)
-        agents = []
+        try:
+            return self._agents_from(await self._pipeline(lambda pipe: self._queue_agents(pipe, include_stale)))
 
-        for agent_id in agent_ids:
-            agent_data = self.get_agent(agent_id)
-            if agent_data:
-                agents.append(agent_data)
+        except Exception as e:
+            logger.error(f"Failed to get all agents details: {e}")
+            return []
 
-        return agents
+    def active_roster(self) -> List[Dict[str, Any]]:
+        """
+        Active, non-stale agents sorted by agent_id, as of the last poll.
 
-    def send_message(
+        Polls refresh the roster at most every ROSTER_CACHE_SECONDS, or
+        sooner after this process changes an agent. Treat it as read-only.
+
+        Returns:
+            list: Agent dictionaries
+        """
+        return self._roster[1] if self._roster is not None else []
+
+    def _roster_expired(self) -> bool:
+        """Whether the next poll should re-read the roster"""
+        return self._roster is None or time.monotonic() - self._roster[0] >= ROSTER_CACHE_SECONDS
+
+    def _append_args(self, rows: List[Dict[str, Any]], now: datetime) -> Tuple[List[str], List[Any]]:
+        """KEYS and ARGV of LUA_APPEND_MESSAGES for new messages (without seq)"""
+        keys = [REDIS_SEQ, REDIS_MESSAGES_LOG, REDIS_MESSAGES_TIMELINE, REDIS_MESSAGE_INDEXES, REDIS_MESSAGES_DM_PAIRS]
+        args = [max(settings.redis_log_max_messages, 0), max(settings.retention_max_channel_messages, 0)]
+        score = _time_score(now)
+        for row in rows:
+            thread_id = row["thread_id"]
+            is_dm = row["channel"] == CHANNEL_DM
+            # Unused keys of a non-DM point at the sender's, untouched by the script
+            recipient = row["to_agent"] if is_dm else row["from_agent"]
+            keys += [
+                _index_key(row["channel"], row["from_agent"], row["to_agent"]),
+                _thread_key("messages", thread_id or ""),
+                _thread_key("summary", thread_id or ""),
+                _thread_key("participants", thread_id or ""),
+                _inbox_key(row["from_agent"]),
+                _inbox_key(recipient),
+                REDIS_AGENT_DM_PAIRS_PREFIX + row["from_agent"],
+                REDIS_AGENT_DM_PAIRS_PREFIX + recipient
+            ]
+            index_max = settings.retention_max_dm_per_pair if is_dm else settings.retention_max_channel_messages
+            args += [
+                json.dumps(row),
+                score,
+                max(index_max, 0),
+                row["from_agent"],
+                row["timestamp"],
+                int(thread_id is not None),
+                int(is_dm)
+            ]
+        return keys, args
+
+    @staticmethod
+    def _message_rows(from_agent: str, messages: List[Dict[str, Any]], now: datetime) -> List[Dict[str, Any]]:
+        """Stored form of outgoing messages (dicts with message_id, content and optional to_agent / thread_id / channel)"""
+        timestamp = now.isoformat()
+        return [
+            {
+                "message_id": msg["message_id"],
+                "from_agent": from_agent,
+                "to_agent": msg.get("to_agent"),
+                "channel": _message_channel(msg.get("to_agent"), msg.get("channel")),
+                "content": msg["content"],
+                "timestamp": timestamp,
+                "thread_id": msg.get("thread_id"),
+            }
+            for msg in messages
+        ]
+
+    async def send_message(
         self,
         message_id: str,
         from_agent: str,
         content: str,
         to_agent: Optional[str] = None,
-        thread_id: Optional[str] = None
+        thread_id: Optional[str] = None,
+        channel: Optional[str] = None
     ) -> bool:
         """
-        Store a message in Redis.
+        Store a message.
 
         Args:
             message_id: Unique message identifier
@@ -225,96 +661,209 @@ class RedisManager:
             content: Message content
             to_agent: Recipient agent ID (None for public)
             thread_id: Optional thread ID
+            channel: Group channel to post to (to_agent must then be None)
 
         Returns:
             bool: True if message stored successfully
         """
         try:
-            now = datetime.utcnow()
-
-            # Create message data
-            message_data = {
+            message = {
                 "message_id": message_id,
-                "from_agent": from_agent,
-                "to_agent": to_agent,
-                "channel": CHANNEL_DM if to_agent else CHANNEL_PUBLIC,
                 "content": content,
-                "timestamp": now.isoformat(),
-                "thread_id": thread_id
+                "to_agent": to_agent,
+                "thread_id": thread_id,
+                "channel": channel
             }
+            now = datetime.utcnow()
+            keys, args = self._append_args(self._message_rows(from_agent, [message], now), now)
+            await self._append(keys=keys, args=args)
 
-            message_json = json.dumps(message_data)
-
-            # Store in appropriate channel
-            if to_agent:
-                # Direct message - store in DM channel
-                channel_key = create_dm_channel_key(from_agent, to_agent)
-                dm_key = f"{REDIS_MESSAGES_DM_PREFIX}{channel_key}"
-                self.redis.lpush(dm_key, message_json)
-                # Trim to max size
-                self.redis.ltrim(dm_key, 0, settings.dm_channel_max_size - 1)
-            else:
-                # Public message
-                self.redis.lpush(REDIS_MESSAGES_PUBLIC, message_json)
-                # Trim to max size
-                self.redis.ltrim(REDIS_MESSAGES_PUBLIC, 0, settings.public_channel_max_size - 1)
-
-            # Store message index for deduplication
-            index_key = f"{REDIS_MESSAGE_INDEX_PREFIX}{message_id}"
-            self.redis.setex(index_key, MESSAGE_INDEX_TTL, "1")
-
+            self.notifier.notify()
             logger.info(f"Message stored: {message_id} from {from_agent}")
             return True
 
-        except RedisError as e:
+        except Exception as e:
             logger.error(f"Failed to send message {message_id}: {e}")
             return False
 
-    def get_public_messages(
-        self,
-        since_timestamp: Optional[datetime] = None,
-        limit: int = 50
-    ) -> List[Dict[str, Any]]:
+    async def send_messages(self, from_agent: str, messages: List[Dict[str, Any]]) -> bool:
         """
-        Get public channel messages.
+        Store several messages from one sender atomically, in one round trip.
 
         Args:
-            since_timestamp: Only get messages after this time
+            from_agent: Sender agent ID
+            messages: Dicts with message_id, content and optional to_agent
+                (None for public) / thread_id / channel (a group channel)
+
+        Returns:
+            bool: True if every message was stored
+        """
+        try:
+            now = datetime.utcnow()
+            keys, args = self._append_args(self._message_rows(from_agent, messages, now), now)
+            await self._append(keys=keys, args=args)
+
+            self.notifier.notify()
+            logger.info(f"Stored {len(messages)} messages from {from_agent}")
+            return True
+
+        except Exception as e:
+            logger.error(f"Failed to send {len(messages)} messages from {from_agent}: {e}")
+            return False
+
+    async def get_latest_seq(self) -> int:
+        """
+        Get the sequence number of the newest message.
+
+        Returns:
+            int: Highest message seq, or 0 if there are no messages
+        """
+        try:
+            return int(await self.redis.get(REDIS_SEQ) or 0)
+        except Exception as e:
+            logger.error(f"Failed to get latest message seq: {e}")
+            return 0
+
+    async def get_messages_after(self, after_seq: int, limit: int = 500) -> List[Dict[str, Any]]:
+        """
+        Get messages of every channel after a cursor, oldest first.
+
+        Args:
+            after_seq: Only get messages after this sequence number
             limit: Maximum number of messages to retrieve
 
         Returns:
             list: List of message dictionaries
         """
         try:
-            # Get messages from list (most recent first)
-            messages_json = self.redis.lrange(REDIS_MESSAGES_PUBLIC, 0, limit - 1)
+            return await self._read([REDIS_MESSAGES_LOG], after_seq, limit)
+        except Exception as e:
+            logger.error(f"Failed to get messages after seq {after_seq}: {e}")
+            return []
 
-            messages = []
-            for msg_json in messages_json:
-                msg_data = json.loads(msg_json)
+    async def wait_for_messages(self, after_seq: int, timeout: float) -> bool:
+        """
+        Wait until a message newer than after_seq is stored (long-poll).
 
-                # Filter by timestamp if specified
-                if since_timestamp:
-                    msg_timestamp = datetime.fromisoformat(msg_data["timestamp"])
-                    if msg_timestamp <= since_timestamp:
-                        continue
+        Args:
+            after_seq: Sequence number the caller has already read up to
+            timeout: Maximum seconds to wait
+
+        Returns:
+            bool: True if new messages arrived, False on timeout
+        """
+        return await self.notifier.wait(after_seq, timeout)
+
+    async def _seq_before(self, since_timestamp: datetime) -> int:
+        """
+        Resolve a point in time to a cursor.
+
+        Returns the seq just before the first message stamped after
+        since_timestamp, so reading after it yields that message onwards.
+        """
+        first = await self.redis.zrangebyscore(
+            REDIS_MESSAGES_TIMELINE, f"({_time_score(since_timestamp)}", "+inf", start=0, num=1
+        )
+        if not first:
+            # Nothing newer: start from the current end of the log
+            return await self.get_latest_seq()
+        return int(first[0]) - 1
+
+    async def _read(
+        self,
+        keys: List[str],
+        after_seq: Optional[int],
+        limit: int,
+        match: Optional[Callable[[Dict[str, Any]], bool]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Read messages from one or more index sorted sets, oldest first.
 
-                messages.append(msg_data)
+        With after_seq, returns the oldest `limit` messages after it,
+        otherwise the newest `limit`. All keys are read in one MULTI and
+        merged on seq. With `match`, only matching messages count, and
+        further pages are read until `limit` of them are found.
+        """
+        if not keys or limit <= 0:
+            return []
 
-            # Reverse to return oldest first
+        newest_first = after_seq is None
+        bound = None if newest_first else f"({after_seq}"
+        messages: List[Dict[str, Any]] = []
+        while True:
+            def build(pipe: Pipeline):
+                for key in keys:
+                    if newest_first:
+                        pipe.zrevrangebyscore(key, bound or "+inf", "-inf", start=0, num=limit, withscores=True)
+                    else:
+                        pipe.zrangebyscore(key, bound, "+inf", start=0, num=limit, withscores=True)
+
+            pages = await self._pipeline(build)
+            page = list(heapq.merge(*pages, key=itemgetter(1), reverse=newest_first))
+            exhausted = len(page) <= limit and all(len(p) < limit for p in pages)
+            page = page[:limit]
+            batch = _decode(member for member, _ in page)
+            messages.extend(batch if match is None else filter(match, batch))
+            if match is None or len(messages) >= limit or exhausted:
+                break
+            bound = f"({int(page[-1][1])}"
+
+        messages = messages[:limit]
+        if newest_first:
             messages.reverse()
-            return messages
+        return messages
+
+    async def _select_messages(
+        self,
+        keys: List[str],
+        since_timestamp: Optional[datetime],
+        after_seq: Optional[int],
+        limit: int,
+        match: Optional[Callable[[Dict[str, Any]], bool]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Run a cursor read or a latest-N read, returning messages oldest first.
+
+        With after_seq (a cursor) or since_timestamp, returns the oldest
+        `limit` messages after that point; otherwise the newest `limit`.
+        A timestamp is first resolved to a cursor on the timeline.
+        """
+        if after_seq is None and since_timestamp:
+            after_seq = await self._seq_before(since_timestamp)
+        return await self._read(keys, after_seq, limit, match)
+
+    async def get_public_messages(
+        self,
+        since_timestamp: Optional[datetime] = None,
+        limit: int = 50,
+        after_seq: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Get public channel messages.
+
+        Args:
+            since_timestamp: Only get messages after this time
+            limit: Maximum number of messages to retrieve
+            after_seq: Only get messages after this sequence number (takes
+                precedence over since_timestamp)
 
-        except RedisError as e:
+        Returns:
+            list: List of message dictionaries
+        """
+        try:
+            return await self._select_messages([REDIS_MESSAGES_PUBLIC], since_timestamp, after_seq, limit)
+
+        except Exception as e:
             logger.error(f"Failed to get public messages: {e}")
             return []
 
-    def get_dm_messages(
+    async def get_dm_messages(
         self,
         agent_id: str,
         other_agent_id: Optional[str] = None,
         since_timestamp: Optional[datetime] = None,
-        limit: int = 50
+        limit: int = 50,
+        after_seq: Optional[int] = None
     ) -> List[Dict[str, Any]]:
         """
         Get direct messages for an agent.
@@ -324,101 +873,522 @@ class RedisManager:
             other_agent_id: If specified, only get DMs with this agent
             since_timestamp: Only get messages after this time
             limit: Maximum number of messages to retrieve
+            after_seq: Only get messages after this sequence number (takes
+                precedence over since_timestamp)
 
         Returns:
             list: List of message dictionaries
         """
         try:
-            messages = []
+            key = _dm_key(agent_id, other_agent_id) if other_agent_id else _inbox_key(agent_id)
+            return await self._select_messages([key], since_timestamp, after_seq, limit)
 
-            if other_agent_id:
-                # Get DMs with specific agent
-                channel_key = create_dm_channel_key(agent_id, other_agent_id)
-                dm_key = f"{REDIS_MESSAGES_DM_PREFIX}{channel_key}"
-                messages_json = self.redis.lrange(dm_key, 0, limit - 1)
+        except Exception as e:
+            logger.error(f"Failed to get DM messages for {agent_id}: {e}")
+            return []
 
-                for msg_json in messages_json:
-                    msg_data = json.loads(msg_json)
+    async def get_dm_inboxes(
+        self,
+        cursors: Dict[str, Optional[int]],
+        limit: int = 50
+    ) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        Get the direct messages of several agents.
 
-                    # Filter by timestamp if specified
-                    if since_timestamp:
-                        msg_timestamp = datetime.fromisoformat(msg_data["timestamp"])
-                        if msg_timestamp <= since_timestamp:
-                            continue
+        Args:
+            cursors: agent_id -> read after this sequence number (None for
+                the newest messages)
+            limit: Maximum number of messages per agent
 
-                    messages.append(msg_data)
-            else:
-                # Get all DMs involving this agent
-                # Scan for all DM keys containing this agent
-                pattern = f"{REDIS_MESSAGES_DM_PREFIX}*{agent_id}*"
-                dm_keys = []
+        Returns:
+            dict: agent_id -> list of message dictionaries, oldest first
+        """
+        try:
+            return {
+                agent_id: await self.get_dm_messages(agent_id, limit=limit, after_seq=after_seq)
+                for agent_id, after_seq in cursors.items()
+            }
 
-                cursor = 0
-                while True:
-                    cursor, keys = self.redis.scan(cursor, match=pattern, count=100)
-                    dm_keys.extend(keys)
-                    if cursor == 0:
-                        break
+        except Exception as e:
+            logger.error(f"Failed to get DM inboxes: {e}")
+            return {}
+
+    async def _run_join(self, name: str, agent_id: str, description: Optional[str], mode: str) -> int:
+        """Run LUA_JOIN_CHANNEL"""
+        details = json.dumps({
+            "name": name,
+            "description": description,
+            "created_by": agent_id,
+            "created_at": datetime.utcnow().isoformat()
+        })
+        return await self._join_channel(
+            keys=[REDIS_CHANNELS, REDIS_CHANNEL_MEMBERS_PREFIX + name, REDIS_AGENT_CHANNELS_PREFIX + agent_id],
+            args=[name, agent_id, details, mode]
+        )
+
+    async def create_channel(self, name: str, created_by: str, description: Optional[str] = None) -> bool:
+        """
+        Create a group channel, with its creator as the first member.
+
+        Args:
+            name: Channel name (see is_valid_channel_name)
+            created_by: Creating agent ID
+            description: Optional channel description
 
-                # Get messages from all DM channels
-                for dm_key in dm_keys:
-                    messages_json = self.redis.lrange(dm_key, 0, limit - 1)
+        Returns:
+            bool: True if created, False if it already exists or on error
+        """
+        try:
+            created = await self._run_join(name, created_by, description, "create")
+            if created:
+                logger.info(f"Channel created: {name} by {created_by}")
+            return bool(created)
 
-                    for msg_json in messages_json:
-                        msg_data = json.loads(msg_json)
+        except Exception as e:
+            logger.error(f"Failed to create channel {name}: {e}")
+            return False
 
-                        # Filter by timestamp if specified
-                        if since_timestamp:
-                            msg_timestamp = datetime.fromisoformat(msg_data["timestamp"])
-                            if msg_timestamp <= since_timestamp:
-                                continue
+    async def join_channel(self, name: str, agent_id: str, create: bool = False) -> bool:
+        """
+        Add an agent to a group channel.
 
-                        messages.append(msg_data)
+        Args:
+            name: Channel name
+            agent_id: Joining agent ID
+            create: Create the channel if it does not exist
 
-            # Sort by timestamp and limit
-            messages.sort(key=lambda x: x["timestamp"])
-            return messages[-limit:]
+        Returns:
+            bool: True if the agent is a member afterwards
+        """
+        try:
+            return bool(await self._run_join(name, agent_id, None, "ensure" if create else "join"))
 
-        except RedisError as e:
-            logger.error(f"Failed to get DM messages for {agent_id}: {e}")
+        except Exception as e:
+            logger.error(f"Failed to join {agent_id} to channel {name}: {e}")
+            return False
+
+    async def leave_channel(self, name: str, agent_id: str) -> bool:
+        """
+        Remove an agent from a group channel.
+
+        Returns:
+            bool: True if the agent was a member
+        """
+        try:
+            removed, _ = await self._pipeline(lambda pipe: (
+                pipe.srem(REDIS_CHANNEL_MEMBERS_PREFIX + name, agent_id),
+                pipe.srem(REDIS_AGENT_CHANNELS_PREFIX + agent_id, name)
+            ))
+            return removed > 0
+
+        except Exception as e:
+            logger.error(f"Failed to remove {agent_id} from channel {name}: {e}")
+            return False
+
+    @staticmethod
+    def _queue_channel_counts(pipe: Pipeline, name: str):
+        """Queue a channel's member and message counts"""
+        pipe.scard(REDIS_CHANNEL_MEMBERS_PREFIX + name)
+        pipe.zcard(_channel_key(name))
+
+    async def get_channel(self, name: str) -> Optional[Dict[str, Any]]:
+        """
+        Get a group channel's details.
+
+        Returns:
+            dict: Channel data with member_count and message_count, or None
+                if not found
+        """
+        try:
+            details, member_count, message_count = await self._pipeline(lambda pipe: (
+                pipe.hget(REDIS_CHANNELS, name),
+                self._queue_channel_counts(pipe, name)
+            ))
+            if details is None:
+                return None
+            return dict(json.loads(details), member_count=member_count, message_count=message_count)
+
+        except Exception as e:
+            logger.error(f"Failed to get channel {name}: {e}")
+            return None
+
+    async def list_channels(self) -> List[Dict[str, Any]]:
+        """
+        List every group channel, by name.
+
+        Returns:
+            list: Channel data with member_count and message_count
+        """
+        try:
+            channels = await self.redis.hgetall(REDIS_CHANNELS)
+            names = sorted(channels)
+            counts = await self._pipeline(lambda pipe: [self._queue_channel_counts(pipe, name) for name in names])
+            return [
+                dict(json.loads(channels[name]), member_count=counts[2 * i], message_count=counts[2 * i + 1])
+                for i, name in enumerate(names)
+            ]
+
+        except Exception as e:
+            logger.error(f"Failed to list channels: {e}")
+            return []
+
+    async def get_channel_members(self, name: str) -> List[str]:
+        """Get the agent IDs of a group channel's members, sorted"""
+        try:
+            return sorted(await self.redis.smembers(REDIS_CHANNEL_MEMBERS_PREFIX + name))
+
+        except Exception as e:
+            logger.error(f"Failed to get members of channel {name}: {e}")
+            return []
+
+    async def get_agent_channels(self, agent_id: str) -> List[str]:
+        """Get the group channels an agent belongs to, sorted"""
+        try:
+            return sorted(await self.redis.smembers(REDIS_AGENT_CHANNELS_PREFIX + agent_id))
+
+        except Exception as e:
+            logger.error(f"Failed to get channels of {agent_id}: {e}")
+            return []
+
+    async def is_channel_member(self, name: str, agent_id: str) -> bool:
+        """Check whether an agent belongs to a group channel"""
+        try:
+            return bool(await self.redis.sismember(REDIS_CHANNEL_MEMBERS_PREFIX + name, agent_id))
+
+        except Exception as e:
+            logger.error(f"Failed to check membership of {agent_id} in channel {name}: {e}")
+            return False
+
+    async def get_channel_messages(
+        self,
+        name: str,
+        since_timestamp: Optional[datetime] = None,
+        limit: int = 50,
+        after_seq: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Get a group channel's messages.
+
+        Args:
+            name: Channel name
+            since_timestamp: Only get messages after this time
+            limit: Maximum number of messages to retrieve
+            after_seq: Only get messages after this sequence number (takes
+                precedence over since_timestamp)
+
+        Returns:
+            list: List of message dictionaries
+        """
+        try:
+            return await self._select_messages([_channel_key(name)], since_timestamp, after_seq, limit)
+
+        except Exception as e:
+            logger.error(f"Failed to get messages of channel {name}: {e}")
             return []
 
-    def cleanup_inactive_agents(self) -> int:
+    async def get_thread(self, thread_id: str) -> Optional[Dict[str, Any]]:
         """
-        Remove agents that haven't sent heartbeat in removal_threshold seconds.
+        Get a thread's summary.
+
+        Counts and times cover the thread's whole history, including
+        messages since trimmed or pruned.
+
+        Args:
+            thread_id: Thread identifier
 
         Returns:
-            int: Number of agents removed
+            dict: thread_id, message_count, reply_count, last_seq, started_at,
+                last_activity and participants (sorted agent IDs), or None if
+                no message was ever posted to the thread
         """
         try:
-            max_timestamp = datetime.utcnow().timestamp() - settings.removal_threshold
+            summary, participants = await self._pipeline(lambda pipe: (
+                pipe.hgetall(_thread_key("summary", thread_id)),
+                pipe.hkeys(_thread_key("participants", thread_id))
+            ))
+            if not summary:
+                return None
 
-            # Get inactive agents
-            inactive_agents = self.redis.zrangebyscore(
-                REDIS_AGENTS_ACTIVE,
-                "-inf",
-                max_timestamp
+            message_count = int(summary["message_count"])
+            return {
+                "thread_id": thread_id,
+                "message_count": message_count,
+                "reply_count": max(message_count - 1, 0),
+                "last_seq": int(summary["last_seq"]),
+                "started_at": summary["started_at"],
+                "last_activity": summary["last_activity"],
+                "participants": sorted(participants),
+            }
+
+        except Exception as e:
+            logger.error(f"Failed to get thread {thread_id}: {e}")
+            return None
+
+    async def get_thread_messages(
+        self,
+        thread_id: str,
+        agent_id: Optional[str] = None,
+        since_timestamp: Optional[datetime] = None,
+        limit: int = 50,
+        after_seq: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Get a thread's messages.
+
+        Args:
+            thread_id: Thread identifier
+            agent_id: Only messages this agent can see (public posts, its own
+                messages and DMs, its group channels); None for all
+            since_timestamp: Only get messages after this time
+            limit: Maximum number of messages to retrieve
+            after_seq: Only get messages after this sequence number (takes
+                precedence over since_timestamp)
+
+        Returns:
+            list: List of message dictionaries
+        """
+        try:
+            match = None
+            if agent_id:
+                channels = await self.get_agent_channels(agent_id)
+                match = lambda msg: _is_visible_to(msg, agent_id, channels)  # noqa: E731
+            return await self._select_messages(
+                [_thread_key("messages", thread_id)], since_timestamp, after_seq, limit, match
             )
 
-            if not inactive_agents:
-                return 0
+        except Exception as e:
+            logger.error(f"Failed to get messages of thread {thread_id}: {e}")
+            return []
+
+    async def poll(
+        self,
+        agent_id: str,
+        description: Optional[str] = None,
+        outgoing: Optional[List[Dict[str, Any]]] = None,
+        after_seq: Optional[int] = None,
+        since_timestamp: Optional[datetime] = None,
+        limit: int = 100,
+        thread_id: Optional[str] = None
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Heartbeat, send and fetch an agent's inbox.
+
+        The heartbeat (registering the agent if it is new), the outgoing
+        messages and the agent's channel list go out in one pipeline; the
+        counters, the inbox streams and (at most every ROSTER_CACHE_SECONDS)
+        the roster are then read in one MULTI, so they share a snapshot.
 
-            # Remove from active set
-            self.redis.zremrangebyscore(REDIS_AGENTS_ACTIVE, "-inf", max_timestamp)
+        Returns the same shape as SQLiteManager.poll(), with the same
+        cursor rules: a stream that filled its limit stops the cursor at its
+        last delivered message, so each message is delivered exactly once.
+
+        Args:
+            agent_id: Polling agent ID
+            description: New context summary (None keeps the current one)
+            outgoing: Messages to send, as dicts with message_id, content and
+                optional to_agent / thread_id / channel (a group channel)
+            after_seq: Only get messages after this sequence number (takes
+                precedence over since_timestamp)
+            since_timestamp: Only get messages after this time
+            limit: Maximum number of public messages, of DMs and of messages
+                per group channel
+            thread_id: Read only this thread
+
+        Returns:
+            dict: messages (oldest first), cursor, public_count, dm_count,
+                group_count, channels (the agent's group channels) and agents
+                (active roster, see active_roster()), or None if the poll
+                failed
+        """
+        try:
+            now = datetime.utcnow()
+            lookback = after_seq is None and since_timestamp
+            heartbeat_keys, heartbeat_args = self._heartbeat_args(agent_id, now, True, description)
+            append = self._append_args(self._message_rows(agent_id, outgoing, now), now) if outgoing else None
+
+            def queue_writes(pipe: Pipeline):
+                pipe.evalsha(self._heartbeat.sha, len(heartbeat_keys), *heartbeat_keys, *heartbeat_args)
+                if append:
+                    pipe.evalsha(self._append.sha, len(append[0]), *append[0], *append[1])
+                pipe.smembers(REDIS_AGENT_CHANNELS_PREFIX + agent_id)
+                if lookback:
+                    pipe.zrangebyscore(
+                        REDIS_MESSAGES_TIMELINE, f"({_time_score(since_timestamp)}", "+inf", start=0, num=1
+                    )
+
+            results = await self._pipeline(queue_writes, transaction=False)
+            if results[0] > 1:
+                self._roster = None
+            if outgoing:
+                self.notifier.notify()
+            channels = sorted(results[2 if append else 1])
+            if lookback and results[-1]:
+                after_seq = int(results[-1][0]) - 1
+
+            inbox_keys = [REDIS_MESSAGES_PUBLIC, _inbox_key(agent_id), *(_channel_key(name) for name in channels)]
+            read_streams = thread_id is None and after_seq is not None
+            roster = self._roster_expired()
+
+            def queue_reads(pipe: Pipeline):
+                pipe.get(REDIS_SEQ)
+                for key in inbox_keys:
+                    pipe.zcard(key)
+                if read_streams:
+                    for key in inbox_keys:
+                        pipe.zrangebyscore(key, f"({after_seq}", "+inf", start=0, num=limit)
+                if roster:
+                    self._queue_agents(pipe, include_stale=False)
+
+            results = await self._pipeline(queue_reads)
+            head_seq = int(results[0] or 0)
+            counts = results[1:1 + len(inbox_keys)]
+            if roster:
+                self._roster = (time.monotonic(), self._agents_from(results[-1 - len(AGENT_HASH_FIELDS):]))
+            totals = {
+                "public_count": counts[0],
+                "dm_count": counts[1],
+                "group_count": sum(counts[2:]),
+                "channels": channels,
+            }
+
+            if thread_id is not None:
+                return await self._poll_thread(agent_id, thread_id, channels, head_seq, totals,
+                                               after_seq, since_timestamp, limit)
+
+            if after_seq is None:
+                # No cursor (or nothing since the lookback point): start at the head
+                after_seq = head_seq
+            streams = []
+            if read_streams:
+                streams = [_decode(page) for page in results[1 + len(inbox_keys):1 + 2 * len(inbox_keys)]]
+
+            # A full stream stops the cursor at its limit-th message; a
+            # complete one has delivered everything up to head_seq
+            cursor_seq = max(head_seq, after_seq)
+            for stream in streams:
+                if len(stream) >= limit:
+                    cursor_seq = min(cursor_seq, stream[limit - 1]['seq'])
+
+            messages = [
+                msg for msg in heapq.merge(*streams, key=itemgetter('seq'))
+                if msg['seq'] <= cursor_seq
+            ]
+            return dict(totals, messages=messages, cursor=cursor_seq, agents=self.active_roster())
+
+        except Exception as e:
+            logger.error(f"Failed to poll for {agent_id}: {e}")
+            return None
+
+    async def _poll_thread(
+        self,
+        agent_id: str,
+        thread_id: str,
+        channels: List[str],
+        head_seq: int,
+        totals: Dict[str, Any],
+        after_seq: Optional[int],
+        since_timestamp: Optional[datetime],
+        limit: int
+    ) -> Dict[str, Any]:
+        """The thread read of a poll (see poll()); errors propagate"""
+        messages = await self._select_messages(
+            [_thread_key("messages", thread_id)],
+            None if after_seq is not None else since_timestamp,
+            after_seq,
+            limit,
+            lambda msg: _is_visible_to(msg, agent_id, channels)
+        )
 
-            # Update agent status to inactive
-            for agent_id in inactive_agents:
-                agent_key = f"{REDIS_AGENT_PREFIX}{agent_id}"
-                self.redis.hset(agent_key, "status", "inactive")
+        # head_seq was read first, so a page that is not full has delivered
+        # every message of the thread up to it
+        if len(messages) >= limit:
+            cursor_seq = messages[-1]['seq']
+        else:
+            cursor_seq = max(head_seq, after_seq or 0, messages[-1]['seq'] if messages else 0)
 
-            logger.info(f"Cleaned up {len(inactive_agents)} inactive agents")
-            return len(inactive_agents)
+        return dict(totals, messages=messages, cursor=cursor_seq, agents=self.active_roster())
 
-        except RedisError as e:
+    async def cleanup_inactive_agents(self) -> int:
+        """
+        Mark agents that haven't sent heartbeat in removal_threshold seconds inactive.
+
+        Returns:
+            int: Number of agents removed
+        """
+        try:
+            cutoff = datetime.utcnow().timestamp() - settings.removal_threshold
+            count = await self._inactive_agents(
+                keys=[REDIS_AGENTS_ACTIVE, _agent_key("status")],
+                args=[cutoff, AGENT_STATUS_INACTIVE]
+            )
+            if count > 0:
+                self._roster = None
+                logger.info(f"Cleaned up {count} inactive agents")
+
+            return count
+
+        except Exception as e:
             logger.error(f"Failed to cleanup inactive agents: {e}")
             return 0
 
-    def agent_name_exists(self, agent_id: str) -> bool:
+    async def archive_messages(self) -> int:
+        """
+        Archiving is not supported by the Redis backend.
+
+        Returns:
+            int: Always 0
+        """
+        return 0
+
+    async def prune_messages(self) -> int:
+        """
+        Delete messages older than retention_max_age_hours.
+
+        The per-channel and per-DM-pair limits are applied as messages are
+        appended, so only the age limit is left. Everything up to the newest
+        message sent before the cutoff is removed from every index.
+
+        Returns:
+            int: Number of messages deleted from the log
+        """
+        if settings.retention_max_age_hours <= 0:
+            return 0
+
+        try:
+            cutoff = _time_score(datetime.utcnow() - timedelta(hours=settings.retention_max_age_hours))
+            newest, indexes = await self._pipeline(lambda pipe: (
+                pipe.zrevrangebyscore(REDIS_MESSAGES_TIMELINE, f"({cutoff}", "-inf", start=0, num=1),
+                pipe.smembers(REDIS_MESSAGE_INDEXES)
+            ))
+            if not newest:
+                return 0
+
+            boundary = int(newest[0])
+            results = await self._pipeline(lambda pipe: [
+                pipe.zremrangebyscore(REDIS_MESSAGES_LOG, "-inf", boundary),
+                pipe.zremrangebyscore(REDIS_MESSAGES_TIMELINE, "-inf", f"({cutoff}"),
+                *(pipe.zremrangebyscore(key, "-inf", boundary) for key in indexes)
+            ])
+            deleted = results[0]
+            if deleted > 0:
+                logger.info(f"Pruned {deleted} messages past retention limits")
+
+            return deleted
+
+        except Exception as e:
+            logger.error(f"Failed to prune messages: {e}")
+            return 0
+
+    async def reclaim_space(self, max_pages: Optional[int] = None) -> int:
+        """
+        Redis frees memory as keys shrink; there is nothing to reclaim.
+
+        Returns:
+            int: Always 0
+        """
+        return 0
+
+    async def agent_name_exists(self, agent_id: str) -> bool:
         """
         Check if an agent name is already registered.
 
@@ -429,65 +1399,106 @@ class RedisManager:
             bool: True if name exists
         """
         try:
-            agent_key = f"{REDIS_AGENT_PREFIX}{agent_id}"
-            return self.redis.exists(agent_key) > 0
-        except RedisError as e:
+            return bool(await self.redis.hexists(_agent_key("registered_at"), agent_id))
+
+        except Exception as e:
             logger.error(f"Failed to check agent name existence: {e}")
             return False
 
-    def get_stats(self) -> Dict[str, Any]:
+    async def get_stats(self) -> Dict[str, Any]:
         """
-        Get Redis statistics.
+        Get storage statistics.
 
         Returns:
             dict: Statistics including agent counts, message counts, etc.
         """
         try:
-            active_agents = self.redis.zcard(REDIS_AGENTS_ACTIVE)
-            public_messages = self.redis.llen(REDIS_MESSAGES_PUBLIC)
-
-            # Count DM channels
-            dm_pattern = f"{REDIS_MESSAGES_DM_PREFIX}*"
-            dm_keys = []
-            cursor = 0
-            while True:
-                cursor, keys = self.redis.scan(cursor, match=dm_pattern, count=100)
-                dm_keys.extend(keys)
-                if cursor == 0:
-                    break
+            active_agents, public_messages, dm_channels = await self._pipeline(lambda pipe: (
+                pipe.zcard(REDIS_AGENTS_ACTIVE),
+                pipe.zcard(REDIS_MESSAGES_PUBLIC),
+                pipe.scard(REDIS_MESSAGES_DM_PAIRS)
+            ))
 
             return {
                 "active_agents": active_agents,
                 "public_messages": public_messages,
-                "dm_channels": len(dm_keys),
-                "redis_connected": True
+                "dm_channels": dm_channels,
+                "database_connected": True
             }
 
-        except RedisError as e:
+        except Exception as e:
             logger.error(f"Failed to get stats: {e}")
             return {
                 "active_agents": 0,
                 "public_messages": 0,
                 "dm_channels": 0,
-                "redis_connected": False
+                "database_connected": False
             }
 
-    def close(self):
-        """Close Redis connection pool"""
+    async def get_public_message_count(self) -> int:
+        """
+        Get total count of public messages.
+
+        Returns:
+            int: Number of public messages
+        """
+        try:
+            return await self.redis.zcard(REDIS_MESSAGES_PUBLIC)
+        except Exception as e:
+            logger.error(f"Failed to count public messages: {e}")
+            return 0
+
+    async def get_dm_message_count(self, agent_id: str) -> int:
+        """
+        Get total count of DMs for an agent (sent or received).
+
+        Args:
+            agent_id: Agent ID
+
+        Returns:
+            int: Number of DM messages
+        """
+        try:
+            return await self.redis.zcard(_inbox_key(agent_id))
+        except Exception as e:
+            logger.error(f"Failed to count DM messages: {e}")
+            return 0
+
+    async def get_dm_pair_message_count(self, agent_id: str, other_agent_id: str) -> int:
+        """
+        Get total count of DMs exchanged between two agents.
+
+        Args:
+            agent_id: Agent ID
+            other_agent_id: Other agent ID
+
+        Returns:
+            int: Number of DM messages in either direction
+        """
+        try:
+            return await self.redis.zcard(_dm_key(agent_id, other_agent_id))
+        except Exception as e:
+            logger.error(f"Failed to count DM messages between {agent_id} and {other_agent_id}: {e}")
+            return 0
+
+    async def close(self):
+        """Stop long-poll waiters and close the connection pool"""
         try:
-            self.pool.disconnect()
-            logger.info("Redis connection pool closed")
+            await self.notifier.close()
+            await self.redis.aclose()
+            logger.info("Redis connection closed")
         except Exception as e:
-            logger.error(f"Error closing Redis connection pool: {e}")
+            logger.error(f"Error closing Redis connection: {e}")
 
 
 # Global Redis manager instance
 redis_manager: Optional[RedisManager] = None
 
 
-def get_redis_manager() -> RedisManager:
+async def get_redis_manager() -> RedisManager:
     """Get or create global Redis manager instance"""
     global redis_manager
     if redis_manager is None:
         redis_manager = RedisManager()
+        await redis_manager.initialize()
     return redis_manager
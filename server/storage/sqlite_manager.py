@@ -1,9 +1,15 @@
 """SQLite storage manager for HIVE"""
+import asyncio
+import heapq
 import json
 import logging
+import time
 import aiosqlite
-from datetime import datetime
-from typing import Optional, List, Dict, Any
+from collections import deque
+from contextlib import asynccontextmanager
+from operator import itemgetter
+from datetime import datetime, timedelta
+from typing import Optional, List, Dict, Any, AsyncIterator, Callable, Iterable, Tuple
 from pathlib import Path
 
 from server.config import settings
@@ -13,97 +19,617 @@ from shared.constants import (
     CHANNEL_DM
 )
 from server.models.message import create_dm_channel_key
+from server.storage.agent_registry import AgentRecord, AgentRegistry
+from server.storage.archive import MessageArchive
+from server.storage.backend import StorageBackend
+from server.storage.message_cache import RecentMessageCache
+from server.storage.notifier import MessageNotifier
+from server.storage.migrations import (
+    COUNTER_AGENT_DM,
+    COUNTER_CHANNEL,
+    COUNTER_DM_PAIR,
+    COUNTER_TOTAL,
+    DM_CHANNELS_KEY,
+    apply_migrations
+)
+from server.storage.write_batcher import WriteBatcher
 
 logger = logging.getLogger(__name__)
 
+# PRAGMA auto_vacuum value for INCREMENTAL
+AUTO_VACUUM_INCREMENTAL = 2
+
+# Longest a cached active roster is reused while the registry is unchanged;
+# agents going stale (or fresh again) do not move the registry version
+ROSTER_CACHE_SECONDS = 1.0
+
+# Hot-path SQL. Kept at module level so test_query_plans.py can check every
+# one of them with EXPLAIN QUERY PLAN.
+
+# Messages in a channel after a cursor, oldest first
+SQL_CHANNEL_AFTER = """
+    SELECT * FROM messages
+    WHERE channel = :channel AND seq > :after
+    ORDER BY seq ASC
+    LIMIT :limit
+"""
+
+# Newest messages in a channel
+SQL_CHANNEL_LATEST = """
+    SELECT * FROM messages
+    WHERE channel = :channel
+    ORDER BY seq DESC
+    LIMIT :limit
+"""
+
+# DMs sent or received by an agent. Each side is a bounded seek on its own
+# index; only DMs have a to_agent, so the received side needs no channel term.
+SQL_DM_AFTER = """
+    SELECT * FROM messages WHERE seq IN (
+        SELECT seq FROM (
+            SELECT seq FROM messages
+            WHERE to_agent = :agent AND seq > :after
+            ORDER BY seq ASC LIMIT :limit
+        )
+        UNION ALL
+        SELECT seq FROM (
+            SELECT seq FROM messages
+            WHERE from_agent = :agent AND channel = :channel AND seq > :after
+            ORDER BY seq ASC LIMIT :limit
+        )
+    )
+    ORDER BY seq ASC
+    LIMIT :limit
+"""
+
+SQL_DM_LATEST = """
+    SELECT * FROM messages WHERE seq IN (
+        SELECT seq FROM (
+            SELECT seq FROM messages
+            WHERE to_agent = :agent
+            ORDER BY seq DESC LIMIT :limit
+        )
+        UNION ALL
+        SELECT seq FROM (
+            SELECT seq FROM messages
+            WHERE from_agent = :agent AND channel = :channel
+            ORDER BY seq DESC LIMIT :limit
+        )
+    )
+    ORDER BY seq DESC
+    LIMIT :limit
+"""
+
+# DMs between two agents, in either direction: one bounded seek per direction
+SQL_DM_PAIR_AFTER = """
+    SELECT * FROM messages WHERE seq IN (
+        SELECT seq FROM (
+            SELECT seq FROM messages
+            WHERE to_agent = :agent AND from_agent = :other AND seq > :after
+            ORDER BY seq ASC LIMIT :limit
+        )
+        UNION ALL
+        SELECT seq FROM (
+            SELECT seq FROM messages
+            WHERE to_agent = :other AND from_agent = :agent AND seq > :after
+            ORDER BY seq ASC LIMIT :limit
+        )
+    )
+    ORDER BY seq ASC
+    LIMIT :limit
+"""
+
+SQL_DM_PAIR_LATEST = """
+    SELECT * FROM messages WHERE seq IN (
+        SELECT seq FROM (
+            SELECT seq FROM messages
+            WHERE to_agent = :agent AND from_agent = :other
+            ORDER BY seq DESC LIMIT :limit
+        )
+        UNION ALL
+        SELECT seq FROM (
+            SELECT seq FROM messages
+            WHERE to_agent = :other AND from_agent = :agent
+            ORDER BY seq DESC LIMIT :limit
+        )
+    )
+    ORDER BY seq DESC
+    LIMIT :limit
+"""
+
+# First message stamped after a point in time (resolves lookback windows to a
+# cursor). Walks the timestamp index rather than MIN(seq), which would scan
+# the table in seq order until the first match.
+SQL_FIRST_SEQ_SINCE = """
+    SELECT seq FROM messages
+    WHERE timestamp > ?
+    ORDER BY timestamp ASC
+    LIMIT 1
+"""
+
+SQL_LATEST_SEQ = "SELECT MAX(seq) AS seq FROM messages"
+
+# Every message after a cursor, in log order (stream fan-out and backfill)
+SQL_MESSAGES_AFTER = "SELECT * FROM messages WHERE seq > ? ORDER BY seq ASC LIMIT ?"
+
+# Messages after a cursor, counted along the primary key (checks that the
+# message cache still holds everything after its floor)
+SQL_COUNT_AFTER = "SELECT COUNT(*) AS count FROM messages WHERE seq > ?"
+
+# Newest messages, newest first: fills the message cache on startup and after
+# deletes, walking the primary key backwards from the end
+SQL_RECENT_MESSAGES = "SELECT * FROM messages ORDER BY seq DESC LIMIT ?"
+
+# Highest seq ever assigned, even if that message has since been deleted
+SQL_SEQ_HIGH_WATER = "SELECT seq FROM sqlite_sequence WHERE name = 'messages'"
+
+# Message counts are maintained by triggers (see migrations._message_counters),
+# so each count is a primary-key lookup rather than an index range count
+SQL_COUNTER = "SELECT count FROM message_counters WHERE scope = ? AND key = ?"
+
+# Flush of a write-behind heartbeat; never moves a newer one back
+SQL_FLUSH_HEARTBEAT = """
+    UPDATE agents SET last_heartbeat = :now, status = :status
+    WHERE agent_id = :agent AND last_heartbeat < :now
+"""
+
+# Agents past the removal threshold
+SQL_INACTIVE_AGENTS = """
+    UPDATE agents SET status = 'inactive'
+    WHERE last_heartbeat < ? AND status = ?
+"""
+
+# Columns of the messages table, in table order; an inserted row is its seq
+# followed by the SQL_INSERT_MESSAGE parameters
+MESSAGE_FIELDS = ("seq", "message_id", "from_agent", "to_agent", "channel", "content", "timestamp", "thread_id")
+
+SQL_INSERT_MESSAGE = """
+    INSERT INTO messages
+    (message_id, from_agent, to_agent, channel, content, timestamp, thread_id)
+    VALUES (?, ?, ?, ?, ?, ?, ?)
+"""
+
+# Poll heartbeat: registers the agent if needed, refreshes its heartbeat and
+# replaces its context summary only when a new one is given
+SQL_POLL_HEARTBEAT = """
+    INSERT INTO agents (agent_id, context_summary, registered_at, last_heartbeat, status)
+    VALUES (:agent, :context, :now, :now, :status)
+    ON CONFLICT(agent_id) DO UPDATE SET
+        last_heartbeat = excluded.last_heartbeat,
+        status = excluded.status,
+        context_summary = COALESCE(:context, agents.context_summary)
+"""
+
+# Head of the log plus the poll's counters and the agent's group channels
+# (comma-separated; channel names cannot contain commas), in one row
+SQL_POLL_COUNTS = f"""
+    SELECT
+        (SELECT MAX(seq) FROM messages) AS head_seq,
+        (SELECT count FROM message_counters
+         WHERE scope = '{COUNTER_CHANNEL}' AND key = :public) AS public_count,
+        (SELECT count FROM message_counters
+         WHERE scope = '{COUNTER_AGENT_DM}' AND key = :agent) AS dm_count,
+        (SELECT group_concat(channel) FROM channel_members
+         WHERE agent_id = :agent) AS channels,
+        (SELECT SUM(count) FROM message_counters
+         WHERE scope = '{COUNTER_CHANNEL}' AND key IN (
+             SELECT channel FROM channel_members WHERE agent_id = :agent
+         )) AS group_count
+"""
+
+# Everything a poll delivers: public posts, DMs received and DMs sent after a
+# cursor. Each stream is its own bounded seek, so the cost depends on the
+# page size, not the table size.
+SQL_POLL_INBOX = """
+    SELECT * FROM messages WHERE seq IN (
+        SELECT seq FROM (
+            SELECT seq FROM messages
+            WHERE channel = :public AND seq > :after
+            ORDER BY seq ASC LIMIT :limit
+        )
+        UNION ALL
+        SELECT seq FROM (
+            SELECT seq FROM messages
+            WHERE to_agent = :agent AND seq > :after
+            ORDER BY seq ASC LIMIT :limit
+        )
+        UNION ALL
+        SELECT seq FROM (
+            SELECT seq FROM messages
+            WHERE from_agent = :agent AND channel = :dm AND seq > :after
+            ORDER BY seq ASC LIMIT :limit
+        )
+    )
+    ORDER BY seq ASC
+"""
+
+# Group channels. A group message is stored once, in messages.channel, and
+# members read it through their membership: the primary key lists a
+# channel's members, idx_channel_members_agent an agent's channels.
+SQL_CREATE_CHANNEL = """
+    INSERT INTO channels (name, description, created_by, created_at)
+    VALUES (:channel, :description, :agent, :now)
+    ON CONFLICT(name) DO NOTHING
+"""
+
+# Joins only channels that exist; rejoining keeps the original joined_at
+SQL_JOIN_CHANNEL = """
+    INSERT OR IGNORE INTO channel_members (channel, agent_id, joined_at)
+    SELECT name, :agent, :now FROM channels WHERE name = :channel
+"""
+
+# Creator's membership, written with SQL_CREATE_CHANNEL: matches only the row
+# that statement inserted, so a name that was already taken joins no one
+SQL_JOIN_CREATED_CHANNEL = """
+    INSERT OR IGNORE INTO channel_members (channel, agent_id, joined_at)
+    SELECT name, created_by, created_at FROM channels
+    WHERE name = :channel AND created_by = :agent AND created_at = :now
+"""
+
+SQL_LEAVE_CHANNEL = "DELETE FROM channel_members WHERE channel = ? AND agent_id = ?"
+
+SQL_IS_MEMBER = "SELECT 1 FROM channel_members WHERE channel = ? AND agent_id = ?"
+
+SQL_CHANNEL_MEMBERS = "SELECT agent_id FROM channel_members WHERE channel = ? ORDER BY agent_id"
+
+SQL_AGENT_CHANNELS = "SELECT channel FROM channel_members WHERE agent_id = ? ORDER BY channel"
+
+# Channel details with member and message counts
+SQL_CHANNEL_INFO = f"""
+    SELECT
+        channels.*,
+        (SELECT COUNT(*) FROM channel_members
+         WHERE channel = channels.name) AS member_count,
+        COALESCE((SELECT count FROM message_counters
+                  WHERE scope = '{COUNTER_CHANNEL}' AND key = channels.name), 0) AS message_count
+    FROM channels
+"""
+
+# A thread's messages after a cursor, or its newest, seeking the partial
+# idx_messages_thread_seq. With :agent set, only messages that agent can see:
+# public posts, its own messages and DMs, and its group channels.
+_THREAD_VISIBLE = """
+    (:agent IS NULL
+     OR channel = :public
+     OR to_agent = :agent
+     OR from_agent = :agent
+     OR channel IN (SELECT channel FROM channel_members WHERE agent_id = :agent))
+"""
+
+SQL_THREAD_AFTER = f"""
+    SELECT * FROM messages
+    WHERE thread_id = :thread AND seq > :after AND {_THREAD_VISIBLE}
+    ORDER BY seq ASC
+    LIMIT :limit
+"""
+
+SQL_THREAD_LATEST = f"""
+    SELECT * FROM messages
+    WHERE thread_id = :thread AND {_THREAD_VISIBLE}
+    ORDER BY seq DESC
+    LIMIT :limit
+"""
+
+# Thread summaries are maintained by triggers (see migrations._threads)
+SQL_THREAD_SUMMARY = "SELECT * FROM threads WHERE thread_id = ?"
+
+SQL_THREAD_PARTICIPANTS = "SELECT agent_id FROM thread_participants WHERE thread_id = ? ORDER BY agent_id"
+
+# Retention: each statement deletes at most :limit of the oldest matching
+# messages, so the pruner holds the write lock only briefly per batch
+SQL_PRUNE_BEFORE = """
+    DELETE FROM messages WHERE seq IN (
+        SELECT seq FROM messages
+        WHERE timestamp < :cutoff
+        ORDER BY timestamp ASC LIMIT :limit
+    )
+"""
+
+SQL_PRUNE_CHANNEL = """
+    DELETE FROM messages WHERE seq IN (
+        SELECT seq FROM messages
+        WHERE channel = :channel
+        ORDER BY seq ASC LIMIT :limit
+    )
+"""
+
+SQL_PRUNE_DM_PAIR = """
+    DELETE FROM messages WHERE seq IN (
+        SELECT seq FROM messages WHERE seq IN (
+            SELECT seq FROM (
+                SELECT seq FROM messages
+                WHERE to_agent = :agent AND from_agent = :other
+                ORDER BY seq ASC LIMIT :limit
+            )
+            UNION ALL
+            SELECT seq FROM (
+                SELECT seq FROM messages
+                WHERE to_agent = :other AND from_agent = :agent
+                ORDER BY seq ASC LIMIT :limit
+            )
+        )
+        ORDER BY seq ASC LIMIT :limit
+    )
+"""
+
+# Archiving walks the hot table in seq order from its oldest message
+SQL_ARCHIVE_BATCH = "SELECT * FROM messages WHERE seq < ? ORDER BY seq ASC LIMIT ?"
+
+SQL_OLDEST_MESSAGE = "SELECT seq, timestamp FROM messages WHERE seq = (SELECT MIN(seq) FROM messages)"
+
+SQL_COUNTERS_OVER = "SELECT key, count FROM message_counters WHERE scope = ? AND count > ?"
+
+
+class _ReaderPool:
+    """
+    Read-only connections handed out first come, first served.
 
-class SQLiteManager:
-    """Manages all SQLite operations for HIVE"""
+    A released connection goes straight to the longest-waiting borrower.
+    (asyncio.Queue would let a borrower arriving in between take it, and
+    under load the same waiters can lose that race again and again.)
+    """
 
-    def __init__(self, db_path: Optional[str] = None):
+    def __init__(self, connections: List[aiosqlite.Connection]):
+        self._idle: List[aiosqlite.Connection] = list(connections)
+        self._waiters: deque = deque()
+
+    async def acquire(self) -> aiosqlite.Connection:
+        if self._idle and not self._waiters:
+            return self._idle.pop()
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            return await waiter
+        except asyncio.CancelledError:
+            # Cancelled after being handed a connection: pass it on
+            if waiter.done() and not waiter.cancelled():
+                self.release(waiter.result())
+            raise
+
+    def release(self, conn: aiosqlite.Connection):
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(conn)
+                return
+        self._idle.append(conn)
+
+
+def _is_dm_of(msg: Dict[str, Any], agent_id: str) -> bool:
+    """Whether an archived message is a DM sent or received by agent_id"""
+    return msg['to_agent'] == agent_id or (msg['from_agent'] == agent_id and msg['channel'] == CHANNEL_DM)
+
+
+def _message_channel(to_agent: Optional[str], channel: Optional[str] = None) -> str:
+    """
+    Channel a new message is stored in: its group channel, DM or public.
+
+    Raises:
+        ValueError: If the message has both a group channel and a to_agent;
+            reads would file it as a DM in SQL and as a group message in
+            the cache
+    """
+    if channel:
+        if to_agent:
+            raise ValueError(f"A message cannot be both a DM to {to_agent} and in channel {channel}")
+        return channel
+    return CHANNEL_DM if to_agent else CHANNEL_PUBLIC
+
+
+def _is_visible_to(msg: Dict[str, Any], agent_id: str, channels: Iterable[str]) -> bool:
+    """Whether an archived message passes SQL_THREAD_AFTER's visibility filter"""
+    return (
+        msg['channel'] == CHANNEL_PUBLIC
+        or agent_id in (msg['to_agent'], msg['from_agent'])
+        or msg['channel'] in channels
+    )
+
+
+def _split_channels(value: Optional[str]) -> List[str]:
+    """Group channel names from SQL_POLL_COUNTS' comma-separated list, sorted"""
+    return sorted(value.split(",")) if value else []
+
+
+class SQLiteManager(StorageBackend):
+    """
+    Manages all SQLite operations for HIVE.
+
+    The database runs in WAL mode with a single writer connection and a pool
+    of read-only connections. Every write goes through the writer (serialized
+    by an asyncio lock), while poll/whois queries borrow a reader, so readers
+    never wait on writers and each reader runs on its own aiosqlite thread.
+
+    Writes are queued on a WriteBatcher, which group-commits concurrent
+    messages and heartbeats into one transaction per few-millisecond window.
+
+    With archiving enabled, messages past archive_after_hours move to a
+    MessageArchive. History reads (timestamps or cursors older than the hot
+    table) merge archived messages in; live polls never reach them.
+
+    Agents are served from an in-memory AgentRegistry, loaded on startup and
+    re-read at most every agent_sync_interval seconds to pick up other
+    processes' changes. Heartbeats are written behind: they update the
+    registry and reach the database in one batch every
+    agent_heartbeat_flush_interval seconds.
+
+    The newest messages are also kept in a RecentMessageCache, filled as
+    messages are sent. Cursor reads near the head of the log (polls,
+    stream backfill, channel and DM reads after a seq) are answered from
+    it; older cursors fall through to the database.
+    """
+
+    def __init__(self, db_path: Optional[str] = None, read_pool_size: Optional[int] = None):
         """
         Initialize SQLite manager.
 
         Args:
             db_path: Path to SQLite database file (uses settings if not provided)
+            read_pool_size: Number of read-only connections (uses settings if not provided)
         """
         self.db_path = db_path or settings.sqlite_db_path
-        # Ensure data directory exists
-        Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
+        self.in_memory = self.db_path == ":memory:"
+        if not self.in_memory:
+            # Ensure data directory exists
+            Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
+        if read_pool_size is None:
+            read_pool_size = settings.sqlite_read_pool_size
+        # An in-memory database is private to its connection, so reads share the writer
+        self.read_pool_size = 0 if self.in_memory else max(read_pool_size, 0)
         self._connection: Optional[aiosqlite.Connection] = None
+        self._readers: List[aiosqlite.Connection] = []
+        self._reader_pool: Optional[_ReaderPool] = None
+        self._write_lock = asyncio.Lock()
+        self.notifier = MessageNotifier(self.get_latest_seq, settings.long_poll_check_interval)
+        self.agents = AgentRegistry()
+        self._agents_synced_at: Optional[float] = None
+        self._flush_task: Optional[asyncio.Task] = None
+        self._roster: Optional[Tuple[int, float, List[Dict[str, Any]]]] = None
+        self.cache: Optional[RecentMessageCache] = None
+        if settings.message_cache_size > 0:
+            self.cache = RecentMessageCache(settings.message_cache_size, max(settings.message_cache_dm_size, 1))
+        self._data_version: Optional[int] = None
+        self.archive: Optional[MessageArchive] = None
+        if settings.archive_after_hours > 0:
+            self.archive = MessageArchive(settings.archive_dir)
+        self._batcher = WriteBatcher(
+            self.get_connection,
+            self._write_lock,
+            max_batch_size=settings.write_batch_max_size,
+            max_delay=settings.write_batch_max_delay_ms / 1000
+        )
         logger.info(f"SQLite database path: {self.db_path}")
 
     async def initialize(self):
-        """Initialize database schema"""
-        conn = await self.get_connection()
-
-        # Create agents table
-        await conn.execute("""
-            CREATE TABLE IF NOT EXISTS agents (
-                agent_id TEXT PRIMARY KEY,
-                context_summary TEXT,
-                registered_at TEXT NOT NULL,
-                last_heartbeat TEXT NOT NULL,
-                status TEXT DEFAULT 'active',
-                endpoint TEXT
-            )
-        """)
-
-        # Create messages table
-        await conn.execute("""
-            CREATE TABLE IF NOT EXISTS messages (
-                message_id TEXT PRIMARY KEY,
-                from_agent TEXT NOT NULL,
-                to_agent TEXT,
-                channel TEXT NOT NULL,
-                content TEXT NOT NULL,
-                timestamp TEXT NOT NULL,
-                thread_id TEXT,
-                FOREIGN KEY (from_agent) REFERENCES agents(agent_id)
-            )
-        """)
-
-        # Create indexes for performance
-        await conn.execute("""
-            CREATE INDEX IF NOT EXISTS idx_agents_heartbeat
-            ON agents(last_heartbeat)
-        """)
-
-        await conn.execute("""
-            CREATE INDEX IF NOT EXISTS idx_agents_status
-            ON agents(status)
-        """)
-
-        await conn.execute("""
-            CREATE INDEX IF NOT EXISTS idx_messages_timestamp
-            ON messages(timestamp DESC)
-        """)
-
-        await conn.execute("""
-            CREATE INDEX IF NOT EXISTS idx_messages_channel
-            ON messages(channel)
-        """)
-
-        await conn.execute("""
-            CREATE INDEX IF NOT EXISTS idx_messages_from
-            ON messages(from_agent)
-        """)
-
-        await conn.execute("""
-            CREATE INDEX IF NOT EXISTS idx_messages_to
-            ON messages(to_agent)
-        """)
-
-        await conn.commit()
-        logger.info("Database schema initialized")
+        """Initialize database schema, applying any pending migrations"""
+        async with self._write_lock:
+            conn = await self.get_connection()
+            version = await apply_migrations(conn)
+            if not self.in_memory:
+                await self._enable_incremental_vacuum(conn)
+        logger.info(f"Database schema initialized (version {version})")
+
+        await self._open_readers()
+        await self._sync_agents(force=True)
+        logger.info(f"Loaded {len(self.agents)} agents into the registry")
+        if self.cache is not None:
+            await self._load_cache()
+            logger.info(f"Loaded {len(self.cache)} messages into the message cache")
+
+    async def _enable_incremental_vacuum(self, conn: aiosqlite.Connection):
+        """
+        Switch a database created without auto-vacuum to incremental mode.
+
+        The mode can only change through a full VACUUM, so this rewrites the
+        file once; afterwards reclaim_space() returns free pages in small steps.
+        The rewrite blocks startup and every writer until it finishes, and
+        needs about the database's size in free disk space.
+        """
+        async with conn.execute("PRAGMA auto_vacuum") as cursor:
+            row = await cursor.fetchone()
+        if row[0] == AUTO_VACUUM_INCREMENTAL:
+            return
+
+        size_mb = Path(self.db_path).stat().st_size / (1024 * 1024)
+        logger.warning(
+            f"Enabling incremental auto-vacuum: one-time full VACUUM of {self.db_path} ({size_mb:.1f} MB); "
+            f"startup and writes wait until it finishes"
+        )
+        started = time.monotonic()
+        await conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+        await conn.execute("VACUUM")
+        logger.warning(f"Incremental auto-vacuum enabled after {time.monotonic() - started:.1f}s")
+
+    async def _configure(self, conn: aiosqlite.Connection):
+        """Apply per-connection pragmas"""
+        conn.row_factory = aiosqlite.Row
+        await conn.execute(f"PRAGMA busy_timeout = {int(settings.sqlite_busy_timeout_ms)}")
 
     async def get_connection(self) -> aiosqlite.Connection:
-        """Get or create database connection"""
+        """Get or create the writer connection"""
         if self._connection is None:
-            self._connection = await aiosqlite.connect(self.db_path)
-            self._connection.row_factory = aiosqlite.Row
+            conn = await aiosqlite.connect(self.db_path)
+            await self._configure(conn)
+            if not self.in_memory:
+                # Takes effect on new databases; initialize() converts old ones
+                await conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+                await conn.execute("PRAGMA journal_mode = WAL")
+                await conn.execute(f"PRAGMA synchronous = {settings.sqlite_synchronous}")
+            self._connection = conn
         return self._connection
 
+    async def _open_readers(self):
+        """Open the pool of read-only connections"""
+        if self._reader_pool is not None or self.read_pool_size == 0:
+            return
+
+        uri = f"{Path(self.db_path).resolve().as_uri()}?mode=ro"
+        for _ in range(self.read_pool_size):
+            conn = await aiosqlite.connect(uri, uri=True)
+            await self._configure(conn)
+            self._readers.append(conn)
+
+        self._reader_pool = _ReaderPool(self._readers)
+        logger.info(f"Opened {self.read_pool_size} read-only SQLite connections")
+
+    @asynccontextmanager
+    async def read_connection(self) -> AsyncIterator[aiosqlite.Connection]:
+        """
+        Borrow a read-only connection from the pool.
+
+        Falls back to the writer connection when no reader pool is open
+        (in-memory databases, or before initialize()).
+        """
+        if self._reader_pool is None:
+            # Hold the write lock so reads never see a half-written batch
+            async with self._write_lock:
+                yield await self.get_connection()
+            return
+
+        pool = self._reader_pool
+        conn = await pool.acquire()
+        try:
+            yield conn
+        finally:
+            pool.release(conn)
+
+    @asynccontextmanager
+    async def read_transaction(self) -> AsyncIterator[aiosqlite.Connection]:
+        """
+        Borrow a reader inside a read transaction.
+
+        Every statement run on the connection sees the same snapshot of the
+        database, however many writes commit in between.
+        """
+        async with self.read_connection() as conn:
+            await conn.execute("BEGIN")
+            try:
+                yield conn
+            finally:
+                await conn.rollback()
+
+    async def _fetchone(self, sql: str, params: Any = ()) -> Optional[aiosqlite.Row]:
+        """Run a query on a pooled reader and return the first row"""
+        async with self.read_connection() as conn:
+            # Closing the cursor ends the statement, releasing its WAL snapshot
+            async with conn.execute(sql, params) as cursor:
+                return await cursor.fetchone()
+
+    async def _fetchall(self, sql: str, params: Any = ()) -> List[aiosqlite.Row]:
+        """Run a query on a pooled reader and return all rows"""
+        async with self.read_connection() as conn:
+            async with conn.execute(sql, params) as cursor:
+                return await cursor.fetchall()
+
+    async def _execute_write(self, sql: str, params: tuple = ()) -> int:
+        """
+        Queue a write statement for group commit and wait until it is committed.
+
+        Returns:
+            int: Number of rows affected
+        """
+        return await self._batcher.execute(sql, params)
+
     async def ping(self) -> bool:
         """
         Test database connection.
@@ -138,9 +664,8 @@ class SQLiteManager:
         """
         try:
             now = datetime.utcnow().isoformat()
-            conn = await self.get_connection()
 
-            await conn.execute(
+            await self._execute_write(
                 """
                 INSERT OR REPLACE INTO agents
                 (agent_id, context_summary, registered_at, last_heartbeat, status, endpoint)
@@ -148,7 +673,7 @@ class SQLiteManager:
                 """,
                 (agent_id, context_summary, now, now, AGENT_STATUS_ACTIVE, endpoint)
             )
-            await conn.commit()
+            self.agents.put(AgentRecord(agent_id, context_summary, now, now, AGENT_STATUS_ACTIVE, endpoint))
 
             logger.info(f"Agent registered: {agent_id}")
             return True
@@ -161,6 +686,9 @@ class SQLiteManager:
         """
         Update agent's last heartbeat timestamp.
 
+        The heartbeat is recorded in the registry and flushed to the
+        database with the next batch.
+
         Args:
             agent_id: Agent identifier
 
@@ -169,51 +697,156 @@ class SQLiteManager:
         """
         try:
             now = datetime.utcnow().isoformat()
-            conn = await self.get_connection()
 
-            cursor = await conn.execute(
-                "UPDATE agents SET last_heartbeat = ?, status = ? WHERE agent_id = ?",
-                (now, AGENT_STATUS_ACTIVE, agent_id)
-            )
-            await conn.commit()
-
-            if cursor.rowcount == 0:
+            if agent_id not in self.agents:
+                # Possibly registered by another process since the last sync
+                await self._sync_agents(force=True)
+            if not self.agents.record_heartbeat(agent_id, now):
                 logger.warning(f"Agent not found for heartbeat: {agent_id}")
                 return False
 
+            self._ensure_flushing()
             return True
 
         except Exception as e:
             logger.error(f"Failed to update heartbeat for {agent_id}: {e}")
             return False
 
-    async def get_agent(self, agent_id: str) -> Optional[Dict[str, Any]]:
+    async def update_agent_context(self, agent_id: str, context_summary: str) -> bool:
         """
-        Get agent details.
+        Update an agent's context summary.
 
         Args:
             agent_id: Agent identifier
+            context_summary: New context description
 
         Returns:
-            dict: Agent data or None if not found
+            bool: True if the agent was found and updated
         """
         try:
-            conn = await self.get_connection()
-            cursor = await conn.execute(
-                "SELECT * FROM agents WHERE agent_id = ?",
-                (agent_id,)
+            rowcount = await self._execute_write(
+                "UPDATE agents SET context_summary = ? WHERE agent_id = ?",
+                (context_summary, agent_id)
             )
-            row = await cursor.fetchone()
+            if rowcount > 0 and not self.agents.set_context(agent_id, context_summary):
+                await self._sync_agents(force=True)
+            return rowcount > 0
 
-            if not row:
-                return None
+        except Exception as e:
+            logger.error(f"Failed to update context for {agent_id}: {e}")
+            return False
+
+    async def get_agent(self, agent_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Get agent details.
+
+        Args:
+            agent_id: Agent identifier
 
-            return dict(row)
+        Returns:
+            dict: Agent data or None if not found
+        """
+        try:
+            record = await self._lookup_agent(agent_id)
+            return record.to_dict() if record else None
 
         except Exception as e:
             logger.error(f"Failed to get agent {agent_id}: {e}")
             return None
 
+    async def get_agents(self, agent_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        Get details of several agents at once.
+
+        Served from the registry; agents it does not know are looked up in
+        the database with a single query.
+
+        Args:
+            agent_ids: Agent identifiers
+
+        Returns:
+            dict: agent_id -> agent data, for the agents that exist
+        """
+        try:
+            await self._sync_agents()
+            missing = sorted({agent_id for agent_id in agent_ids if agent_id not in self.agents})
+            if missing:
+                placeholders = ", ".join("?" * len(missing))
+                for row in await self._fetchall(f"SELECT * FROM agents WHERE agent_id IN ({placeholders})", missing):
+                    self.agents.put(AgentRecord.from_row(row))
+
+            agents = {}
+            for agent_id in agent_ids:
+                record = self.agents.get(agent_id)
+                if record is not None:
+                    agents[agent_id] = record.to_dict()
+            return agents
+
+        except Exception as e:
+            logger.error(f"Failed to get agents: {e}")
+            return {}
+
+    async def _lookup_agent(self, agent_id: str) -> Optional[AgentRecord]:
+        """Find an agent in the registry, falling back to the database on a miss"""
+        await self._sync_agents()
+        record = self.agents.get(agent_id)
+        if record is None:
+            # Registered by another process since the last sync?
+            row = await self._fetchone("SELECT * FROM agents WHERE agent_id = ?", (agent_id,))
+            if row:
+                record = AgentRecord.from_row(row)
+                self.agents.put(record)
+        return record
+
+    async def _sync_agents(self, force: bool = False):
+        """
+        Reload the registry from the database.
+
+        Other processes sharing the database register agents and flush
+        their heartbeats there, so the registry is refreshed when it is
+        older than agent_sync_interval (or always, with force).
+        """
+        now = time.monotonic()
+        if not force and self._agents_synced_at is not None and \
+                now - self._agents_synced_at < settings.agent_sync_interval:
+            return
+        rows = await self._fetchall("SELECT * FROM agents")
+        self.agents.merge(rows)
+        self._agents_synced_at = now
+
+    def _ensure_flushing(self):
+        """Start the heartbeat flush task if it is not running"""
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.create_task(self._flush_loop())
+
+    async def _flush_loop(self):
+        """Flush write-behind heartbeats periodically until none are pending"""
+        while self.agents.has_dirty:
+            await asyncio.sleep(settings.agent_heartbeat_flush_interval)
+            await self.flush_heartbeats()
+
+    async def flush_heartbeats(self) -> int:
+        """
+        Write pending heartbeats to the database in one batch.
+
+        Returns:
+            int: Number of heartbeats flushed
+        """
+        pending = self.agents.take_dirty()
+        if not pending:
+            return 0
+        try:
+            await self._batcher.submit([
+                (SQL_FLUSH_HEARTBEAT, {"agent": agent_id, "now": now, "status": AGENT_STATUS_ACTIVE})
+                for agent_id, now in pending
+            ])
+            logger.debug(f"Flushed {len(pending)} heartbeats")
+            return len(pending)
+        except Exception as e:
+            self.agents.mark_dirty(agent_id for agent_id, _ in pending)
+            logger.error(f"Failed to flush heartbeats: {e}")
+            return 0
+
     async def list_agents(self, include_stale: bool = False) -> List[str]:
         """
         List all active agent IDs.
@@ -225,28 +858,8 @@ class SQLiteManager:
             list: List of agent IDs
         """
         try:
-            conn = await self.get_connection()
-
-            if include_stale:
-                cursor = await conn.execute(
-                    "SELECT agent_id FROM agents WHERE status = ?",
-                    (AGENT_STATUS_ACTIVE,)
-                )
-            else:
-                # Calculate cutoff time for stale agents
-                cutoff = datetime.utcnow().timestamp() - settings.stale_threshold
-                cutoff_iso = datetime.fromtimestamp(cutoff).isoformat()
-
-                cursor = await conn.execute(
-                    """
-                    SELECT agent_id FROM agents
-                    WHERE status = ? AND last_heartbeat > ?
-                    """,
-                    (AGENT_STATUS_ACTIVE, cutoff_iso)
-                )
-
-            rows = await cursor.fetchall()
-            return [row['agent_id'] for row in rows]
+            await self._sync_agents()
+            return [record.agent_id for record in self.agents.active(None if include_stale else self._stale_cutoff())]
 
         except Exception as e:
             logger.error(f"Failed to list agents: {e}")
@@ -263,39 +876,48 @@ class SQLiteManager:
             list: List of agent detail dictionaries
         """
         try:
-            conn = await self.get_connection()
-
-            if include_stale:
-                cursor = await conn.execute(
-                    "SELECT * FROM agents WHERE status = ?",
-                    (AGENT_STATUS_ACTIVE,)
-                )
-            else:
-                cutoff = datetime.utcnow().timestamp() - settings.stale_threshold
-                cutoff_iso = datetime.fromtimestamp(cutoff).isoformat()
-
-                cursor = await conn.execute(
-                    """
-                    SELECT * FROM agents
-                    WHERE status = ? AND last_heartbeat > ?
-                    """,
-                    (AGENT_STATUS_ACTIVE, cutoff_iso)
-                )
-
-            rows = await cursor.fetchall()
-            return [dict(row) for row in rows]
+            await self._sync_agents()
+            return [record.to_dict() for record in self.agents.active(None if include_stale else self._stale_cutoff())]
 
         except Exception as e:
             logger.error(f"Failed to get all agents details: {e}")
             return []
 
+    def active_roster(self) -> List[Dict[str, Any]]:
+        """
+        Active, non-stale agents sorted by agent_id.
+
+        The list is cached until the registry version moves, or for at most
+        ROSTER_CACHE_SECONDS, and shared between callers: treat it as
+        read-only. Its identity changes whenever it is rebuilt.
+
+        Returns:
+            list: Agent dictionaries
+        """
+        now = time.monotonic()
+        cached = self._roster
+        if cached is not None and cached[0] == self.agents.version and now - cached[1] < ROSTER_CACHE_SECONDS:
+            return cached[2]
+
+        records = sorted(self.agents.active(self._stale_cutoff()), key=lambda record: record.agent_id)
+        roster = [record.to_dict() for record in records]
+        self._roster = (self.agents.version, now, roster)
+        return roster
+
+    @staticmethod
+    def _stale_cutoff() -> str:
+        """Heartbeats at or before this ISO time count as stale"""
+        cutoff = datetime.utcnow().timestamp() - settings.stale_threshold
+        return datetime.fromtimestamp(cutoff).isoformat()
+
     async def send_message(
         self,
         message_id: str,
         from_agent: str,
         content: str,
         to_agent: Optional[str] = None,
-        thread_id: Optional[str] = None
+        thread_id: Optional[str] = None,
+        channel: Optional[str] = None
     ) -> bool:
         """
         Store a message in database.
@@ -306,25 +928,22 @@ class SQLiteManager:
             content: Message content
             to_agent: Recipient agent ID (None for public)
             thread_id: Optional thread ID
+            channel: Group channel to post to (to_agent must then be None)
 
         Returns:
             bool: True if message stored successfully
         """
         try:
             now = datetime.utcnow().isoformat()
-            channel = CHANNEL_DM if to_agent else CHANNEL_PUBLIC
-            conn = await self.get_connection()
+            channel = _message_channel(to_agent, channel)
 
-            await conn.execute(
-                """
-                INSERT INTO messages
-                (message_id, from_agent, to_agent, channel, content, timestamp, thread_id)
-                VALUES (?, ?, ?, ?, ?, ?, ?)
-                """,
+            statements = [(
+                SQL_INSERT_MESSAGE,
                 (message_id, from_agent, to_agent, channel, content, now, thread_id)
-            )
-            await conn.commit()
+            )]
+            self._cache_inserted(statements, await self._batcher.insert(statements))
 
+            self.notifier.notify()
             logger.info(f"Message stored: {message_id} from {from_agent}")
             return True
 
@@ -332,10 +951,291 @@ class SQLiteManager:
             logger.error(f"Failed to send message {message_id}: {e}")
             return False
 
+    async def send_messages(self, from_agent: str, messages: List[Dict[str, Any]]) -> bool:
+        """
+        Store several messages from one sender in a single transaction.
+
+        The rows are inserted with one executemany, so either all of them
+        are stored or none.
+
+        Args:
+            from_agent: Sender agent ID
+            messages: Dicts with message_id, content and optional to_agent
+                (None for public) / thread_id / channel (a group channel)
+
+        Returns:
+            bool: True if every message was stored
+        """
+        try:
+            now = datetime.utcnow().isoformat()
+            rows = [
+                (
+                    msg["message_id"],
+                    from_agent,
+                    msg.get("to_agent"),
+                    _message_channel(msg.get("to_agent"), msg.get("channel")),
+                    msg["content"],
+                    now,
+                    msg.get("thread_id")
+                )
+                for msg in messages
+            ]
+            seqs = await self._batcher.insert_many(SQL_INSERT_MESSAGE, rows)
+            self._cache_inserted([(SQL_INSERT_MESSAGE, row) for row in rows], seqs)
+
+            self.notifier.notify()
+            logger.info(f"Stored {len(rows)} messages from {from_agent}")
+            return True
+
+        except Exception as e:
+            logger.error(f"Failed to send {len(messages)} messages from {from_agent}: {e}")
+            return False
+
+    async def get_latest_seq(self) -> int:
+        """
+        Get the sequence number of the newest message.
+
+        With the message cache on, this is the cache's head. A local send is
+        visible in the database a moment before it reaches the cache, and
+        cursors skip ahead to the head this returns, so it must not run
+        ahead of what cached reads can deliver.
+
+        Returns:
+            int: Highest message seq, or 0 if there are no messages
+        """
+        try:
+            head = await self._read_cache(lambda cache: cache.head)
+            if head is not None:
+                return head
+            row = await self._fetchone(SQL_LATEST_SEQ)
+            return row['seq'] or 0
+        except Exception as e:
+            logger.error(f"Failed to get latest message seq: {e}")
+            return 0
+
+    async def get_messages_after(self, after_seq: int, limit: int = 500) -> List[Dict[str, Any]]:
+        """
+        Get messages of every channel after a cursor, oldest first.
+
+        Args:
+            after_seq: Only get messages after this sequence number
+            limit: Maximum number of messages to retrieve
+
+        Returns:
+            list: List of message dictionaries
+        """
+        try:
+            messages = await self._read_cache(lambda cache: cache.messages_after(after_seq, limit))
+            if messages is not None:
+                return messages
+            rows = await self._fetchall(SQL_MESSAGES_AFTER, (after_seq, limit))
+            return [dict(row) for row in rows]
+        except Exception as e:
+            logger.error(f"Failed to get messages after seq {after_seq}: {e}")
+            return []
+
+    def _cache_inserted(self, statements: List[Tuple[str, Any]], rowids: List[int]):
+        """Add the messages a committed write unit inserted to the cache"""
+        if self.cache is None:
+            return
+        for (sql, params), seq in zip(statements, rowids):
+            if sql is SQL_INSERT_MESSAGE:
+                self.cache.add(dict(zip(MESSAGE_FIELDS, (seq, *params))))
+
+    async def _load_cache(self):
+        """Fill the message cache with the newest messages in the database"""
+        async with self.read_transaction() as conn:
+            async with conn.execute(SQL_RECENT_MESSAGES, (self.cache.size,)) as cursor:
+                rows = await cursor.fetchall()
+            if rows:
+                floor = rows[-1]['seq'] - 1
+            else:
+                # Empty table: every message from now on is newer than any
+                # seq handed out before
+                async with conn.execute(SQL_SEQ_HIGH_WATER) as cursor:
+                    row = await cursor.fetchone()
+                floor = row['seq'] if row else 0
+
+        self.cache.reset(floor, [dict(row) for row in reversed(rows)])
+        # Sends committed while loading are picked up by the next read
+        self.cache.stale = True
+
+    async def _sync_cache(self):
+        """
+        Bring the message cache up to date before a read.
+
+        A commit by another connection changes PRAGMA data_version on the
+        writer, so the cache only touches the database after foreign writes
+        (or a gap in its own). It then reads what was committed after its
+        head, and reloads if that is more than it holds or if messages it
+        holds were deleted.
+        """
+        cache = self.cache
+        if not self.in_memory:
+            conn = await self.get_connection()
+            async with conn.execute("PRAGMA data_version") as cursor:
+                row = await cursor.fetchone()
+            if row[0] != self._data_version:
+                self._data_version = row[0]
+                cache.stale = True
+        if not cache.stale:
+            return
+
+        cache.stale = False
+        head, floor, held = cache.head, cache.floor, len(cache)
+        try:
+            async with self.read_transaction() as conn:
+                async with conn.execute(SQL_MESSAGES_AFTER, (head, cache.size + 1)) as cursor:
+                    rows = await cursor.fetchall()
+                async with conn.execute(SQL_COUNT_AFTER, (floor,)) as cursor:
+                    count = (await cursor.fetchone())['count']
+        except Exception:
+            cache.stale = True
+            raise
+
+        if len(rows) > cache.size or count != held + len(rows):
+            await self._load_cache()
+        else:
+            cache.extend(dict(row) for row in rows)
+
+    async def _reload_cache(self):
+        """Reload the message cache after this process deleted messages"""
+        if self.cache is not None:
+            await self._load_cache()
+
+    async def _read_cache(
+        self,
+        view: Callable[[RecentMessageCache], Any]
+    ) -> Any:
+        """
+        Answer a read from the message cache.
+
+        Args:
+            view: Reads the cache, returning None on a miss
+
+        Returns:
+            The view's result, or None if the cache is disabled or does not
+            reach back far enough
+        """
+        if self.cache is None:
+            return None
+        try:
+            await self._sync_cache()
+        except Exception as e:
+            logger.error(f"Failed to sync message cache: {e}")
+            return None
+        return view(self.cache)
+
+    async def wait_for_messages(self, after_seq: int, timeout: float) -> bool:
+        """
+        Wait until a message newer than after_seq is committed (long-poll).
+
+        Args:
+            after_seq: Sequence number the caller has already read up to
+            timeout: Maximum seconds to wait
+
+        Returns:
+            bool: True if new messages arrived, False on timeout
+        """
+        return await self.notifier.wait(after_seq, timeout)
+
+    async def _seq_before(self, since_timestamp: datetime) -> int:
+        """
+        Resolve a point in time to a cursor.
+
+        Returns the seq just before the first message stamped after
+        since_timestamp, so reading after it yields that message onwards.
+        """
+        row = await self._fetchone(SQL_FIRST_SEQ_SINCE, (since_timestamp.isoformat(),))
+        if row is None:
+            # Nothing newer: start from the current end of the log
+            return await self.get_latest_seq()
+        return row['seq'] - 1
+
+    async def _select_messages(
+        self,
+        after_sql: str,
+        latest_sql: str,
+        params: Dict[str, Any],
+        since_timestamp: Optional[datetime],
+        after_seq: Optional[int],
+        limit: int,
+        match: Callable[[Dict[str, Any]], bool],
+        cached: Optional[Callable[[RecentMessageCache, int, int], Optional[List[Dict[str, Any]]]]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Run a cursor query or a latest-N query, returning messages oldest first.
+
+        With after_seq (a cursor) or since_timestamp, returns the oldest
+        `limit` matching messages after that point; otherwise the newest
+        `limit` messages. A timestamp is first resolved to a cursor, so
+        every read is an index seek on seq. Points older than the hot table
+        are read from the archive first, using `match` to filter it.
+
+        A cursor read is first tried against the message cache through
+        `cached` (cache, after_seq, limit), which returns None on a miss.
+        """
+        if after_seq is not None and cached is not None:
+            messages = await self._read_cache(lambda cache: cached(cache, after_seq, limit))
+            if messages is not None:
+                return messages
+
+        archived = []
+        if after_seq is not None or since_timestamp:
+            archived = await self._read_archive(match, since_timestamp, after_seq, limit)
+            if len(archived) >= limit:
+                return archived[:limit]
+
+        if after_seq is None and since_timestamp:
+            after_seq = await self._seq_before(since_timestamp)
+        if archived:
+            # A crash between archiving a batch and deleting it leaves those
+            # messages in both places; continue after the archived ones
+            after_seq = max(after_seq or 0, archived[-1]['seq'])
+
+        params = dict(params, limit=limit - len(archived))
+        if after_seq is not None:
+            rows = await self._fetchall(after_sql, dict(params, after=after_seq))
+            return archived + [dict(row) for row in rows]
+
+        rows = await self._fetchall(latest_sql, params)
+        messages = [dict(row) for row in rows]
+
+        # Latest-N queries scan newest first; return oldest first
+        messages.reverse()
+        return messages
+
+    async def _read_archive(
+        self,
+        match: Callable[[Dict[str, Any]], bool],
+        since_timestamp: Optional[datetime],
+        after_seq: Optional[int],
+        limit: int
+    ) -> List[Dict[str, Any]]:
+        """
+        Read archived messages when a read starts before the hot table.
+
+        A cursor reaches the archive only if it is older than the oldest hot
+        message, so live polls never open archive segments.
+        """
+        if self.archive is None:
+            return []
+
+        oldest = await self._fetchone(SQL_OLDEST_MESSAGE)
+        if after_seq is not None:
+            if oldest is not None and after_seq >= oldest['seq'] - 1:
+                return []
+            return await self.archive.read(match, after_seq=after_seq, limit=limit)
+
+        if oldest is not None and since_timestamp.isoformat() >= oldest['timestamp']:
+            return []
+        return await self.archive.read(match, since_timestamp=since_timestamp, limit=limit)
+
     async def get_public_messages(
         self,
         since_timestamp: Optional[datetime] = None,
-        limit: int = 50
+        limit: int = 50,
+        after_seq: Optional[int] = None
     ) -> List[Dict[str, Any]]:
         """
         Get public channel messages.
@@ -343,42 +1243,23 @@ class SQLiteManager:
         Args:
             since_timestamp: Only get messages after this time
             limit: Maximum number of messages to retrieve
+            after_seq: Only get messages after this sequence number (takes
+                precedence over since_timestamp)
 
         Returns:
             list: List of message dictionaries
         """
         try:
-            conn = await self.get_connection()
-
-            if since_timestamp:
-                cursor = await conn.execute(
-                    """
-                    SELECT * FROM messages
-                    WHERE channel = ? AND timestamp > ?
-                    ORDER BY timestamp ASC
-                    LIMIT ?
-                    """,
-                    (CHANNEL_PUBLIC, since_timestamp.isoformat(), limit)
-                )
-            else:
-                cursor = await conn.execute(
-                    """
-                    SELECT * FROM messages
-                    WHERE channel = ?
-                    ORDER BY timestamp DESC
-                    LIMIT ?
-                    """,
-                    (CHANNEL_PUBLIC, limit)
-                )
-
-            rows = await cursor.fetchall()
-            messages = [dict(row) for row in rows]
-
-            # If no since_timestamp, reverse to get oldest first
-            if not since_timestamp:
-                messages.reverse()
-
-            return messages
+            return await self._select_messages(
+                SQL_CHANNEL_AFTER,
+                SQL_CHANNEL_LATEST,
+                {"channel": CHANNEL_PUBLIC},
+                since_timestamp,
+                after_seq,
+                limit,
+                lambda msg: msg['channel'] == CHANNEL_PUBLIC,
+                RecentMessageCache.public_after
+            )
 
         except Exception as e:
             logger.error(f"Failed to get public messages: {e}")
@@ -389,7 +1270,8 @@ class SQLiteManager:
         agent_id: str,
         other_agent_id: Optional[str] = None,
         since_timestamp: Optional[datetime] = None,
-        limit: int = 50
+        limit: int = 50,
+        after_seq: Optional[int] = None
     ) -> List[Dict[str, Any]]:
         """
         Get direct messages for an agent.
@@ -399,78 +1281,546 @@ class SQLiteManager:
             other_agent_id: If specified, only get DMs with this agent
             since_timestamp: Only get messages after this time
             limit: Maximum number of messages to retrieve
+            after_seq: Only get messages after this sequence number (takes
+                precedence over since_timestamp)
 
         Returns:
             list: List of message dictionaries
         """
         try:
-            conn = await self.get_connection()
-
             if other_agent_id:
                 # Get DMs with specific agent (either direction)
-                if since_timestamp:
-                    cursor = await conn.execute(
-                        """
-                        SELECT * FROM messages
-                        WHERE channel = ?
-                        AND ((from_agent = ? AND to_agent = ?) OR (from_agent = ? AND to_agent = ?))
-                        AND timestamp > ?
-                        ORDER BY timestamp ASC
-                        LIMIT ?
-                        """,
-                        (CHANNEL_DM, agent_id, other_agent_id, other_agent_id, agent_id,
-                         since_timestamp.isoformat(), limit)
-                    )
-                else:
-                    cursor = await conn.execute(
-                        """
-                        SELECT * FROM messages
-                        WHERE channel = ?
-                        AND ((from_agent = ? AND to_agent = ?) OR (from_agent = ? AND to_agent = ?))
-                        ORDER BY timestamp DESC
-                        LIMIT ?
-                        """,
-                        (CHANNEL_DM, agent_id, other_agent_id, other_agent_id, agent_id, limit)
-                    )
-            else:
-                # Get all DMs involving this agent
-                if since_timestamp:
-                    cursor = await conn.execute(
-                        """
-                        SELECT * FROM messages
-                        WHERE channel = ?
-                        AND (from_agent = ? OR to_agent = ?)
-                        AND timestamp > ?
-                        ORDER BY timestamp ASC
-                        LIMIT ?
-                        """,
-                        (CHANNEL_DM, agent_id, agent_id, since_timestamp.isoformat(), limit)
-                    )
-                else:
-                    cursor = await conn.execute(
-                        """
-                        SELECT * FROM messages
-                        WHERE channel = ?
-                        AND (from_agent = ? OR to_agent = ?)
-                        ORDER BY timestamp DESC
-                        LIMIT ?
-                        """,
-                        (CHANNEL_DM, agent_id, agent_id, limit)
-                    )
+                return await self._select_messages(
+                    SQL_DM_PAIR_AFTER,
+                    SQL_DM_PAIR_LATEST,
+                    {"agent": agent_id, "other": other_agent_id},
+                    since_timestamp,
+                    after_seq,
+                    limit,
+                    lambda msg: (msg['to_agent'], msg['from_agent']) in (
+                        (agent_id, other_agent_id), (other_agent_id, agent_id)
+                    ),
+                    lambda cache, after, n: cache.dms_after(agent_id, after, n, other_agent_id)
+                )
 
-            rows = await cursor.fetchall()
-            messages = [dict(row) for row in rows]
+            # Get all DMs involving this agent
+            return await self._select_messages(
+                SQL_DM_AFTER,
+                SQL_DM_LATEST,
+                {"agent": agent_id, "channel": CHANNEL_DM},
+                since_timestamp,
+                after_seq,
+                limit,
+                lambda msg: _is_dm_of(msg, agent_id),
+                lambda cache, after, n: cache.dms_after(agent_id, after, n)
+            )
 
-            # If no since_timestamp, reverse to get oldest first
-            if not since_timestamp:
-                messages.reverse()
+        except Exception as e:
+            logger.error(f"Failed to get DM messages for {agent_id}: {e}")
+            return []
 
-            return messages
+    async def get_dm_inboxes(
+        self,
+        cursors: Dict[str, Optional[int]],
+        limit: int = 50
+    ) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        Get the direct messages of several agents.
+
+        The message cache is synced once for all of them; only agents whose
+        cursor it cannot answer (or that have none) are read from SQLite.
+
+        Args:
+            cursors: agent_id -> read after this sequence number (None for
+                the newest messages)
+            limit: Maximum number of messages per agent
+
+        Returns:
+            dict: agent_id -> list of message dictionaries, oldest first
+        """
+        try:
+            inboxes = await self._read_cache(lambda cache: {
+                agent_id: cache.dms_after(agent_id, after_seq, limit)
+                for agent_id, after_seq in cursors.items()
+                if after_seq is not None
+            }) or {}
+
+            misses = [agent_id for agent_id in cursors if inboxes.get(agent_id) is None]
+            fetched = await asyncio.gather(*(
+                self.get_dm_messages(agent_id, limit=limit, after_seq=cursors[agent_id])
+                for agent_id in misses
+            ))
+            inboxes.update(zip(misses, fetched))
+            return {agent_id: inboxes[agent_id] for agent_id in cursors}
 
         except Exception as e:
-            logger.error(f"Failed to get DM messages for {agent_id}: {e}")
+            logger.error(f"Failed to get DM inboxes: {e}")
+            return {}
+
+    async def create_channel(self, name: str, created_by: str, description: Optional[str] = None) -> bool:
+        """
+        Create a group channel, with its creator as the first member.
+
+        Args:
+            name: Channel name (see is_valid_channel_name)
+            created_by: Creating agent ID
+            description: Optional channel description
+
+        Returns:
+            bool: True if created, False if it already exists or on error
+        """
+        try:
+            params = {
+                "channel": name,
+                "description": description,
+                "agent": created_by,
+                "now": datetime.utcnow().isoformat()
+            }
+            created, _ = await self._batcher.submit([
+                (SQL_CREATE_CHANNEL, params),
+                (SQL_JOIN_CREATED_CHANNEL, params)
+            ])
+            if created:
+                logger.info(f"Channel created: {name} by {created_by}")
+            return created > 0
+
+        except Exception as e:
+            logger.error(f"Failed to create channel {name}: {e}")
+            return False
+
+    async def join_channel(self, name: str, agent_id: str, create: bool = False) -> bool:
+        """
+        Add an agent to a group channel.
+
+        Args:
+            name: Channel name
+            agent_id: Joining agent ID
+            create: Create the channel if it does not exist
+
+        Returns:
+            bool: True if the agent is a member afterwards
+        """
+        try:
+            params = {"channel": name, "description": None, "agent": agent_id, "now": datetime.utcnow().isoformat()}
+            statements = [(SQL_JOIN_CHANNEL, params)]
+            if create:
+                statements.insert(0, (SQL_CREATE_CHANNEL, params))
+            rowcounts = await self._batcher.submit(statements)
+            if rowcounts[-1]:
+                logger.info(f"Agent {agent_id} joined channel {name}")
+                return True
+            # Already a member, or no such channel
+            return await self.is_channel_member(name, agent_id)
+
+        except Exception as e:
+            logger.error(f"Failed to join {agent_id} to channel {name}: {e}")
+            return False
+
+    async def leave_channel(self, name: str, agent_id: str) -> bool:
+        """
+        Remove an agent from a group channel.
+
+        Returns:
+            bool: True if the agent was a member
+        """
+        try:
+            return await self._execute_write(SQL_LEAVE_CHANNEL, (name, agent_id)) > 0
+
+        except Exception as e:
+            logger.error(f"Failed to remove {agent_id} from channel {name}: {e}")
+            return False
+
+    async def get_channel(self, name: str) -> Optional[Dict[str, Any]]:
+        """
+        Get a group channel's details.
+
+        Returns:
+            dict: Channel data with member_count and message_count, or None
+                if not found
+        """
+        try:
+            row = await self._fetchone(SQL_CHANNEL_INFO + " WHERE name = ?", (name,))
+            return dict(row) if row else None
+
+        except Exception as e:
+            logger.error(f"Failed to get channel {name}: {e}")
+            return None
+
+    async def list_channels(self) -> List[Dict[str, Any]]:
+        """
+        List every group channel, by name.
+
+        Returns:
+            list: Channel data with member_count and message_count
+        """
+        try:
+            return [dict(row) for row in await self._fetchall(SQL_CHANNEL_INFO + " ORDER BY name")]
+
+        except Exception as e:
+            logger.error(f"Failed to list channels: {e}")
+            return []
+
+    async def get_channel_members(self, name: str) -> List[str]:
+        """Get the agent IDs of a group channel's members, sorted"""
+        try:
+            return [row['agent_id'] for row in await self._fetchall(SQL_CHANNEL_MEMBERS, (name,))]
+
+        except Exception as e:
+            logger.error(f"Failed to get members of channel {name}: {e}")
+            return []
+
+    async def get_agent_channels(self, agent_id: str) -> List[str]:
+        """Get the group channels an agent belongs to, sorted"""
+        try:
+            return [row['channel'] for row in await self._fetchall(SQL_AGENT_CHANNELS, (agent_id,))]
+
+        except Exception as e:
+            logger.error(f"Failed to get channels of {agent_id}: {e}")
+            return []
+
+    async def is_channel_member(self, name: str, agent_id: str) -> bool:
+        """Check whether an agent belongs to a group channel"""
+        try:
+            return await self._fetchone(SQL_IS_MEMBER, (name, agent_id)) is not None
+
+        except Exception as e:
+            logger.error(f"Failed to check membership of {agent_id} in channel {name}: {e}")
+            return False
+
+    async def get_channel_messages(
+        self,
+        name: str,
+        since_timestamp: Optional[datetime] = None,
+        limit: int = 50,
+        after_seq: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Get a group channel's messages.
+
+        Args:
+            name: Channel name
+            since_timestamp: Only get messages after this time
+            limit: Maximum number of messages to retrieve
+            after_seq: Only get messages after this sequence number (takes
+                precedence over since_timestamp)
+
+        Returns:
+            list: List of message dictionaries
+        """
+        try:
+            return await self._select_messages(
+                SQL_CHANNEL_AFTER,
+                SQL_CHANNEL_LATEST,
+                {"channel": name},
+                since_timestamp,
+                after_seq,
+                limit,
+                lambda msg: msg['channel'] == name,
+                lambda cache, after, n: cache.channel_after(name, after, n)
+            )
+
+        except Exception as e:
+            logger.error(f"Failed to get messages of channel {name}: {e}")
+            return []
+
+    async def get_thread(self, thread_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Get a thread's summary.
+
+        Counts cover the messages in the hot table; started_at and
+        last_activity span the thread's whole history.
+
+        Args:
+            thread_id: Thread identifier
+
+        Returns:
+            dict: thread_id, message_count, reply_count, last_seq, started_at,
+                last_activity and participants (sorted agent IDs), or None if
+                no stored message belongs to the thread
+        """
+        try:
+            async with self.read_transaction() as conn:
+                async with conn.execute(SQL_THREAD_SUMMARY, (thread_id,)) as cursor:
+                    row = await cursor.fetchone()
+                if row is None:
+                    return None
+                async with conn.execute(SQL_THREAD_PARTICIPANTS, (thread_id,)) as cursor:
+                    participants = [r['agent_id'] for r in await cursor.fetchall()]
+
+            thread = dict(row)
+            thread["reply_count"] = max(thread["message_count"] - 1, 0)
+            thread["participants"] = participants
+            return thread
+
+        except Exception as e:
+            logger.error(f"Failed to get thread {thread_id}: {e}")
+            return None
+
+    async def get_thread_messages(
+        self,
+        thread_id: str,
+        agent_id: Optional[str] = None,
+        since_timestamp: Optional[datetime] = None,
+        limit: int = 50,
+        after_seq: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Get a thread's messages.
+
+        Args:
+            thread_id: Thread identifier
+            agent_id: Only messages this agent can see (public posts, its own
+                messages and DMs, its group channels); None for all
+            since_timestamp: Only get messages after this time
+            limit: Maximum number of messages to retrieve
+            after_seq: Only get messages after this sequence number (takes
+                precedence over since_timestamp)
+
+        Returns:
+            list: List of message dictionaries
+        """
+        try:
+            channels = await self.get_agent_channels(agent_id) if agent_id else []
+            return await self._select_messages(
+                SQL_THREAD_AFTER,
+                SQL_THREAD_LATEST,
+                {"thread": thread_id, "agent": agent_id, "public": CHANNEL_PUBLIC},
+                since_timestamp,
+                after_seq,
+                limit,
+                lambda msg: msg.get('thread_id') == thread_id and (
+                    agent_id is None or _is_visible_to(msg, agent_id, channels)
+                )
+            )
+
+        except Exception as e:
+            logger.error(f"Failed to get messages of thread {thread_id}: {e}")
             return []
 
+    async def poll(
+        self,
+        agent_id: str,
+        description: Optional[str] = None,
+        outgoing: Optional[List[Dict[str, Any]]] = None,
+        after_seq: Optional[int] = None,
+        since_timestamp: Optional[datetime] = None,
+        limit: int = 100,
+        thread_id: Optional[str] = None
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Heartbeat, send and fetch an agent's inbox in one round trip.
+
+        Any outgoing messages are committed as one write unit, together
+        with the heartbeat when it registers, reactivates or re-describes the
+        agent; a plain heartbeat is written behind through the registry. The
+        counters and inbox are then read from a single snapshot, and the
+        active roster from the registry.
+
+        The inbox holds public messages, the agent's DMs and the messages of
+        the group channels it belongs to. Its channels come with the
+        counters, and each one is read as its own stream, so channels the
+        agent is not in are never touched.
+
+        With thread_id, the poll reads that thread (the messages of it the
+        agent can see) instead of the inbox, and the cursor tracks the
+        thread. Without a cursor or lookback it starts with the thread's
+        newest `limit` messages.
+
+        A lookback (since_timestamp) older than the hot table also returns
+        up to `limit` archived messages ahead of the inbox.
+
+        The returned cursor is the seq to poll from next time. A stream that
+        filled its limit may have more messages, so the cursor stops at the
+        last one delivered; messages beyond the cursor are left out, so each
+        message is delivered exactly once.
+
+        Args:
+            agent_id: Polling agent ID
+            description: New context summary (None keeps the current one)
+            outgoing: Messages to send, as dicts with message_id, content and
+                optional to_agent / thread_id / channel (a group channel)
+            after_seq: Only get messages after this sequence number (takes
+                precedence over since_timestamp)
+            since_timestamp: Only get messages after this time
+            limit: Maximum number of public messages, of DMs and of messages
+                per group channel
+            thread_id: Read only this thread
+
+        Returns:
+            dict: messages (oldest first), cursor, public_count, dm_count,
+                group_count, channels (the agent's group channels) and agents
+                (active roster, see active_roster()), or None if the poll
+                failed
+        """
+        try:
+            now = datetime.utcnow().isoformat()
+            await self._sync_agents()
+            record = self.agents.get(agent_id)
+            write_behind = (
+                record is not None
+                and record.status == AGENT_STATUS_ACTIVE
+                and description in (None, record.context_summary)
+            )
+
+            statements = []
+            if not write_behind:
+                statements.append((
+                    SQL_POLL_HEARTBEAT,
+                    {"agent": agent_id, "context": description, "now": now, "status": AGENT_STATUS_ACTIVE}
+                ))
+            for msg in outgoing or []:
+                to_agent = msg.get("to_agent")
+                statements.append((SQL_INSERT_MESSAGE, (
+                    msg["message_id"],
+                    agent_id,
+                    to_agent,
+                    _message_channel(to_agent, msg.get("channel")),
+                    msg["content"],
+                    now,
+                    msg.get("thread_id")
+                )))
+            if statements:
+                self._cache_inserted(statements, await self._batcher.insert(statements))
+            if outgoing:
+                self.notifier.notify()
+
+            if write_behind:
+                self.agents.record_heartbeat(agent_id, now)
+                self._ensure_flushing()
+            elif record is not None:
+                self.agents.record_heartbeat(agent_id, now, description, persisted=True)
+            else:
+                row = await self._fetchone("SELECT * FROM agents WHERE agent_id = ?", (agent_id,))
+                self.agents.put(AgentRecord.from_row(row))
+
+            params = {"agent": agent_id, "public": CHANNEL_PUBLIC, "dm": CHANNEL_DM}
+            lookback = after_seq is None and since_timestamp
+
+            if thread_id is not None:
+                return await self._poll_thread(agent_id, thread_id, params, after_seq, since_timestamp, limit)
+
+            # Cursor polls are answered from the message cache when it
+            # reaches back far enough; only the counters and the agent's
+            # channels come from SQLite
+            inbox = None
+            if not lookback:
+                counts = await self._fetchone(SQL_POLL_COUNTS, params)
+                channels = _split_channels(counts['channels'])
+                inbox = await self._read_cache(
+                    lambda cache: cache.inbox_after(agent_id, after_seq, limit, channels)
+                )
+            if inbox is not None:
+                head_seq, after_seq, public, dms, groups = inbox
+            else:
+                async with self.read_transaction() as conn:
+                    async with conn.execute(SQL_POLL_COUNTS, params) as cursor:
+                        counts = await cursor.fetchone()
+                    channels = _split_channels(counts['channels'])
+                    head_seq = counts['head_seq'] or 0
+
+                    if lookback:
+                        async with conn.execute(SQL_FIRST_SEQ_SINCE, (since_timestamp.isoformat(),)) as cursor:
+                            row = await cursor.fetchone()
+                        after_seq = row['seq'] - 1 if row else head_seq
+                    if after_seq is None:
+                        after_seq = head_seq
+
+                    async with conn.execute(SQL_POLL_INBOX, dict(params, after=after_seq, limit=limit)) as cursor:
+                        rows = await cursor.fetchall()
+
+                    # One seek on idx_messages_channel_seq per group channel
+                    groups = []
+                    for channel in channels:
+                        channel_params = {"channel": channel, "after": after_seq, "limit": limit}
+                        async with conn.execute(SQL_CHANNEL_AFTER, channel_params) as cursor:
+                            groups.append([dict(row) for row in await cursor.fetchall()])
+
+                public = [dict(row) for row in rows if row['channel'] == CHANNEL_PUBLIC]
+                dms = [dict(row) for row in rows if row['channel'] != CHANNEL_PUBLIC]
+            agents = self.active_roster()
+
+            # Lookbacks past the hot table start with archived history
+            archived = []
+            if lookback:
+                member_of = set(channels)
+                archived = await self._read_archive(
+                    lambda msg: (
+                        msg['channel'] == CHANNEL_PUBLIC
+                        or msg['channel'] in member_of
+                        or _is_dm_of(msg, agent_id)
+                    ),
+                    since_timestamp,
+                    None,
+                    limit
+                )
+
+            # A full stream stops the cursor at its limit-th message; a
+            # complete one has delivered everything up to head_seq
+            streams = [public, dms, *groups]
+            cursor_seq = max(head_seq, after_seq)
+            for stream in streams:
+                if len(stream) >= limit:
+                    cursor_seq = min(cursor_seq, stream[limit - 1]['seq'])
+
+            messages = [
+                msg for msg in heapq.merge(*streams, key=itemgetter('seq'))
+                if msg['seq'] <= cursor_seq
+            ]
+            return {
+                "messages": archived + messages,
+                "cursor": cursor_seq,
+                "public_count": counts['public_count'] or 0,
+                "dm_count": counts['dm_count'] or 0,
+                "group_count": counts['group_count'] or 0,
+                "channels": channels,
+                "agents": agents,
+            }
+
+        except Exception as e:
+            logger.error(f"Failed to poll for {agent_id}: {e}")
+            return None
+
+    async def _poll_thread(
+        self,
+        agent_id: str,
+        thread_id: str,
+        params: Dict[str, Any],
+        after_seq: Optional[int],
+        since_timestamp: Optional[datetime],
+        limit: int
+    ) -> Dict[str, Any]:
+        """The read half of a thread poll (see poll()); errors propagate"""
+        counts = await self._fetchone(SQL_POLL_COUNTS, params)
+        head_seq = counts['head_seq'] or 0
+        channels = _split_channels(counts['channels'])
+
+        messages = await self._select_messages(
+            SQL_THREAD_AFTER,
+            SQL_THREAD_LATEST,
+            {"thread": thread_id, "agent": agent_id, "public": CHANNEL_PUBLIC},
+            since_timestamp,
+            after_seq,
+            limit,
+            lambda msg: msg.get('thread_id') == thread_id and _is_visible_to(msg, agent_id, channels)
+        )
+
+        # head_seq was read first, so a page that is not full has delivered
+        # every message of the thread up to it
+        if len(messages) >= limit:
+            cursor_seq = messages[-1]['seq']
+        else:
+            cursor_seq = max(head_seq, after_seq or 0, messages[-1]['seq'] if messages else 0)
+
+        return {
+            "messages": messages,
+            "cursor": cursor_seq,
+            "public_count": counts['public_count'] or 0,
+            "dm_count": counts['dm_count'] or 0,
+            "group_count": counts['group_count'] or 0,
+            "channels": channels,
+            "agents": self.active_roster(),
+        }
+
     async def cleanup_inactive_agents(self) -> int:
         """
         Remove agents that haven't sent heartbeat in removal_threshold seconds.
@@ -481,19 +1831,11 @@ class SQLiteManager:
         try:
             cutoff = datetime.utcnow().timestamp() - settings.removal_threshold
             cutoff_iso = datetime.fromtimestamp(cutoff).isoformat()
-            conn = await self.get_connection()
 
-            cursor = await conn.execute(
-                """
-                UPDATE agents
-                SET status = 'inactive'
-                WHERE last_heartbeat < ? AND status = ?
-                """,
-                (cutoff_iso, AGENT_STATUS_ACTIVE)
-            )
-            await conn.commit()
-
-            count = cursor.rowcount
+            # Judge agents by their latest heartbeats, not the last flush
+            await self.flush_heartbeats()
+            count = await self._execute_write(SQL_INACTIVE_AGENTS, (cutoff_iso, AGENT_STATUS_ACTIVE))
+            await self._sync_agents(force=True)
             if count > 0:
                 logger.info(f"Cleaned up {count} inactive agents")
 
@@ -503,6 +1845,184 @@ class SQLiteManager:
             logger.error(f"Failed to cleanup inactive agents: {e}")
             return 0
 
+    async def archive_messages(self) -> int:
+        """
+        Move messages older than archive_after_hours to the archive.
+
+        Messages are copied in seq order, batch by batch, and each batch is
+        deleted from the hot table only after it has been written durably.
+        Everything before the first message newer than the cutoff moves, so
+        the archive always holds a seq prefix of the hot table.
+
+        Returns:
+            int: Number of messages archived
+        """
+        if self.archive is None:
+            return 0
+
+        try:
+            cutoff = datetime.utcnow() - timedelta(hours=settings.archive_after_hours)
+            row = await self._fetchone(SQL_FIRST_SEQ_SINCE, (cutoff.isoformat(),))
+            boundary = row['seq'] if row else await self.get_latest_seq() + 1
+
+            batch_size = max(settings.retention_batch_size, 1)
+            moved = 0
+            while True:
+                rows = await self._fetchall(SQL_ARCHIVE_BATCH, (boundary, batch_size))
+                if not rows:
+                    break
+                messages = [dict(row) for row in rows]
+                await self.archive.append(messages)
+                await self._execute_write(
+                    "DELETE FROM messages WHERE seq BETWEEN ? AND ?",
+                    (messages[0]['seq'], messages[-1]['seq'])
+                )
+                moved += len(messages)
+
+            if moved > 0:
+                await self._reload_cache()
+                logger.info(f"Archived {moved} messages older than {settings.archive_after_hours}h")
+
+            return moved
+
+        except Exception as e:
+            logger.error(f"Failed to archive messages: {e}")
+            return 0
+
+    async def prune_messages(self) -> int:
+        """
+        Delete messages beyond the retention limits in settings.
+
+        Applies, in order, the maximum age, the per-channel row limit and the
+        per-DM-pair history limit. Deletes run in batches of
+        retention_batch_size, each committed on its own, so concurrent polls
+        and sends never wait long for the writer.
+
+        Returns:
+            int: Number of messages deleted
+        """
+        try:
+            deleted = 0
+
+            if settings.retention_max_age_hours > 0:
+                cutoff = datetime.utcnow() - timedelta(hours=settings.retention_max_age_hours)
+                deleted += await self._delete_in_batches(SQL_PRUNE_BEFORE, {"cutoff": cutoff.isoformat()})
+
+            # Over-limit channels and pairs come straight from the counters
+            max_rows = settings.retention_max_channel_messages
+            if max_rows > 0:
+                for row in await self._fetchall(SQL_COUNTERS_OVER, (COUNTER_CHANNEL, max_rows)):
+                    if row['key'] == CHANNEL_DM:
+                        continue  # DMs are limited per pair
+                    deleted += await self._delete_in_batches(
+                        SQL_PRUNE_CHANNEL, {"channel": row['key']}, row['count'] - max_rows
+                    )
+
+            max_dms = settings.retention_max_dm_per_pair
+            if max_dms > 0:
+                for row in await self._fetchall(SQL_COUNTERS_OVER, (COUNTER_DM_PAIR, max_dms)):
+                    pair = await self._resolve_dm_pair(row['key'])
+                    if pair is None:
+                        continue
+                    deleted += await self._delete_in_batches(
+                        SQL_PRUNE_DM_PAIR, {"agent": pair[0], "other": pair[1]}, row['count'] - max_dms
+                    )
+
+            if deleted > 0:
+                await self._reload_cache()
+                logger.info(f"Pruned {deleted} messages past retention limits")
+
+            return deleted
+
+        except Exception as e:
+            logger.error(f"Failed to prune messages: {e}")
+            return 0
+
+    async def _delete_in_batches(self, sql: str, params: Dict[str, Any], total: Optional[int] = None) -> int:
+        """
+        Run a batched delete statement until nothing matches or total rows are gone.
+
+        Returns:
+            int: Number of rows deleted
+        """
+        batch_size = max(settings.retention_batch_size, 1)
+        deleted = 0
+        while total is None or deleted < total:
+            limit = batch_size if total is None else min(batch_size, total - deleted)
+            count = await self._execute_write(sql, dict(params, limit=limit))
+            deleted += count
+            if count < limit:
+                break
+        return deleted
+
+    async def _resolve_dm_pair(self, key: str) -> Optional[Tuple[str, str]]:
+        """
+        Split a DM pair counter key back into its two agent IDs.
+
+        Agent IDs may themselves contain ':', so every split point that
+        yields a sorted pair is a candidate; with more than one, the pair
+        that actually has messages wins.
+        """
+        candidates = [
+            (key[:i], key[i + 1:])
+            for i, char in enumerate(key)
+            if char == ':' and key[:i] <= key[i + 1:]
+        ]
+        if len(candidates) == 1:
+            return candidates[0]
+
+        for agent, other in candidates:
+            row = await self._fetchone(
+                "SELECT 1 FROM messages WHERE to_agent = ? AND from_agent = ? LIMIT 1",
+                (agent, other)
+            )
+            if row is None:
+                row = await self._fetchone(
+                    "SELECT 1 FROM messages WHERE to_agent = ? AND from_agent = ? LIMIT 1",
+                    (other, agent)
+                )
+            if row is not None:
+                return agent, other
+        return None
+
+    async def reclaim_space(self, max_pages: Optional[int] = None) -> int:
+        """
+        Return free pages to the filesystem with incremental vacuum.
+
+        Args:
+            max_pages: Most pages to release (uses settings if not provided;
+                0 releases all free pages)
+
+        Returns:
+            int: Number of pages released
+        """
+        if self.in_memory:
+            return 0
+
+        try:
+            if max_pages is None:
+                max_pages = settings.vacuum_pages_per_run
+
+            async with self._write_lock:
+                conn = await self.get_connection()
+                async with conn.execute("PRAGMA freelist_count") as cursor:
+                    before = (await cursor.fetchone())[0]
+                # The pragma frees one page per step and returns no columns, so
+                # execute() would stop after the first page; executescript()
+                # steps it to completion
+                await conn.executescript(f"PRAGMA incremental_vacuum({int(max_pages)})")
+                async with conn.execute("PRAGMA freelist_count") as cursor:
+                    after = (await cursor.fetchone())[0]
+
+            released = before - after
+            if released > 0:
+                logger.info(f"Released {released} free database pages")
+            return released
+
+        except Exception as e:
+            logger.error(f"Failed to reclaim database space: {e}")
+            return 0
+
     async def agent_name_exists(self, agent_id: str) -> bool:
         """
         Check if an agent name is already registered.
@@ -514,13 +2034,7 @@ class SQLiteManager:
             bool: True if name exists
         """
         try:
-            conn = await self.get_connection()
-            cursor = await conn.execute(
-                "SELECT 1 FROM agents WHERE agent_id = ?",
-                (agent_id,)
-            )
-            row = await cursor.fetchone()
-            return row is not None
+            return await self._lookup_agent(agent_id) is not None
 
         except Exception as e:
             logger.error(f"Failed to check agent name existence: {e}")
@@ -534,41 +2048,30 @@ class SQLiteManager:
             dict: Statistics including agent counts, message counts, etc.
         """
         try:
-            conn = await self.get_connection()
-
             # Count active agents
-            cursor = await conn.execute(
-                "SELECT COUNT(*) as count FROM agents WHERE status = ?",
-                (AGENT_STATUS_ACTIVE,)
-            )
-            row = await cursor.fetchone()
-            active_agents = row['count'] if row else 0
+            await self._sync_agents()
+            active_agents = len(self.agents.active())
 
-            # Count public messages
-            cursor = await conn.execute(
-                "SELECT COUNT(*) as count FROM messages WHERE channel = ?",
-                (CHANNEL_PUBLIC,)
-            )
-            row = await cursor.fetchone()
-            public_messages = row['count'] if row else 0
+            async with self.read_connection() as conn:
+                # Public messages and DM pairs, from the maintained counters
+                async with conn.execute(SQL_COUNTER, (COUNTER_CHANNEL, CHANNEL_PUBLIC)) as cursor:
+                    row = await cursor.fetchone()
+                public_messages = row['count'] if row else 0
 
-            # Count unique DM pairs
-            cursor = await conn.execute(
-                """
-                SELECT COUNT(DISTINCT from_agent || '-' || to_agent) as count
-                FROM messages WHERE channel = ?
-                """,
-                (CHANNEL_DM,)
-            )
-            row = await cursor.fetchone()
-            dm_channels = row['count'] if row else 0
+                async with conn.execute(SQL_COUNTER, (COUNTER_TOTAL, DM_CHANNELS_KEY)) as cursor:
+                    row = await cursor.fetchone()
+                dm_channels = row['count'] if row else 0
 
-            return {
+            stats = {
                 "active_agents": active_agents,
                 "public_messages": public_messages,
                 "dm_channels": dm_channels,
                 "database_connected": True
             }
+            if self.cache is not None:
+                stats["message_cache"] = self.cache.stats()
+            stats["write_batcher"] = self._batcher.stats()
+            return stats
 
         except Exception as e:
             logger.error(f"Failed to get stats: {e}")
@@ -587,12 +2090,7 @@ class SQLiteManager:
             int: Number of public messages
         """
         try:
-            conn = await self.get_connection()
-            cursor = await conn.execute(
-                "SELECT COUNT(*) as count FROM messages WHERE channel = ?",
-                (CHANNEL_PUBLIC,)
-            )
-            row = await cursor.fetchone()
+            row = await self._fetchone(SQL_COUNTER, (COUNTER_CHANNEL, CHANNEL_PUBLIC))
             return row['count'] if row else 0
         except Exception as e:
             logger.error(f"Failed to count public messages: {e}")
@@ -609,23 +2107,49 @@ class SQLiteManager:
             int: Number of DM messages
         """
         try:
-            conn = await self.get_connection()
-            cursor = await conn.execute(
-                """
-                SELECT COUNT(*) as count FROM messages
-                WHERE channel = ? AND (from_agent = ? OR to_agent = ?)
-                """,
-                (CHANNEL_DM, agent_id, agent_id)
-            )
-            row = await cursor.fetchone()
+            row = await self._fetchone(SQL_COUNTER, (COUNTER_AGENT_DM, agent_id))
             return row['count'] if row else 0
         except Exception as e:
             logger.error(f"Failed to count DM messages: {e}")
             return 0
 
+    async def get_dm_pair_message_count(self, agent_id: str, other_agent_id: str) -> int:
+        """
+        Get total count of DMs exchanged between two agents.
+
+        Args:
+            agent_id: Agent ID
+            other_agent_id: Other agent ID
+
+        Returns:
+            int: Number of DM messages in either direction
+        """
+        try:
+            key = create_dm_channel_key(agent_id, other_agent_id)
+            row = await self._fetchone(SQL_COUNTER, (COUNTER_DM_PAIR, key))
+            return row['count'] if row else 0
+        except Exception as e:
+            logger.error(f"Failed to count DM messages between {agent_id} and {other_agent_id}: {e}")
+            return 0
+
     async def close(self):
-        """Close database connection"""
+        """Flush pending writes and close all database connections"""
         try:
+            await self.notifier.close()
+            if self._flush_task is not None and not self._flush_task.done():
+                self._flush_task.cancel()
+                try:
+                    await self._flush_task
+                except asyncio.CancelledError:
+                    pass
+            await self.flush_heartbeats()
+            await self._batcher.close()
+
+            for reader in self._readers:
+                await reader.close()
+            self._readers = []
+            self._reader_pool = None
+
             if self._connection:
                 await self._connection.close()
                 self._connection = None
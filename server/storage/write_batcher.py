@@ -0,0 +1,284 @@
+"""Group-commit write batcher for the SQLite writer connection"""
+import asyncio
+import logging
+import sqlite3
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence, Tuple
+
+import aiosqlite
+
+logger = logging.getLogger(__name__)
+
+Statement = Tuple[str, tuple]
+
+
+class _WriteUnit:
+    """Statements that must commit together, plus the caller's future"""
+
+    __slots__ = ("statements", "future", "many", "rowids")
+
+    def __init__(self, statements: Sequence[Statement], future: asyncio.Future, many: bool = False):
+        self.statements = statements
+        self.future = future
+        # A single (sql, rows) pair run with executemany
+        self.many = many
+        # Last inserted rowid after each statement (each row, for executemany),
+        # set once committed
+        self.rowids: List[int] = []
+
+
+class WriteBatcher:
+    """
+    Merges concurrent writes into one transaction per short time window.
+
+    Callers submit a unit of one or more statements and await its future,
+    which resolves only after the transaction containing the unit has been
+    committed. The first unit in an empty queue opens a window of
+    ``max_delay`` seconds; everything queued during the window (up to
+    ``max_batch_size`` units) shares a single BEGIN/COMMIT, so one sync is
+    paid per window instead of one per write.
+
+    If any statement in a batch fails, the batch is rolled back and each
+    unit is replayed in its own transaction, so one bad write only fails
+    its own caller.
+    """
+
+    def __init__(
+        self,
+        get_connection: Callable[[], Awaitable[aiosqlite.Connection]],
+        write_lock: asyncio.Lock,
+        max_batch_size: int = 128,
+        max_delay: float = 0.002
+    ):
+        """
+        Initialize write batcher.
+
+        Args:
+            get_connection: Coroutine returning the writer connection
+            write_lock: Lock serializing all use of the writer connection
+            max_batch_size: Maximum number of units per transaction
+            max_delay: Seconds to wait for more units after the first one
+        """
+        self._get_connection = get_connection
+        self._write_lock = write_lock
+        self.max_batch_size = max(max_batch_size, 1)
+        self.max_delay = max(max_delay, 0.0)
+        self._queue: List[_WriteUnit] = []
+        self._wakeup = asyncio.Event()
+        self._full = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._closing = False
+
+        # Counters for diagnostics
+        self.batches_committed = 0
+        self.units_committed = 0
+        # Batches that found the writer lock held, and how long they waited
+        self.lock_waits = 0
+        self.lock_wait_seconds = 0.0
+        # Time inside transactions, which includes SQLite's busy_timeout
+        # waits on other processes' write locks, and writes that gave up
+        self.commit_seconds = 0.0
+        self.busy_errors = 0
+
+    async def execute(self, sql: str, params: tuple = ()) -> int:
+        """
+        Queue a single statement and wait for it to be committed.
+
+        Returns:
+            int: Number of rows affected
+        """
+        rowcounts = await self.submit([(sql, params)])
+        return rowcounts[0]
+
+    async def submit(self, statements: Sequence[Statement]) -> List[int]:
+        """
+        Queue statements that must commit atomically and wait for the commit.
+
+        Args:
+            statements: (sql, params) pairs executed in order
+
+        Returns:
+            list: Row count of each statement
+        """
+        unit = self._enqueue(statements)
+        return await unit.future
+
+    async def insert(self, statements: Sequence[Statement]) -> List[int]:
+        """
+        Like submit(), but return the rowid each statement inserted.
+
+        Args:
+            statements: (sql, params) pairs executed in order
+
+        Returns:
+            list: Last inserted rowid after each statement
+        """
+        unit = self._enqueue(statements)
+        await unit.future
+        return unit.rowids
+
+    async def insert_many(self, sql: str, rows: Sequence[tuple]) -> List[int]:
+        """
+        Insert many rows with one executemany, committed together.
+
+        Args:
+            sql: INSERT statement
+            rows: Parameters of each row
+
+        Returns:
+            list: Rowid of each inserted row, in order
+        """
+        if not rows:
+            return []
+        unit = self._enqueue([(sql, rows)], many=True)
+        await unit.future
+        return unit.rowids
+
+    def _enqueue(self, statements: Sequence[Statement], many: bool = False) -> _WriteUnit:
+        """Queue a unit for the next batch"""
+        if self._closing:
+            raise RuntimeError("Write batcher is closed")
+
+        self._ensure_started()
+        unit = _WriteUnit(statements, asyncio.get_running_loop().create_future(), many)
+        self._queue.append(unit)
+        self._wakeup.set()
+        if len(self._queue) >= self.max_batch_size:
+            self._full.set()
+        return unit
+
+    def _ensure_started(self):
+        """Start the flush loop on first use"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def _run(self):
+        """Collect units into batches and commit them"""
+        while True:
+            await self._wakeup.wait()
+
+            if self.max_delay > 0 and len(self._queue) < self.max_batch_size and not self._closing:
+                try:
+                    await asyncio.wait_for(self._full.wait(), timeout=self.max_delay)
+                except asyncio.TimeoutError:
+                    pass
+
+            batch = self._queue[:self.max_batch_size]
+            del self._queue[:self.max_batch_size]
+            if len(self._queue) < self.max_batch_size:
+                self._full.clear()
+            if not self._queue:
+                self._wakeup.clear()
+
+            if batch:
+                await self._commit(batch)
+
+            if self._closing and not self._queue:
+                return
+
+    async def _commit(self, batch: List[_WriteUnit]):
+        """Commit a batch in one transaction, falling back to per-unit commits on error"""
+        contended = self._write_lock.locked()
+        requested = time.perf_counter()
+        async with self._write_lock:
+            acquired = time.perf_counter()
+            if contended:
+                self.lock_waits += 1
+                self.lock_wait_seconds += acquired - requested
+            conn = None
+            try:
+                conn = await self._get_connection()
+                results = await self._run_transaction(conn, batch)
+                self.commit_seconds += time.perf_counter() - acquired
+            except Exception as e:
+                self._count_busy(e)
+                if conn is None or len(batch) == 1:
+                    for unit in batch:
+                        self._resolve(unit, error=e)
+                    return
+                logger.warning(f"Batched write failed ({e}); retrying {len(batch)} writes individually")
+                for unit in batch:
+                    try:
+                        rowcounts = await self._run_transaction(conn, [unit])
+                        self._resolve(unit, rowcounts[0])
+                    except Exception as unit_error:
+                        self._count_busy(unit_error)
+                        self._resolve(unit, error=unit_error)
+                return
+
+        self.batches_committed += 1
+        self.units_committed += len(batch)
+        for unit, rowcounts in zip(batch, results):
+            self._resolve(unit, rowcounts)
+
+    @staticmethod
+    async def _run_transaction(conn: aiosqlite.Connection, batch: List[_WriteUnit]) -> List[List[int]]:
+        """Execute units inside a single BEGIN/COMMIT"""
+        await conn.execute("BEGIN")
+        try:
+            results = []
+            rowids = []
+            for unit in batch:
+                rowcounts = []
+                unit_rowids = []
+                if unit.many:
+                    sql, rows = unit.statements[0]
+                    cursor = await conn.executemany(sql, rows)
+                    rowcounts.append(cursor.rowcount)
+                    # executemany leaves lastrowid unset; rows inserted back to
+                    # back by the only writer get consecutive rowids
+                    async with conn.execute("SELECT last_insert_rowid()") as last:
+                        last_rowid = (await last.fetchone())[0]
+                    unit_rowids.extend(range(last_rowid - len(rows) + 1, last_rowid + 1))
+                else:
+                    for sql, params in unit.statements:
+                        cursor = await conn.execute(sql, params)
+                        rowcounts.append(cursor.rowcount)
+                        unit_rowids.append(cursor.lastrowid)
+                results.append(rowcounts)
+                rowids.append(unit_rowids)
+            await conn.commit()
+            for unit, unit_rowids in zip(batch, rowids):
+                unit.rowids = unit_rowids
+            return results
+        except BaseException:
+            await conn.rollback()
+            raise
+
+    def _count_busy(self, error: BaseException):
+        """Count a write that failed because another connection held the database"""
+        if isinstance(error, sqlite3.OperationalError) and "locked" in str(error):
+            self.busy_errors += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Commit and writer-lock counters"""
+        return {
+            "batches_committed": self.batches_committed,
+            "units_committed": self.units_committed,
+            "lock_waits": self.lock_waits,
+            "lock_wait_ms": round(self.lock_wait_seconds * 1000, 3),
+            "commit_ms": round(self.commit_seconds * 1000, 3),
+            "busy_errors": self.busy_errors,
+        }
+
+    @staticmethod
+    def _resolve(unit: _WriteUnit, rowcounts: Optional[List[int]] = None, error: Optional[BaseException] = None):
+        """Complete a caller's future unless it was cancelled"""
+        if unit.future.done():
+            return
+        if error is not None:
+            unit.future.set_exception(error)
+        else:
+            unit.future.set_result(rowcounts)
+
+    async def close(self):
+        """Flush pending writes and stop the flush loop"""
+        self._closing = True
+        if self._task is None or self._task.done():
+            return
+        self._wakeup.set()
+        self._full.set()
+        try:
+            await self._task
+        finally:
+            self._task = None
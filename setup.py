@@ -22,6 +22,7 @@ setup(
     extras_require={
         "server": [
             "fastapi>=0.104.1",
+            "orjson>=3.9.10",
             "uvicorn[standard]>=0.24.0",
             "redis>=5.0.1",
             "aiosqlite>=0.19.0",
@@ -32,6 +33,7 @@ setup(
         "dev": [
             "pytest>=7.4.3",
             "pytest-asyncio>=0.21.1",
+            "fakeredis[lua]>=2.20.0",
         ],
     },
     entry_points={
@@ -9,7 +9,19 @@ from .models import (
     UpdateContextResponse,
     SendMessageRequest,
     SendMessageResponse,
+    BatchMessage,
+    BatchSendRequest,
+    BatchSendResult,
+    BatchSendResponse,
+    InboxRequest,
+    InboxResponse,
     PollMessagesResponse,
+    Channel,
+    CreateChannelRequest,
+    ListChannelsResponse,
+    ChannelMembersResponse,
+    ThreadSummary,
+    ThreadResponse,
     WhoisResponse,
     ListAgentsResponse,
 )
@@ -23,6 +35,7 @@ from .constants import (
     AGENT_STATUS_INACTIVE,
     CHANNEL_PUBLIC,
     CHANNEL_DM,
+    CHANNEL_NAME_MAX_LENGTH,
 )
 
 __all__ = [
@@ -34,7 +47,19 @@ __all__ = [
     "UpdateContextResponse",
     "SendMessageRequest",
     "SendMessageResponse",
+    "BatchMessage",
+    "BatchSendRequest",
+    "BatchSendResult",
+    "BatchSendResponse",
+    "InboxRequest",
+    "InboxResponse",
     "PollMessagesResponse",
+    "Channel",
+    "CreateChannelRequest",
+    "ListChannelsResponse",
+    "ChannelMembersResponse",
+    "ThreadSummary",
+    "ThreadResponse",
     "WhoisResponse",
     "ListAgentsResponse",
     "API_VERSION",
@@ -46,4 +71,5 @@ __all__ = [
     "AGENT_STATUS_INACTIVE",
     "CHANNEL_PUBLIC",
     "CHANNEL_DM",
+    "CHANNEL_NAME_MAX_LENGTH",
 ]
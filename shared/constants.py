@@ -8,6 +8,9 @@ AGENT_STATUS_INACTIVE = "inactive"
 CHANNEL_PUBLIC = "public"
 CHANNEL_DM = "dm"
 
+# Group channels: named, member-only channels (any other channel value)
+CHANNEL_NAME_MAX_LENGTH = 64
+
 # API Configuration
 API_VERSION = "v1"
 API_BASE_PATH = "/api/v1"
@@ -18,3 +21,22 @@ CONTEXT_SUMMARY_MAX_LENGTH = 255  # Max description length
 
 # Agent Configuration
 HEARTBEAT_INTERVAL = 30  # seconds
+
+# Redis key layout (storage_backend = "redis")
+REDIS_SCHEMA_VERSION = "hive:schema"  # Key layout version, see RedisManager.initialize()
+REDIS_SEQ = "hive:seq"  # Last message seq handed out
+REDIS_MESSAGES_LOG = "hive:messages:log"  # Every message, scored by seq
+REDIS_MESSAGES_TIMELINE = "hive:messages:timeline"  # seq members, scored by send time
+REDIS_MESSAGES_PUBLIC = "hive:messages:public"
+REDIS_MESSAGES_DM_PREFIX = "hive:messages:dm:"  # + DM pair key
+REDIS_MESSAGES_DM_PAIRS = "hive:messages:dm_pairs"  # Every DM pair sorted set
+REDIS_INBOX_PREFIX = "hive:inbox:"  # + agent ID: DMs sent and received, scored by seq
+REDIS_AGENT_DM_PAIRS_PREFIX = "hive:agent:dms:"  # + agent ID: its DM pair sorted sets
+REDIS_MESSAGES_CHANNEL_PREFIX = "hive:messages:channel:"  # + group channel name
+REDIS_MESSAGE_INDEXES = "hive:messages:indexes"  # Every per-channel/pair/thread key
+REDIS_AGENT_FIELD_PREFIX = "hive:agents:"  # + agent field: agent_id -> value hash
+REDIS_AGENTS_ACTIVE = "hive:agents:active"  # Active agents, scored by last heartbeat
+REDIS_CHANNELS = "hive:channels"  # Group channel name -> JSON details
+REDIS_CHANNEL_MEMBERS_PREFIX = "hive:channel:members:"  # + channel name
+REDIS_AGENT_CHANNELS_PREFIX = "hive:agent:channels:"  # + agent ID
+REDIS_THREAD_PREFIX = "hive:thread:"  # + summary: / messages: / participants: + thread ID
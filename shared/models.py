@@ -2,7 +2,7 @@
 
 from __future__ import annotations
 from datetime import datetime
-from typing import Optional, List
+from typing import Dict, Optional, List
 from pydantic import BaseModel, Field
 
 
@@ -20,7 +20,7 @@ class Message(BaseModel):
     message_id: str
     from_agent: str
     to_agent: Optional[str] = None  # None for public channel
-    channel: str  # "public" or "dm"
+    channel: str  # "public", "dm" or a group channel's name
     content: str
     timestamp: datetime
     thread_id: Optional[str] = None
@@ -64,10 +64,99 @@ class SendMessageResponse(BaseModel):
     timestamp: datetime
 
 
+class BatchMessage(BaseModel):
+    """One message of a batch send (to_agent None = public channel)."""
+    content: str = Field(..., max_length=10240)
+    to_agent: Optional[str] = None
+    thread_id: Optional[str] = None
+
+
+class BatchSendRequest(BaseModel):
+    """Batch send request: public messages and DMs from one sender."""
+    messages: List[BatchMessage] = Field(..., min_length=1, max_length=500)
+
+
+class BatchSendResult(BaseModel):
+    """Outcome of one message of a batch send."""
+    index: int
+    status: str  # "sent" or "failed"
+    message_id: Optional[str] = None
+    error: Optional[str] = None
+
+
+class BatchSendResponse(BaseModel):
+    """Batch send response, with one result per message in request order."""
+    results: List[BatchSendResult]
+    sent: int
+    failed: int
+    timestamp: datetime
+
+
+class InboxRequest(BaseModel):
+    """Multi-agent inbox request."""
+    agent_ids: List[str] = Field(..., min_length=1, max_length=100)
+    cursors: Dict[str, str] = Field(default_factory=dict)  # agent_id -> next_cursor of its last page
+    limit: int = Field(50, ge=1, le=100)
+
+
 class PollMessagesResponse(BaseModel):
     """Poll messages response."""
     messages: List[Message]
     has_more: bool
+    next_cursor: Optional[str] = None  # Pass back as ?cursor= to resume after these messages
+
+
+class InboxResponse(BaseModel):
+    """Multi-agent inbox response."""
+    inboxes: Dict[str, PollMessagesResponse]  # agent_id -> that agent's DMs
+    unknown_agents: List[str] = []
+
+
+class Channel(BaseModel):
+    """Group channel information model."""
+    name: str
+    description: Optional[str] = None
+    created_by: str
+    created_at: datetime
+    member_count: int = 0
+    message_count: int = 0
+
+
+class CreateChannelRequest(BaseModel):
+    """Group channel creation request."""
+    name: str = Field(..., min_length=1, max_length=64)
+    description: Optional[str] = Field(None, max_length=200)
+
+
+class ListChannelsResponse(BaseModel):
+    """List group channels response."""
+    channels: List[Channel]
+    count: int
+
+
+class ChannelMembersResponse(BaseModel):
+    """Group channel membership response."""
+    channel: str
+    members: List[str]
+    count: int
+
+
+class ThreadSummary(BaseModel):
+    """Thread summary, maintained as messages are stored."""
+    thread_id: str
+    message_count: int
+    reply_count: int  # Messages after the first one
+    participants: List[str]
+    started_at: datetime
+    last_activity: datetime
+
+
+class ThreadResponse(BaseModel):
+    """A page of a thread's messages, with its summary."""
+    thread: ThreadSummary
+    messages: List[Message]
+    has_more: bool
+    next_cursor: Optional[str] = None  # Pass back as ?cursor= to resume after these messages
 
 
 class WhoisResponse(BaseModel):
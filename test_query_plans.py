@@ -0,0 +1,268 @@
+"""Query-plan regression tests for the hot SQLite queries
+
+Builds a database with HIVE_QUERY_PLAN_ROWS messages (default one million)
+through SQLiteManager's own migrations, then runs EXPLAIN QUERY PLAN on
+every hot query. A query fails if its plan scans a whole table, sorts
+through a temporary b-tree, or stops using the index it was designed for.
+
+Run directly (python3 test_query_plans.py) or through pytest.
+"""
+import asyncio
+import os
+import re
+import sqlite3
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+from server.storage import sqlite_manager as sm
+from server.storage.migrations import COUNTER_CHANNEL
+from server.storage.sqlite_manager import SQLiteManager
+from shared.constants import AGENT_STATUS_ACTIVE, CHANNEL_DM, CHANNEL_PUBLIC
+
+ROW_COUNT = int(os.getenv("HIVE_QUERY_PLAN_ROWS", "1000000"))
+AGENT_COUNT = 500
+GROUP_COUNT = 50
+THREAD_COUNT = 100
+
+AGENT = {"agent": "agent-7", "other": "agent-8", "channel": CHANNEL_DM, "after": 1000, "limit": 100}
+THREAD = {"thread": "thread-7", "agent": "agent-7", "public": CHANNEL_PUBLIC, "after": 1000, "limit": 100}
+POLL = {"agent": "agent-7", "public": CHANNEL_PUBLIC, "dm": CHANNEL_DM, "after": 1000, "limit": 100}
+
+# name -> (sql, params, indexes the plan must use)
+HOT_QUERIES: Dict[str, Tuple[str, object, List[str]]] = {
+    "public_after_cursor": (
+        sm.SQL_CHANNEL_AFTER,
+        {"channel": CHANNEL_PUBLIC, "after": 1000, "limit": 100},
+        ["idx_messages_channel_seq"],
+    ),
+    "public_latest": (
+        sm.SQL_CHANNEL_LATEST,
+        {"channel": CHANNEL_PUBLIC, "limit": 100},
+        ["idx_messages_channel_seq"],
+    ),
+    "dm_after_cursor": (
+        sm.SQL_DM_AFTER,
+        AGENT,
+        ["idx_messages_to_seq", "idx_messages_from_seq"],
+    ),
+    "dm_latest": (
+        sm.SQL_DM_LATEST,
+        AGENT,
+        ["idx_messages_to_seq", "idx_messages_from_seq"],
+    ),
+    "dm_pair_after_cursor": (
+        sm.SQL_DM_PAIR_AFTER,
+        AGENT,
+        ["idx_messages_to_seq"],
+    ),
+    "dm_pair_latest": (
+        sm.SQL_DM_PAIR_LATEST,
+        AGENT,
+        ["idx_messages_to_seq"],
+    ),
+    "first_seq_since": (
+        sm.SQL_FIRST_SEQ_SINCE,
+        ("2025-01-01T00:00:00",),
+        ["idx_messages_timestamp"],
+    ),
+    "latest_seq": (sm.SQL_LATEST_SEQ, (), []),
+    "messages_after": (sm.SQL_MESSAGES_AFTER, (1000, 500), ["INTEGER PRIMARY KEY"]),
+    "count_after": (sm.SQL_COUNT_AFTER, (1000,), ["INTEGER PRIMARY KEY"]),
+    "counter": (sm.SQL_COUNTER, (COUNTER_CHANNEL, CHANNEL_PUBLIC), ["PRIMARY KEY"]),
+    "poll_counts": (
+        sm.SQL_POLL_COUNTS,
+        POLL,
+        ["PRIMARY KEY", "idx_channel_members_agent"],
+    ),
+    "group_after_cursor": (
+        sm.SQL_CHANNEL_AFTER,
+        {"channel": "team-7", "after": 1000, "limit": 100},
+        ["idx_messages_channel_seq"],
+    ),
+    "agent_channels": (sm.SQL_AGENT_CHANNELS, ("agent-7",), ["idx_channel_members_agent"]),
+    "channel_members": (sm.SQL_CHANNEL_MEMBERS, ("team-7",), ["PRIMARY KEY"]),
+    "is_member": (sm.SQL_IS_MEMBER, ("team-7", "agent-7"), ["PRIMARY KEY"]),
+    "join_channel": (
+        sm.SQL_JOIN_CHANNEL,
+        {"channel": "team-7", "agent": "agent-7", "now": "2025-01-01T00:00:00"},
+        ["sqlite_autoindex_channels_1"],
+    ),
+    "thread_after_cursor": (sm.SQL_THREAD_AFTER, THREAD, ["idx_messages_thread_seq"]),
+    "thread_latest": (sm.SQL_THREAD_LATEST, THREAD, ["idx_messages_thread_seq"]),
+    "thread_summary": (sm.SQL_THREAD_SUMMARY, ("thread-7",), ["PRIMARY KEY"]),
+    "thread_participants": (sm.SQL_THREAD_PARTICIPANTS, ("thread-7",), ["PRIMARY KEY"]),
+    "poll_inbox": (
+        sm.SQL_POLL_INBOX,
+        POLL,
+        ["idx_messages_channel_seq", "idx_messages_to_seq", "idx_messages_from_seq"],
+    ),
+    "prune_before": (
+        sm.SQL_PRUNE_BEFORE,
+        {"cutoff": "2025-01-01T00:00:00", "limit": 500},
+        ["idx_messages_timestamp"],
+    ),
+    "prune_channel": (
+        sm.SQL_PRUNE_CHANNEL,
+        {"channel": CHANNEL_PUBLIC, "limit": 500},
+        ["idx_messages_channel_seq"],
+    ),
+    "prune_dm_pair": (
+        sm.SQL_PRUNE_DM_PAIR,
+        {"agent": "agent-7", "other": "agent-8", "limit": 500},
+        ["idx_messages_to_seq"],
+    ),
+    "archive_batch": (sm.SQL_ARCHIVE_BATCH, (5000, 500), ["INTEGER PRIMARY KEY"]),
+    "oldest_message": (sm.SQL_OLDEST_MESSAGE, (), ["INTEGER PRIMARY KEY"]),
+    "counters_over": (sm.SQL_COUNTERS_OVER, (COUNTER_CHANNEL, 1000), ["PRIMARY KEY"]),
+    "flush_heartbeat": (
+        sm.SQL_FLUSH_HEARTBEAT,
+        {"agent": "agent-7", "now": "2025-01-01T00:00:00", "status": AGENT_STATUS_ACTIVE},
+        ["sqlite_autoindex_agents_1"],
+    ),
+    "inactive_agents": (
+        sm.SQL_INACTIVE_AGENTS,
+        ("2025-01-01T00:00:00", AGENT_STATUS_ACTIVE),
+        ["idx_agents_status_heartbeat"],
+    ),
+}
+
+FULL_SCAN = re.compile(r"^SCAN (TABLE )?(messages|agents|channel_members|threads|thread_participants)\b")
+TEMP_SORT = re.compile(r"USE TEMP B-TREE FOR ORDER BY")
+
+
+def build_database(path: str, rows: int):
+    """Create the schema via SQLiteManager and bulk-load synthetic traffic"""
+    async def create_schema():
+        db = SQLiteManager(path)
+        await db.initialize()
+        await db.close()
+
+    asyncio.run(create_schema())
+
+    conn = sqlite3.connect(path)
+    with conn:
+        conn.execute(
+            """
+            WITH RECURSIVE n(i) AS (SELECT 0 UNION ALL SELECT i + 1 FROM n WHERE i + 1 < ?)
+            INSERT INTO agents (agent_id, context_summary, registered_at, last_heartbeat, status)
+            SELECT 'agent-' || i, 'synthetic', '2025-01-01T00:00:00', '2025-01-01T00:00:00', ?
+            FROM n
+            """,
+            (AGENT_COUNT, AGENT_STATUS_ACTIVE)
+        )
+        # Group channels, each agent a member of three
+        conn.execute(
+            """
+            WITH RECURSIVE n(i) AS (SELECT 0 UNION ALL SELECT i + 1 FROM n WHERE i + 1 < ?)
+            INSERT INTO channels (name, created_by, created_at)
+            SELECT 'team-' || i, 'agent-' || i, '2025-01-01T00:00:00' FROM n
+            """,
+            (GROUP_COUNT,)
+        )
+        conn.execute(
+            """
+            WITH RECURSIVE n(i) AS (SELECT 0 UNION ALL SELECT i + 1 FROM n WHERE i + 1 < :members)
+            INSERT OR IGNORE INTO channel_members (channel, agent_id, joined_at)
+            SELECT 'team-' || ((i % :agents + i / :agents * 17) % :groups), 'agent-' || (i % :agents),
+                '2025-01-01T00:00:00'
+            FROM n
+            """,
+            {"members": AGENT_COUNT * 3, "agents": AGENT_COUNT, "groups": GROUP_COUNT}
+        )
+        # Generated inside SQLite: one message per millisecond, three in ten
+        # are DMs, one in ten goes to a group channel and one in twenty is
+        # part of a thread
+        conn.execute(
+            """
+            WITH RECURSIVE n(i) AS (SELECT 0 UNION ALL SELECT i + 1 FROM n WHERE i + 1 < :rows)
+            INSERT INTO messages (message_id, from_agent, to_agent, channel, content, timestamp, thread_id)
+            SELECT
+                printf('msg_%016x', i),
+                'agent-' || (i * 31 % :agents),
+                CASE WHEN i % 10 < 3 THEN 'agent-' || (i * 7919 % :agents) END,
+                CASE
+                    WHEN i % 10 < 3 THEN :dm
+                    WHEN i % 10 = 3 THEN 'team-' || (i / 10 % :groups)
+                    ELSE :public
+                END,
+                'synthetic message body',
+                strftime('%Y-%m-%dT%H:%M:%S', '2025-01-01', '+' || (i / 1000) || ' seconds')
+                    || printf('.%06d', i % 1000 * 1000),
+                CASE WHEN i % 20 = 0 THEN 'thread-' || (i / 20 % :threads) END
+            FROM n
+            """,
+            {
+                "rows": rows,
+                "agents": AGENT_COUNT,
+                "groups": GROUP_COUNT,
+                "threads": THREAD_COUNT,
+                "dm": CHANNEL_DM,
+                "public": CHANNEL_PUBLIC,
+            }
+        )
+    conn.close()
+
+
+def explain(conn: sqlite3.Connection, sql: str, params) -> List[str]:
+    """Return the detail column of EXPLAIN QUERY PLAN"""
+    return [row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}", params)]
+
+
+def check_plans(conn: sqlite3.Connection) -> List[str]:
+    """Check every hot query's plan, returning a list of failures"""
+    failures = []
+    for name, (sql, params, indexes) in HOT_QUERIES.items():
+        plan = explain(conn, sql, params)
+        plan_text = "\n".join(plan)
+
+        for line in plan:
+            if FULL_SCAN.search(line):
+                failures.append(f"{name}: full scan ({line})")
+            if TEMP_SORT.search(line):
+                failures.append(f"{name}: sorts through a temp b-tree ({line})")
+
+        for index in indexes:
+            if index not in plan_text:
+                failures.append(f"{name}: does not use {index}\n    " + "\n    ".join(plan))
+
+    return failures
+
+
+def run_checks(rows: int = ROW_COUNT) -> List[str]:
+    """Build a database and check plans both without and with ANALYZE statistics"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = str(Path(tmp) / "query_plans.db")
+
+        started = time.perf_counter()
+        build_database(path, rows)
+        print(f"Loaded {rows:,} messages in {time.perf_counter() - started:.1f}s")
+
+        conn = sqlite3.connect(path)
+        try:
+            failures = [f"[no stats] {f}" for f in check_plans(conn)]
+            conn.execute("ANALYZE")
+            failures += [f"[analyzed] {f}" for f in check_plans(conn)]
+        finally:
+            conn.close()
+
+    return failures
+
+
+def test_hot_query_plans():
+    """No hot query may degrade to a full scan"""
+    failures = run_checks()
+    assert not failures, "\n".join(failures)
+
+
+if __name__ == "__main__":
+    print(f"Checking {len(HOT_QUERIES)} hot query plans...")
+    print("-" * 50)
+    failures = run_checks()
+    if failures:
+        for failure in failures:
+            print(f"✗ {failure}")
+        sys.exit(1)
+    print(f"✓ All {len(HOT_QUERIES)} hot queries use their indexes")
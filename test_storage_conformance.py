@@ -0,0 +1,641 @@
+"""Storage backend conformance suite and benchmark
+
+Runs the same functional checks, and the same throughput/latency workload,
+against every storage backend, so a backend that passes can serve the API
+and the MCP server, and backends can be compared on one workload.
+
+Each check gets a fresh, empty store. The Redis backend runs against
+fakeredis and is skipped when fakeredis is not installed.
+
+Run: python test_storage_conformance.py [--backend NAME] [--bench]
+         [--agents N] [--messages N] [--polls N] [--json]
+"""
+import argparse
+import asyncio
+import json
+import shutil
+import sys
+import tempfile
+import time
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional
+
+from server.api.messages import next_cursor
+from server.models.message import decode_cursor, generate_message_id
+from server.storage.archive import MessageArchive
+from server.storage.backend import StorageBackend
+from server.storage.memory_manager import MemoryManager
+from server.storage.sqlite_manager import SQLiteManager
+
+
+def sqlite_backend(path: str) -> StorageBackend:
+    """SQLite in a scratch directory"""
+    return SQLiteManager(f"{path}/hive.db")
+
+
+def sqlite_memory_backend(path: str) -> StorageBackend:
+    """SQLite in memory (single connection, no WAL)"""
+    return SQLiteManager(":memory:")
+
+
+def memory_backend(path: str) -> StorageBackend:
+    """The in-memory engine, without snapshots"""
+    return MemoryManager(snapshot_path="")
+
+
+def redis_backend(path: str) -> Optional[StorageBackend]:
+    """Redis on a private fakeredis server, or None without fakeredis"""
+    try:
+        import fakeredis
+        from server.storage.redis_manager import RedisManager
+    except ImportError:
+        return None
+    return RedisManager(fakeredis.FakeAsyncRedis(server=fakeredis.FakeServer(), decode_responses=True))
+
+
+# Backend name -> factory taking a scratch directory
+BACKENDS: Dict[str, Callable[[str], Optional[StorageBackend]]] = {
+    "sqlite": sqlite_backend,
+    "sqlite-memory": sqlite_memory_backend,
+    "memory": memory_backend,
+    "redis": redis_backend,
+}
+
+
+def available_backends() -> List[str]:
+    """Names of the backends whose dependencies are installed"""
+    names = []
+    for name, factory in BACKENDS.items():
+        path = tempfile.mkdtemp(prefix="hive-conformance-")
+        try:
+            if factory(path) is not None:
+                names.append(name)
+        finally:
+            shutil.rmtree(path, ignore_errors=True)
+    return names
+
+
+@asynccontextmanager
+async def open_backend(name: str) -> AsyncIterator[StorageBackend]:
+    """A fresh, initialized store of the named backend, closed and removed on exit"""
+    path = tempfile.mkdtemp(prefix="hive-conformance-")
+    try:
+        db = BACKENDS[name](path)
+        await db.initialize()
+        try:
+            yield db
+        finally:
+            await db.close()
+    finally:
+        shutil.rmtree(path, ignore_errors=True)
+
+
+async def send(db: StorageBackend, from_agent: str, content: str, **kwargs) -> str:
+    """Send a message and return its ID"""
+    message_id = generate_message_id()
+    assert await db.send_message(message_id, from_agent, content, **kwargs), f"send failed: {content}"
+    return message_id
+
+
+def contents(messages: List[Dict[str, Any]]) -> List[str]:
+    return [message["content"] for message in messages]
+
+
+async def register(db: StorageBackend, *agent_ids: str):
+    for agent_id in agent_ids:
+        assert await db.register_agent(agent_id, f"{agent_id} context"), f"register failed: {agent_id}"
+
+
+# Checks: each takes an empty store and raises AssertionError on a mismatch
+
+async def check_agents(db: StorageBackend):
+    assert await db.ping()
+    await register(db, "alpha", "beta")
+
+    agent = await db.get_agent("alpha")
+    assert agent["agent_id"] == "alpha" and agent["context_summary"] == "alpha context", agent
+    assert agent["status"] == "active" and agent["registered_at"] and agent["last_heartbeat"], agent
+    assert await db.get_agent("nobody") is None
+
+    assert await db.agent_name_exists("alpha")
+    assert not await db.agent_name_exists("nobody")
+    # IDs are matched exactly, never as prefixes or patterns
+    assert not await db.agent_name_exists("alph")
+
+    assert await db.update_agent_context("alpha", "new context")
+    assert (await db.get_agent("alpha"))["context_summary"] == "new context"
+    assert await db.update_heartbeat("alpha")
+    assert not await db.update_heartbeat("nobody")
+
+    assert set(await db.get_agents(["alpha", "nobody"])) == {"alpha"}
+    assert sorted(await db.list_agents()) == ["alpha", "beta"]
+    assert sorted(a["agent_id"] for a in await db.get_all_agents_details()) == ["alpha", "beta"]
+
+    # Re-registering updates the agent instead of adding another
+    assert await db.register_agent("alpha", "again")
+    assert sorted(await db.list_agents()) == ["alpha", "beta"]
+    assert (await db.get_agent("alpha"))["context_summary"] == "again"
+
+
+async def check_public_messages(db: StorageBackend):
+    await register(db, "alpha")
+    before = datetime.utcnow() - timedelta(seconds=1)
+    head = await db.get_latest_seq()
+    assert head == 0, head
+
+    ids = [await send(db, "alpha", f"public {i}") for i in range(3)]
+    assert await db.get_latest_seq() == head + 3
+
+    messages = await db.get_public_messages(after_seq=head)
+    assert [m["message_id"] for m in messages] == ids, messages
+    assert [m["seq"] for m in messages] == [head + 1, head + 2, head + 3], messages
+    for message in messages:
+        assert message["channel"] == "public" and message["to_agent"] is None, message
+        assert message["from_agent"] == "alpha", message
+        datetime.fromisoformat(message["timestamp"])
+
+    # Cursor paging: oldest first, resuming after the last seq read
+    page = await db.get_public_messages(after_seq=head, limit=2)
+    assert contents(page) == ["public 0", "public 1"], page
+    rest = await db.get_public_messages(after_seq=page[-1]["seq"], limit=2)
+    assert contents(rest) == ["public 2"], rest
+
+    assert contents(await db.get_public_messages(since_timestamp=before)) == ["public 0", "public 1", "public 2"]
+    assert await db.get_public_messages(since_timestamp=datetime.utcnow() + timedelta(hours=1)) == []
+    assert await db.get_public_message_count() == 3
+    assert [m["message_id"] for m in await db.get_messages_after(head)] == ids
+    assert len(await db.get_messages_after(head, limit=1)) == 1
+
+
+async def check_direct_messages(db: StorageBackend):
+    await register(db, "alpha", "beta", "gamma")
+    head = await db.get_latest_seq()
+
+    await send(db, "alpha", "a to b", to_agent="beta")
+    await send(db, "beta", "b to a", to_agent="alpha")
+    await send(db, "alpha", "a to c", to_agent="gamma")
+    await send(db, "alpha", "public")
+
+    messages = await db.get_dm_messages("alpha", after_seq=head)
+    assert contents(messages) == ["a to b", "b to a", "a to c"], messages
+    assert messages[0]["to_agent"] == "beta" and messages[0]["channel"] != "public", messages[0]
+    assert contents(await db.get_dm_messages("alpha", "beta", after_seq=head)) == ["a to b", "b to a"]
+    assert contents(await db.get_dm_messages("gamma", after_seq=head)) == ["a to c"]
+    assert await db.get_dm_messages("gamma", "beta", after_seq=head) == []
+
+    assert await db.get_dm_message_count("alpha") == 3
+    assert await db.get_dm_message_count("gamma") == 1
+    assert await db.get_dm_pair_message_count("alpha", "beta") == 2
+    assert await db.get_dm_pair_message_count("beta", "alpha") == 2
+
+    first = messages[0]["seq"]
+    inboxes = await db.get_dm_inboxes({"alpha": first, "gamma": head})
+    assert contents(inboxes["alpha"]) == ["b to a", "a to c"], inboxes
+    assert contents(inboxes["gamma"]) == ["a to c"], inboxes
+
+    stats = await db.get_stats()
+    assert stats["public_messages"] == 1 and stats["dm_channels"] == 2, stats
+
+
+async def check_channels(db: StorageBackend):
+    await register(db, "alpha", "beta", "gamma")
+    head = await db.get_latest_seq()
+
+    assert await db.create_channel("team", "alpha", "the team")
+    assert not await db.create_channel("team", "beta")
+    assert await db.get_channel_members("team") == ["alpha"]
+
+    assert await db.join_channel("team", "beta")
+    assert await db.join_channel("team", "beta")
+    assert not await db.join_channel("missing", "beta")
+    assert await db.get_channel("missing") is None
+    assert await db.join_channel("auto", "gamma", create=True)
+
+    assert await db.is_channel_member("team", "beta")
+    assert not await db.is_channel_member("team", "gamma")
+    assert await db.get_agent_channels("beta") == ["team"]
+    assert await db.get_agent_channels("gamma") == ["auto"]
+
+    await send(db, "alpha", "hello team", channel="team")
+    await send(db, "alpha", "public")
+    assert contents(await db.get_channel_messages("team", after_seq=head)) == ["hello team"]
+    assert contents(await db.get_channel_messages("team")) == ["hello team"]
+    assert contents(await db.get_public_messages(after_seq=head)) == ["public"]
+
+    # A message is either a DM or a group message, never both
+    assert not await db.send_message(generate_message_id(), "alpha", "both", to_agent="beta", channel="team")
+    both = {"message_id": generate_message_id(), "content": "both", "to_agent": "beta", "channel": "team"}
+    assert not await db.send_messages("alpha", [{"message_id": generate_message_id(), "content": "fine"}, both])
+    assert await db.poll("alpha", outgoing=[both], after_seq=head) is None
+    assert contents(await db.get_messages_after(head)) == ["hello team", "public"]
+    assert await db.get_dm_message_count("beta") == 0
+
+    channel = await db.get_channel("team")
+    assert channel["name"] == "team" and channel["description"] == "the team", channel
+    assert channel["member_count"] == 2 and channel["message_count"] == 1, channel
+    assert [c["name"] for c in await db.list_channels()] == ["auto", "team"]
+
+    assert await db.leave_channel("team", "beta")
+    assert await db.get_channel_members("team") == ["alpha"]
+    assert not await db.is_channel_member("team", "beta")
+
+
+async def check_threads(db: StorageBackend):
+    await register(db, "alpha", "beta", "gamma")
+    head = await db.get_latest_seq()
+
+    root = await send(db, "alpha", "question", thread_id="t-1")
+    await send(db, "beta", "answer", thread_id="t-1")
+    await send(db, "alpha", "aside", to_agent="beta", thread_id="t-1")
+    await send(db, "alpha", "unrelated")
+
+    thread = await db.get_thread("t-1")
+    assert thread["thread_id"] == "t-1", thread
+    assert thread["message_count"] == 3 and thread["reply_count"] == 2, thread
+    assert thread["participants"] == ["alpha", "beta"], thread
+    assert thread["started_at"] <= thread["last_activity"], thread
+    assert await db.get_thread("missing") is None
+
+    assert contents(await db.get_thread_messages("t-1", after_seq=head)) == ["question", "answer", "aside"]
+    # Readers only see the thread's DMs they are part of
+    assert contents(await db.get_thread_messages("t-1", "gamma", after_seq=head)) == ["question", "answer"]
+    assert contents(await db.get_thread_messages("t-1", "beta", after_seq=head)) == ["question", "answer", "aside"]
+    assert (await db.get_thread_messages("t-1", after_seq=head))[0]["message_id"] == root
+
+
+async def check_batch_send(db: StorageBackend):
+    await register(db, "alpha", "beta")
+    assert await db.create_channel("team", "alpha")
+    head = await db.get_latest_seq()
+
+    assert await db.send_messages("alpha", [
+        {"message_id": generate_message_id(), "content": "one"},
+        {"message_id": generate_message_id(), "content": "two", "to_agent": "beta"},
+        {"message_id": generate_message_id(), "content": "three", "channel": "team"},
+    ])
+    messages = await db.get_messages_after(head)
+    assert contents(messages) == ["one", "two", "three"], messages
+    assert [m["seq"] for m in messages] == [head + 1, head + 2, head + 3], messages
+    assert await db.get_latest_seq() == head + 3
+
+
+async def check_poll(db: StorageBackend):
+    await register(db, "alpha", "beta", "gamma")
+    assert await db.create_channel("team", "alpha")
+    assert await db.join_channel("team", "beta")
+    head = await db.get_latest_seq()
+
+    sent = await db.poll("alpha", outgoing=[
+        {"message_id": generate_message_id(), "content": "p1"},
+        {"message_id": generate_message_id(), "content": "d1", "to_agent": "beta"},
+        {"message_id": generate_message_id(), "content": "g1", "channel": "team"},
+    ], after_seq=head)
+    assert sent is not None
+    assert sent["cursor"] == head + 3, sent
+
+    result = await db.poll("beta", after_seq=head)
+    assert contents(result["messages"]) == ["p1", "d1", "g1"], result
+    assert result["cursor"] == head + 3, result
+    assert result["public_count"] == 1 and result["dm_count"] == 1 and result["group_count"] == 1, result
+    assert result["channels"] == ["team"], result
+    assert {"alpha", "beta"} <= {a["agent_id"] for a in result["agents"]}, result["agents"]
+
+    # Channels the agent is not in and other agents' DMs stay out of its inbox
+    result = await db.poll("gamma", after_seq=head)
+    assert contents(result["messages"]) == ["p1"], result
+    assert result["channels"] == [], result
+
+    # Polling from the returned cursor delivers each message exactly once
+    cursor, delivered = head, []
+    for _ in range(10):
+        result = await db.poll("beta", after_seq=cursor, limit=1)
+        if not result["messages"]:
+            break
+        delivered += contents(result["messages"])
+        assert result["cursor"] > cursor, result
+        cursor = result["cursor"]
+    assert delivered == ["p1", "d1", "g1"], delivered
+    assert (await db.poll("beta", after_seq=cursor))["messages"] == []
+
+    # A poll registers an unknown agent and updates its description
+    assert await db.poll("delta", description="new here", after_seq=head) is not None
+    assert (await db.get_agent("delta"))["context_summary"] == "new here"
+    assert "delta" in {a["agent_id"] for a in db.active_roster()}
+
+    # Thread polls read only the thread
+    await send(db, "alpha", "in thread", thread_id="t-1")
+    await send(db, "alpha", "outside")
+    result = await db.poll("beta", after_seq=head, thread_id="t-1")
+    assert contents(result["messages"]) == ["in thread"], result
+
+
+async def check_wait(db: StorageBackend):
+    await register(db, "alpha")
+    head = await db.get_latest_seq()
+    assert not await db.wait_for_messages(head, 0.05)
+
+    waiter = asyncio.create_task(db.wait_for_messages(head, 5))
+    await asyncio.sleep(0.05)
+    await send(db, "alpha", "wake up")
+    assert await asyncio.wait_for(waiter, 5)
+    # Already past the cursor: returns at once
+    assert await db.wait_for_messages(head, 5)
+
+
+async def check_maintenance(db: StorageBackend):
+    await register(db, "alpha", "beta")
+    await send(db, "alpha", "keep me")
+
+    # Nothing is old enough to remove
+    assert await db.cleanup_inactive_agents() == 0
+    assert await db.prune_messages() == 0
+    assert await db.archive_messages() == 0
+    assert isinstance(await db.reclaim_space(), int)
+    assert await db.get_public_message_count() == 1
+
+    stats = await db.get_stats()
+    assert stats["database_connected"] and stats["active_agents"] == 2, stats
+
+
+CHECKS = [
+    check_agents,
+    check_public_messages,
+    check_direct_messages,
+    check_channels,
+    check_threads,
+    check_batch_send,
+    check_poll,
+    check_wait,
+    check_maintenance,
+]
+
+
+async def run_conformance(backends: List[str]) -> List[str]:
+    """Run every check against each backend; returns the failures"""
+    failures = []
+    for name in backends:
+        for check in CHECKS:
+            try:
+                async with open_backend(name) as db:
+                    await check(db)
+            except Exception as e:
+                failures.append(f"[{name}] {check.__name__}: {type(e).__name__}: {e}")
+    return failures
+
+
+# Benchmark
+
+def percentile(samples: List[float], pct: float) -> float:
+    """Nearest-rank percentile of samples (0 when there are none)"""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))]
+
+
+async def run_benchmark(name: str, agents: int = 20, messages: int = 2000, polls: int = 500) -> Dict[str, Any]:
+    """
+    Run the standard workload against a fresh store of one backend.
+
+    Agents send concurrently, each its share of the messages: every fifth is
+    a DM to the next agent and every fifth a message to a shared channel, the
+    rest public. Then the agents poll concurrently from the start of the log,
+    `polls` polls in total.
+
+    Args:
+        name: Backend name (a key of BACKENDS)
+        agents: Number of simulated agents
+        messages: Messages sent in total
+        polls: Polls made in total
+
+    Returns:
+        dict: Send throughput and latency, poll latency (milliseconds)
+    """
+    agent_ids = [f"bench-agent-{i}" for i in range(agents)]
+    send_times: List[float] = []
+    poll_times: List[float] = []
+
+    async with open_backend(name) as db:
+        await register(db, *agent_ids)
+        assert await db.create_channel("bench", agent_ids[0])
+        for agent_id in agent_ids[1:]:
+            assert await db.join_channel("bench", agent_id)
+        head = await db.get_latest_seq()
+
+        async def sender(index: int):
+            for n in range(index, messages, agents):
+                kwargs = {}
+                if n % 5 == 1:
+                    kwargs["to_agent"] = agent_ids[(index + 1) % agents]
+                elif n % 5 == 2:
+                    kwargs["channel"] = "bench"
+                started = time.perf_counter()
+                ok = await db.send_message(generate_message_id(), agent_ids[index], f"message {n}", **kwargs)
+                send_times.append(time.perf_counter() - started)
+                assert ok, f"send {n} failed"
+
+        started = time.perf_counter()
+        await asyncio.gather(*(sender(i) for i in range(agents)))
+        send_elapsed = time.perf_counter() - started
+
+        async def poller(index: int):
+            for _ in range(index, polls, agents):
+                started = time.perf_counter()
+                result = await db.poll(agent_ids[index], after_seq=head, limit=100)
+                poll_times.append(time.perf_counter() - started)
+                assert result is not None and result["messages"], "poll failed"
+
+        started = time.perf_counter()
+        await asyncio.gather(*(poller(i) for i in range(agents)))
+        poll_elapsed = time.perf_counter() - started
+
+    return {
+        "backend": name,
+        "agents": agents,
+        "messages": messages,
+        "polls": polls,
+        "send_msgs_per_sec": round(messages / send_elapsed, 1) if send_elapsed else 0.0,
+        "send_p50_ms": round(percentile(send_times, 50) * 1000, 3),
+        "send_p99_ms": round(percentile(send_times, 99) * 1000, 3),
+        "polls_per_sec": round(polls / poll_elapsed, 1) if poll_elapsed else 0.0,
+        "poll_p50_ms": round(percentile(poll_times, 50) * 1000, 3),
+        "poll_p95_ms": round(percentile(poll_times, 95) * 1000, 3),
+        "poll_p99_ms": round(percentile(poll_times, 99) * 1000, 3),
+    }
+
+
+async def check_memory_snapshot(path: str):
+    """A memory store restarted from its snapshot resumes where it stopped"""
+    db = MemoryManager(snapshot_path=f"{path}/memory.json")
+    await db.initialize()
+    await register(db, "alpha", "beta")
+    assert await db.create_channel("team", "alpha")
+    await send(db, "alpha", "public", thread_id="t-1")
+    await send(db, "beta", "dm", to_agent="alpha", thread_id="t-1")
+    await send(db, "alpha", "group", channel="team")
+    await db.close()
+
+    db = MemoryManager(snapshot_path=f"{path}/memory.json")
+    await db.initialize()
+    try:
+        assert await db.get_latest_seq() == 3
+        assert contents(await db.get_messages_after(0)) == ["public", "dm", "group"]
+        assert contents(await db.get_dm_messages("beta", after_seq=0)) == ["dm"]
+        assert await db.get_channel_members("team") == ["alpha"]
+        assert (await db.get_thread("t-1"))["participants"] == ["alpha", "beta"]
+        assert sorted(await db.list_agents()) == ["alpha", "beta"]
+        await send(db, "beta", "after restart")
+        assert (await db.get_public_messages(limit=1))[0]["seq"] == 4
+    finally:
+        await db.close()
+
+
+async def check_sqlite_cache_head(path: str):
+    """A poll between a local commit and its cache insert does not skip the message"""
+    db = SQLiteManager(f"{path}/hive.db")
+    await db.initialize()
+    try:
+        await register(db, "alpha", "beta")
+        await send(db, "alpha", "first")
+        # Warm the cache and take a cursor at its head
+        messages = await db.get_public_messages(after_seq=0)
+        cursor = decode_cursor(next_cursor(messages, 50, await db.get_latest_seq(), 0))
+        assert cursor == 1, cursor
+
+        # Hold the cache insert back, as if the sender had not resumed yet
+        held = []
+        insert = db._cache_inserted
+        db._cache_inserted = lambda *args: held.append(args)
+        await send(db, "alpha", "second")
+        db._cache_inserted = insert
+
+        delivered = []
+        for _ in range(2):
+            head_seq = await db.get_latest_seq()
+            messages = await db.get_public_messages(after_seq=cursor)
+            delivered += contents(messages)
+            cursor = decode_cursor(next_cursor(messages, 50, head_seq, cursor))
+            # The sender resumes after the first poll
+            while held:
+                insert(*held.pop())
+        assert delivered == ["second"], delivered
+        assert cursor == 2, cursor
+    finally:
+        await db.close()
+
+
+def test_sqlite_cache_head():
+    """Cursor reads never pass a message that is committed but not yet cached"""
+    path = tempfile.mkdtemp(prefix="hive-conformance-")
+    try:
+        asyncio.run(check_sqlite_cache_head(path))
+    finally:
+        shutil.rmtree(path, ignore_errors=True)
+
+
+async def check_sqlite_archive_crash(path: str):
+    """Messages both archived and still hot are read once"""
+    db = SQLiteManager(f"{path}/hive.db")
+    db.archive = MessageArchive(f"{path}/archive")
+    await db.initialize()
+    try:
+        await register(db, "alpha")
+        for content in ("one", "two", "three", "four"):
+            await send(db, "alpha", content)
+        rows = await db.get_messages_after(0)
+
+        # The first batch moved; the crash hit after archiving the second
+        await db.archive.append(rows[:2])
+        await db._execute_write("DELETE FROM messages WHERE seq BETWEEN ? AND ?", (1, 2))
+        await db.archive.append(rows[2:])
+        await db._reload_cache()
+
+        expected = ["one", "two", "three", "four"]
+        assert contents(await db.get_public_messages(after_seq=0)) == expected
+        since = datetime.fromisoformat(rows[0]["timestamp"]) - timedelta(seconds=1)
+        assert contents(await db.get_public_messages(since_timestamp=since)) == expected
+    finally:
+        await db.close()
+
+
+def test_sqlite_archive_crash():
+    """History reads do not repeat messages left in the hot table by an interrupted archive run"""
+    path = tempfile.mkdtemp(prefix="hive-conformance-")
+    try:
+        asyncio.run(check_sqlite_archive_crash(path))
+    finally:
+        shutil.rmtree(path, ignore_errors=True)
+
+
+def test_memory_snapshot():
+    """The memory backend recovers its state from a snapshot"""
+    path = tempfile.mkdtemp(prefix="hive-conformance-")
+    try:
+        asyncio.run(check_memory_snapshot(path))
+    finally:
+        shutil.rmtree(path, ignore_errors=True)
+
+
+def test_conformance():
+    """Every available backend passes the same functional checks"""
+    failures = asyncio.run(run_conformance(available_backends()))
+    assert not failures, "\n".join(failures)
+
+
+def test_benchmark():
+    """The standard workload runs on every available backend"""
+    for name in available_backends():
+        result = asyncio.run(run_benchmark(name, agents=4, messages=100, polls=20))
+        assert result["send_msgs_per_sec"] > 0 and result["poll_p99_ms"] > 0, result
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="HIVE storage backend conformance suite and benchmark")
+    parser.add_argument("--backend", action="append", choices=sorted(BACKENDS),
+                        help="Backend to test (repeatable; default: every available one)")
+    parser.add_argument("--bench", action="store_true", help="Also run the benchmark")
+    parser.add_argument("--agents", type=int, default=20)
+    parser.add_argument("--messages", type=int, default=2000)
+    parser.add_argument("--polls", type=int, default=500)
+    parser.add_argument("--json", action="store_true", help="Print benchmark results as JSON")
+    args = parser.parse_args()
+
+    available = available_backends()
+    backends = args.backend or available
+    missing = [name for name in backends if name not in available]
+    if missing:
+        print(f"✗ Backend dependencies not installed: {', '.join(missing)}")
+        return 1
+
+    if not args.json:
+        print(f"Checking {len(CHECKS)} behaviours on {', '.join(backends)}...")
+        print("-" * 50)
+    failures = asyncio.run(run_conformance(backends))
+    if failures:
+        for failure in failures:
+            print(f"✗ {failure}")
+        return 1
+    if not args.json:
+        print(f"✓ All {len(backends)} backends conform")
+
+    if args.bench:
+        results = [
+            asyncio.run(run_benchmark(name, args.agents, args.messages, args.polls))
+            for name in backends
+        ]
+        if args.json:
+            print(json.dumps(results, indent=2))
+        else:
+            print(f"\nBenchmark: {args.agents} agents, {args.messages} messages, {args.polls} polls")
+            print(f"{'backend':<15}{'msgs/s':>10}{'send p50':>10}{'send p99':>10}"
+                  f"{'polls/s':>10}{'poll p50':>10}{'poll p95':>10}{'poll p99':>10}")
+            for r in results:
+                print(f"{r['backend']:<15}{r['send_msgs_per_sec']:>10.0f}{r['send_p50_ms']:>8.3f}ms"
+                      f"{r['send_p99_ms']:>8.3f}ms{r['polls_per_sec']:>10.0f}{r['poll_p50_ms']:>8.3f}ms"
+                      f"{r['poll_p95_ms']:>8.3f}ms{r['poll_p99_ms']:>8.3f}ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())